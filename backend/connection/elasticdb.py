@@ -1,9 +1,23 @@
-from elasticsearch import Elasticsearch
 import os
 
 from . import load_env
+from .lazy import LazyProxy, singleton
+from .pool_budget import ES_CONNECTIONS_PER_NODE
 
-es_client = Elasticsearch(
-    hosts=os.getenv("ES_HOST"),
-    basic_auth=(os.getenv("ES_USER"), os.getenv("ES_PASS"))
-)
\ No newline at end of file
+@singleton
+def get_es_client():
+    from elasticsearch import Elasticsearch
+
+    return Elasticsearch(
+        hosts=os.getenv("ES_HOST"),
+        basic_auth=(os.getenv("ES_USER"), os.getenv("ES_PASS")),
+        connections_per_node=ES_CONNECTIONS_PER_NODE,
+    )
+
+def close_es_client() -> None:
+    client = get_es_client.peek()
+    get_es_client.reset()
+    if client is not None:
+        client.close()
+
+es_client = LazyProxy(get_es_client)
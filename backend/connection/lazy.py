@@ -0,0 +1,52 @@
+import functools
+import threading
+from typing import Any, Callable, List, TypeVar
+
+T = TypeVar("T")
+
+# Clients are built on first use, not at import: importing the app stays
+# fast and works with every backing service down, and a preloading server
+# (gunicorn.conf.py) forks before any socket or background thread exists.
+# Each connection module exposes `get_x()` accessors; the old module-level
+# names remain as LazyProxy objects so `from …mongodb import x_collection`
+# keeps working everywhere.
+
+def singleton(factory: Callable[[], T]) -> Callable[[], T]:
+    """
+    Thread-safe build-once accessor around *factory*; ``.reset()`` forgets
+    it and ``.peek()`` returns it only if it was built.
+    """
+    box: List[T] = []
+    lock = threading.Lock()
+
+    @functools.wraps(factory)
+    def get() -> T:
+        if not box:
+            with lock:
+                if not box:
+                    box.append(factory())
+        return box[0]
+
+    get.reset = box.clear                     # type: ignore[attr-defined]
+    get.peek = lambda: box[0] if box else None   # type: ignore[attr-defined]
+    return get
+
+class LazyProxy:
+    """Forwards attribute access, indexing and calls to ``factory()``."""
+
+    __slots__ = ("_factory",)
+
+    def __init__(self, factory: Callable[[], Any]) -> None:
+        object.__setattr__(self, "_factory", factory)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._factory(), name)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._factory()[key]
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self._factory()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"<lazy {getattr(self._factory, '__name__', 'object')}>"
@@ -2,17 +2,53 @@ import os
 from pymongo import MongoClient
 
 import backend.connection.load_env
+from backend.connection.lazy import LazyProxy, singleton
+from backend.connection.pool_budget import MONGO_MAX_POOL_SIZE
 
 uri = os.getenv("MONGO_URI")
 
-client = MongoClient(uri)
-
-db = client["customer_info"]
-words_collection = db["words"]
-photo_collection = db["review_photos"]
-follow_collection = db["follow"]
-restaurant_keywords_collection = db["keywords"]
-user_keywords_collection = db["user_keyword"]
-review_keywords_collection = db["review_keyword"]
-user_rest_score = db["user_rest_score"]
-user_user_score = db["user_user_score"]
\ No newline at end of file
+@singleton
+def get_mongo_client() -> MongoClient:
+    return MongoClient(uri, maxPoolSize=MONGO_MAX_POOL_SIZE)
+
+def get_mongo_db():
+    return get_mongo_client()["customer_info"]
+
+_collection_getters = []
+
+def _collection(name: str) -> LazyProxy:
+    def get():
+        return get_mongo_db()[name]
+
+    get.__name__ = name
+    getter = singleton(get)
+    _collection_getters.append(getter)
+    return LazyProxy(getter)
+
+def close_mongo_client() -> None:
+    """Close the client (if built) and forget it; the next use opens a new one."""
+    client = get_mongo_client.peek()
+    for getter in _collection_getters:
+        getter.reset()
+    get_mongo_client.reset()
+    if client is not None:
+        client.close()
+
+client = LazyProxy(get_mongo_client)
+db = LazyProxy(get_mongo_db)
+
+words_collection = _collection("words")
+photo_collection = _collection("review_photos")
+follow_collection = _collection("follow")
+restaurant_keywords_collection = _collection("keywords")
+user_keywords_collection = _collection("user_keyword")
+review_keywords_collection = _collection("review_keyword")
+user_rest_score = _collection("user_rest_score")
+user_user_score = _collection("user_user_score")
+counters_collection = _collection("counters")
+restaurant_cards_collection = _collection("restaurant_cards")
+geocode_cache_collection = _collection("geocode_cache")
+search_changes_collection = _collection("search_changes")
+sync_state_collection = _collection("sync_state")
+keyword_concepts_collection = _collection("keyword_concepts")
+concept_centroids_collection = _collection("concept_centroids")
@@ -1,26 +1,102 @@
 import os
 
-from sqlalchemy.ext.automap import automap_base
-from sqlalchemy import create_engine
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    create_engine,
+    func,
+)
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from . import load_env
+from .lazy import LazyProxy, singleton
+from .pool_budget import MYSQL_MAX_OVERFLOW, MYSQL_POOL_SIZE
 
 DATABASE_URL = os.getenv("SQL_URL")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = automap_base()
 
-Base.prepare(autoload_with=engine)
+# Explicit models instead of automap reflection: nothing touches MySQL at
+# import.  They declare the columns the app uses; after a schema change run
+# `python -m backend.scripts.check_orm_schema` to compare them with the
+# live tables.
+Base = declarative_base()
 
-Users = Base.classes.Users
-People = Base.classes.People
-Restaurant = Base.classes.Restaurant
-Review = Base.classes.Review
+class People(Base):
+    __tablename__ = "People"
+
+    user_id  = Column(Integer, primary_key=True, autoincrement=True)
+    email    = Column(String(255))
+    passwd   = Column(LargeBinary)
+    bday     = Column(Date)
+    gender   = Column(String(16))
+    nickname = Column(String(255))
+    verified = Column(Boolean)
+
+class Users(Base):
+    __tablename__ = "Users"
+
+    user_id         = Column(Integer, primary_key=True, autoincrement=False)
+    word_cloud      = Column(Text)
+    profile_image   = Column(String(512))
+    follower_count  = Column(Integer)
+    following_count = Column(Integer)
+    state_id        = Column(Integer)
+
+class Restaurant(Base):
+    __tablename__ = "Restaurant"
+
+    restaurant_id = Column(Integer, primary_key=True, autoincrement=True)
+    name          = Column(String(255))
+    location      = Column(String(512))
+    cuisine_type  = Column(String(255))
+    menu_list     = Column(Text)
+    state_id      = Column(Integer)
+    latitude      = Column(Float)
+    longitude     = Column(Float)
+
+class Review(Base):
+    __tablename__ = "Review"
+
+    review_id       = Column(Integer, primary_key=True, autoincrement=True)
+    user_id         = Column(Integer)
+    restaurant_id   = Column(Integer)
+    comments        = Column(Text)
+    review          = Column(Text)
+    photo_filenames = Column(Text)
+    state_id        = Column(Integer)
+    created_at      = Column(DateTime, server_default=func.now())
+
+@singleton
+def get_engine():
+    return create_engine(
+        DATABASE_URL,
+        pool_size=MYSQL_POOL_SIZE,
+        max_overflow=MYSQL_MAX_OVERFLOW,
+        pool_pre_ping=True,
+    )
+
+@singleton
+def get_sessionmaker() -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+def dispose_engine() -> None:
+    """Close pooled connections (if any); the engine opens new ones on demand."""
+    engine = get_engine.peek()
+    if engine is not None:
+        engine.dispose()
+
+engine = LazyProxy(get_engine)
+SessionLocal = LazyProxy(get_sessionmaker)
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
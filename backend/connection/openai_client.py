@@ -1,12 +1,23 @@
-import openai
 import os
 
 from . import load_env
+from .lazy import LazyProxy, singleton
 
-openai_client = openai.OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY")
-)
+@singleton
+def get_openai_client():
+    import openai
 
-openai_async_client = openai.AsyncOpenAI(
-    api_key=os.getenv("OPENAI_API_KEY")
-)
\ No newline at end of file
+    return openai.OpenAI(
+        api_key=os.getenv("OPENAI_API_KEY")
+    )
+
+@singleton
+def get_openai_async_client():
+    import openai
+
+    return openai.AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY")
+    )
+
+openai_client = LazyProxy(get_openai_client)
+openai_async_client = LazyProxy(get_openai_async_client)
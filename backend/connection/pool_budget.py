@@ -0,0 +1,30 @@
+import os
+
+from . import load_env
+from ..services.utilities import available_cpus
+
+# Connection and process budgets are set for the whole deployment and split
+# evenly across the server's worker processes, so adding workers never
+# multiplies the load on MySQL / Mongo / Elasticsearch.  gunicorn.conf.py
+# exports WEB_CONCURRENCY before the app is imported; a plain `uvicorn`
+# run counts as one worker and gets the whole budget.
+
+# ───────────────────────────────────── Tunables ────────────────────────────────
+WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", 1))                       # server workers
+MYSQL_CONNECTION_BUDGET: int = int(os.getenv("MYSQL_CONNECTION_BUDGET", 60))       # pool + overflow, all workers
+MONGO_CONNECTION_BUDGET: int = int(os.getenv("MONGO_CONNECTION_BUDGET", 200))
+ES_CONNECTION_BUDGET: int = int(os.getenv("ES_CONNECTION_BUDGET", 40))
+PASSWORD_PROCESS_BUDGET: int = int(os.getenv("PASSWORD_PROCESS_BUDGET", max(1, available_cpus() // 2)))
+
+def per_worker(budget: int, minimum: int = 1) -> int:
+    """A worker's share of a deployment-wide *budget*."""
+    return max(minimum, budget // max(WEB_CONCURRENCY, 1))
+
+MYSQL_POOL_SIZE: int = int(os.getenv("MYSQL_POOL_SIZE", max(1, per_worker(MYSQL_CONNECTION_BUDGET, 2) * 2 // 3)))
+MYSQL_MAX_OVERFLOW: int = int(os.getenv("MYSQL_MAX_OVERFLOW", max(0, per_worker(MYSQL_CONNECTION_BUDGET, 2) - MYSQL_POOL_SIZE)))
+MONGO_MAX_POOL_SIZE: int = int(os.getenv("MONGO_MAX_POOL_SIZE", per_worker(MONGO_CONNECTION_BUDGET, 4)))
+ES_CONNECTIONS_PER_NODE: int = int(os.getenv("ES_CONNECTIONS_PER_NODE", per_worker(ES_CONNECTION_BUDGET, 2)))
+# Sync routes hold a MySQL session each: more threads than connections would
+# only queue on the pool (QueuePool timeouts), so the threadpool is capped
+# at this worker's connection share
+WORKER_THREADS: int = min(int(os.getenv("WORKER_THREADS", 40)), MYSQL_POOL_SIZE + MYSQL_MAX_OVERFLOW)
@@ -1,16 +1,28 @@
-import boto3
 import os
 
 from typing import Optional
-from botocore.exceptions import ClientError
 
 from . import load_env
+from .lazy import LazyProxy, singleton
 
 BUCKET_NAME: str = "mangoberry-bucket"
 REGION_NAME: Optional[str] = os.getenv("AWS_DEFAULT_REGION", "ap-northeast-2")
 ACL: Optional[str] = None
 STORAGE_CLASS: str = "STANDARD"
 
-session = boto3.Session(region_name=REGION_NAME)
-s3 = session.resource("s3")
-s3_client = session.client("s3")
\ No newline at end of file
+@singleton
+def get_s3_session():
+    import boto3
+
+    return boto3.Session(region_name=REGION_NAME)
+
+@singleton
+def get_s3_resource():
+    return get_s3_session().resource("s3")
+
+@singleton
+def get_s3_client():
+    return get_s3_session().client("s3")
+
+s3 = LazyProxy(get_s3_resource)
+s3_client = LazyProxy(get_s3_client)
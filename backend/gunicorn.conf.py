@@ -0,0 +1,57 @@
+"""
+Production server: gunicorn supervising uvicorn workers.
+
+    gunicorn -c backend/gunicorn.conf.py backend.main:app
+
+One worker per available CPU (affinity mask / cgroup quota) unless
+WEB_CONCURRENCY says otherwise, so `_score_pair` and the other sync routes
+scale past one core.  The app is imported once in the master before
+forking (preload): modules, ORM models, module-level tables and the
+lookup indexes loaded in `on_starting` (geo, name, IP, concepts, snapshot
+maps) are shared copy-on-write; each worker only adds the restaurants
+inserted since.  Clients are built lazily (connection/lazy.py), so
+the master opens no socket or client thread that forks would inherit.
+Connection pools are sized per worker from deployment-wide budgets in
+connection/pool_budget.py, which reads the WEB_CONCURRENCY exported here.
+
+SIGTERM (`docker compose stop`, rolling deploys) drains: workers stop
+accepting, finish in-flight requests for up to GRACEFUL_TIMEOUT_S and run
+the app's lifespan shutdown (bulk indexer flush, pool close).  With
+preload, SIGHUP restarts workers on the *old* code; deploy new code by
+restarting the container.  For local development keep using
+`uvicorn backend.main:app --reload`.
+"""
+import os
+
+from backend.services.utilities import available_cpus
+
+# ───────────────────────────────────── Tunables ────────────────────────────────
+workers = int(os.getenv("WEB_CONCURRENCY", available_cpus()))
+os.environ["WEB_CONCURRENCY"] = str(workers)          # before the app (and pool_budget) is imported
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT_S", 30))
+timeout = int(os.getenv("WORKER_TIMEOUT_S", 60))      # a silent worker is killed and replaced
+keepalive = int(os.getenv("KEEPALIVE_S", 5))
+max_requests = int(os.getenv("WORKER_MAX_REQUESTS", 0))              # 0 = never recycle
+max_requests_jitter = int(os.getenv("WORKER_MAX_REQUESTS_JITTER", 0))
+accesslog = "-"
+errorlog = "-"
+
+# ───────────────────────────── Server hooks ───────────────────────────────────
+def on_starting(server) -> None:
+    """Load the read-only indexes in the master (after preload, before fork)."""
+    from backend.main import preload_indexes
+
+    preload_indexes()
+
+def when_ready(server) -> None:
+    from backend.connection import pool_budget as b
+
+    server.log.info(
+        "%d workers; per worker: mysql %d+%d, mongo %d, es %d/node, %d threads",
+        workers, b.MYSQL_POOL_SIZE, b.MYSQL_MAX_OVERFLOW, b.MONGO_MAX_POOL_SIZE,
+        b.ES_CONNECTIONS_PER_NODE, b.WORKER_THREADS,
+    )
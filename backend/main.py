@@ -1,5 +1,10 @@
+import gc
+import logging
 import sys
+import threading
+from contextlib import asynccontextmanager
 
+from anyio import to_thread
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -12,10 +17,68 @@ from .routers import (
     review_search_router, 
     social_router
 )
+from .connection.elasticdb import close_es_client
+from .connection.mongodb import close_mongo_client
+from .connection.mysqldb import dispose_engine
+from .connection.pool_budget import WORKER_THREADS
+from .services.concepts import ensure_indexes as ensure_concept_indexes, load_concept_index
+from .services.embedding_snapshot import load_embedding_snapshot
+from .services.es_indexer import es_indexer
+from .services.geo_index import load_geo_index, refresh_geo_index
+from .services.ip_geo import load_ip_table
+from .services.kakao import ensure_indexes as ensure_geocode_indexes, kakao_client
+from .services.name_index import load_name_index, refresh_name_index
+from .services.passwords import password_hasher
 
 sys.stdout.reconfigure(encoding='utf-8')
 
-app = FastAPI()
+_preloaded = False
+
+def _run(loaders) -> None:
+    for loader in loaders:
+        try:
+            loader()
+        except Exception:
+            logging.getLogger(__name__).exception("%s failed", loader.__name__)
+
+def _warm_indexes() -> None:
+    """Build in-process lookup indexes without delaying startup."""
+    _run((
+        load_ip_table, load_geo_index, load_name_index,
+        ensure_geocode_indexes, ensure_concept_indexes, load_concept_index,
+        load_embedding_snapshot,
+    ))
+
+def preload_indexes() -> None:
+    """
+    Build the read-only indexes once in the gunicorn master, before it
+    forks (gunicorn.conf.py), so every worker shares them copy-on-write
+    instead of rebuilding a private copy.  The database clients used for
+    loading are closed again: no socket may cross the fork.
+    """
+    global _preloaded
+    _warm_indexes()
+    close_mongo_client()
+    dispose_engine()
+    close_es_client()
+    gc.freeze()             # refcount-only GC passes would otherwise touch (copy) the shared pages
+    _preloaded = True
+
+def _catch_up_indexes() -> None:
+    """Forked worker: add restaurants inserted since the master loaded."""
+    _run((refresh_geo_index, refresh_name_index))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    to_thread.current_default_thread_limiter().total_tokens = WORKER_THREADS
+    warm = _catch_up_indexes if _preloaded else _warm_indexes
+    threading.Thread(target=warm, name="warm-indexes", daemon=True).start()
+    yield
+    es_indexer.close()
+    password_hasher.shutdown()
+    await kakao_client.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost",
@@ -1,22 +1,25 @@
+import csv
 import hashlib
+import io
+import json
 
 import numpy as np
 
 from random import randint
-from typing import Optional
+from typing import Iterator, Optional
 from warnings import warn
 
 from bson import ObjectId
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
 from pydantic import EmailStr
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from passlib.context import CryptContext
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
 from email_validator import validate_email, EmailNotValidError
 
-from ..connection.mysqldb import get_db, People, Users, Review
+from ..connection.mysqldb import get_db, SessionLocal, People, Restaurant, Users
 from ..schemas.user import LoginInput, RegisterInput
 from ..services.calc_score import (
     update_user_to_restaurant_score,
@@ -24,18 +27,12 @@ from ..services.calc_score import (
 )
 from datetime import timedelta
 from ..services.auth import create_access_token, get_current_user
+from ..services.counters import SCOPE_USER, get_many, seed_many_review_counters, sql_follow_counts
+from ..services.http_cache import conditional_json, fresh_json, make_etag
+from ..services.passwords import password_hasher
 from ..schemas.user import Token
 
 router = APIRouter()
-pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def hash_password(plain: str) -> bytes:
-    """Return bcrypt hash as bytes – ready for VARBINARY(60)."""
-    return pwd_ctx.hash(plain).encode("ascii")
-
-def verify_password(plain: str, stored: bytes) -> bool:
-    """Check *plain* against stored bcrypt hash (bytes)."""
-    return pwd_ctx.verify(plain, stored.decode("ascii"))
 
 def _sha256_hex(password: str) -> bytes:
     """
@@ -47,20 +44,67 @@ def _sha256_hex(password: str) -> bytes:
     )
     return hashlib.sha256(password.encode("utf-8")).hexdigest().encode("ascii")
 
-@router.get("/admin_sql", tags=["Admin"])
-def admin_people_sql(db: Session = Depends(get_db)):
-    people = db.query(People).all()
+# ───────────────────────── Paginated / streaming reads ─────────────────────────
+EXPORT_CHUNK: int = 500
+PAGE_LIMIT_MAX: int = 1000
+
+def _people_columns():
+    return [c for c in People.__table__.columns if c.name != "passwd"]
+
+def _user_rows(after_id: Optional[int], limit: Optional[int], user_id: Optional[int] = None):
+    """Keyset-ordered Users ⨝ People rows (no review aggregation)."""
+    stmt = (
+        select(
+            Users.user_id,
+            Users.follower_count,
+            Users.following_count,
+            People.email,
+            People.verified,
+        )
+        .join(People, Users.user_id == People.user_id)
+        .order_by(Users.user_id)
+    )
+    if user_id is not None:
+        stmt = stmt.where(Users.user_id == user_id)
+    if after_id is not None:
+        stmt = stmt.where(Users.user_id > after_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+def _user_payload(rows, db: Session) -> list[dict]:
+    seed_many_review_counters(SCOPE_USER, [r.user_id for r in rows], db)
+    counts = get_many(SCOPE_USER, [r.user_id for r in rows], {r.user_id: sql_follow_counts(r) for r in rows})
     return [
         {
-            k: v
-            for k, v in p.__dict__.items()
-            if k not in {"_sa_instance_state", "passwd"}
+            "user_id": r.user_id,
+            "email": r.email,
+            "follower_count": counts[r.user_id]["followers"],
+            "following_count": counts[r.user_id]["following"],
+            "verified": bool(r.verified),
+            "review_count": counts[r.user_id]["reviews"],
         }
-        for p in people
+        for r in rows
     ]
 
+@router.get("/admin_sql", tags=["Admin"])
+def admin_people_sql(
+    after_id: Optional[int] = Query(None, description="Keyset cursor: last user_id of the previous page"),
+    limit: int = Query(100, gt=0, le=PAGE_LIMIT_MAX),
+    db: Session = Depends(get_db),
+):
+    stmt = select(*_people_columns()).order_by(People.user_id).limit(limit)
+    if after_id is not None:
+        stmt = stmt.where(People.user_id > after_id)
+    return [dict(r._mapping) for r in db.execute(stmt)]
+
 @router.get("/people_sql", tags=["Admin"])
-def read_people(user_id: Optional[int] = Query(None), db: Session = Depends(get_db)):
+def read_people(
+    user_id: Optional[int] = Query(None),
+    after_id: Optional[int] = Query(None, description="Keyset cursor: last user_id of the previous page"),
+    limit: int = Query(100, gt=0, le=PAGE_LIMIT_MAX),
+    db: Session = Depends(get_db),
+):
     if user_id is not None:
         person = db.query(People).filter(People.user_id == user_id).first()
         if not person:
@@ -71,60 +115,117 @@ def read_people(user_id: Optional[int] = Query(None), db: Session = Depends(get_
             "verified": bool(person.verified),
         }
 
-    # no filter → list
+    # no filter → one keyset page
+    stmt = (
+        select(People.user_id, People.email, People.verified)
+        .order_by(People.user_id)
+        .limit(limit)
+    )
+    if after_id is not None:
+        stmt = stmt.where(People.user_id > after_id)
     return [
         {
-            "user_id": p.user_id,
-            "email": p.email,
-            "verified": bool(p.verified),
+            "user_id": r.user_id,
+            "email": r.email,
+            "verified": bool(r.verified),
         }
-        for p in db.query(People).all()
+        for r in db.execute(stmt)
     ]
 
 @router.get("/users_sql", tags=["Admin"])
-def read_users(user_id: Optional[int] = Query(None), db: Session = Depends(get_db)):
-    # Subquery: count reviews for each user
-    review_counts_subq = (
-        db.query(Review.user_id, func.count(Review.review_id).label("review_count"))
-        .group_by(Review.user_id)
-        .subquery()
-    )
-
-    # Join Users, People, and review count subquery
-    qry = (
-        db.query(Users, People, review_counts_subq.c.review_count)
-        .join(People, Users.user_id == People.user_id)
-        .outerjoin(review_counts_subq, Users.user_id == review_counts_subq.c.user_id)
-        .filter(Users.user_id == user_id if user_id is not None else True)
-    )
-
-    rows = qry.all()
+def read_users(
+    user_id: Optional[int] = Query(None),
+    after_id: Optional[int] = Query(None, description="Keyset cursor: last user_id of the previous page"),
+    limit: int = Query(100, gt=0, le=PAGE_LIMIT_MAX),
+    db: Session = Depends(get_db),
+):
+    # Review / follow counts come from the maintained counters, not scans
+    rows = db.execute(_user_rows(after_id, limit, user_id)).all()
 
     if user_id is not None and not rows:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return [
-        {
-            "user_id": u.user_id,
-            "email": p.email,
-            "follower_count": u.follower_count,
-            "following_count": u.following_count,
-            "verified": bool(p.verified),
-            "review_count": rc if rc is not None else 0,
-        }
-        for u, p, rc in rows
-    ]
+    return _user_payload(rows, db)
+
+def _export_lines(table: str, fmt: str) -> Iterator[str]:
+    """
+    Yield NDJSON / CSV lines for *table* straight off a server-side cursor.
+    Owns its session: the request-scoped one may be closed before the
+    response body finishes streaming.
+    """
+    db = SessionLocal()
+    seed_db = SessionLocal()        # the streaming cursor keeps db's connection busy
+    try:
+        if table == "people":
+            stmt = select(*_people_columns()).order_by(People.user_id)
+        else:
+            stmt = _user_rows(None, None)
+        result = db.execute(
+            stmt.execution_options(stream_results=True, yield_per=EXPORT_CHUNK)
+        )
+
+        header_written = False
+        for part in result.partitions():
+            chunk = _user_payload(part, seed_db) if table == "users" else [dict(r._mapping) for r in part]
+            if fmt == "ndjson":
+                yield "".join(json.dumps(jsonable_encoder(row), ensure_ascii=False) + "\n" for row in chunk)
+                continue
+
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            if not header_written and chunk:
+                writer.writerow(chunk[0].keys())
+                header_written = True
+            writer.writerows(row.values() for row in chunk)
+            yield buf.getvalue()
+    finally:
+        seed_db.close()
+        db.close()
+
+@router.get("/admin/export/{table}", tags=["Admin"])
+def export_table(
+    table: str = Path(..., pattern="^(people|users)$"),
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+):
+    """
+    Stream a whole table as NDJSON or CSV in constant memory
+    (``yield_per`` + ``stream_results``).
+    """
+    media_type = "application/x-ndjson" if fmt == "ndjson" else "text/csv"
+    return StreamingResponse(
+        _export_lines(table, fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table}.{fmt}"'},
+    )
+
+def _find_person_by_email(db: Session, email: str) -> People | None:
+    return db.query(People).filter(People.email == email).first()
+
+def _store_rehash(db: Session, person: People, new_hash: bytes) -> None:
+    person.passwd = new_hash
+    db.commit()
 
 @router.post("/login", response_model=Token, tags=["Auth"])
-def login(creds: LoginInput, db: Session = Depends(get_db)):
-    """Authenticate user and return a JWT access token."""
-    person: People | None = (db.query(People)
-                               .filter(People.email == creds.email)
-                               .first())
+async def login(creds: LoginInput, db: Session = Depends(get_db)):
+    """
+    Authenticate user and return a JWT access token.
+
+    bcrypt runs in the password process pool; the short SQL calls are pushed
+    to the threadpool so the event loop never blocks.
+    """
+    person = await run_in_threadpool(_find_person_by_email, db, creds.email)
 
-    if (not person or person.verified != 1) or (not verify_password(creds.password, person.passwd)):
+    if not person or person.verified != 1:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    ok, new_hash = await password_hasher.verify(creds.password, person.passwd)
+    if not ok:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Stored hash used an outdated cost → upgrade it transparently
+    if new_hash is not None:
+        await run_in_threadpool(_store_rehash, db, person, new_hash)
+
     # Create JWT access token with 3-day expiry
     access_token = create_access_token(
         data={"sub": person.user_id},
@@ -151,10 +252,10 @@ def check_email(email: EmailStr, db: Session = Depends(get_db)):
     return {"available": exists is None}
 
 @router.post("/register", tags=["Registration"])
-def register_user(creds: RegisterInput, db: Session = Depends(get_db)):
+async def register_user(creds: RegisterInput, db: Session = Depends(get_db)):
     """Create a People + Users record; e-mail must be unique."""
     # Check uniqueness
-    if db.query(People).filter(People.email == creds.email).first():
+    if await run_in_threadpool(_find_person_by_email, db, creds.email):
         raise HTTPException(400, "E-mail already registered")
 
     # Validate e-mail format (email-validator raises on error)
@@ -163,10 +264,14 @@ def register_user(creds: RegisterInput, db: Session = Depends(get_db)):
     except EmailNotValidError as e:
         raise HTTPException(400, str(e))
 
+    passwd = await password_hasher.hash(creds.password)
+    return await run_in_threadpool(_insert_user, db, creds, passwd)
+
+def _insert_user(db: Session, creds: RegisterInput, passwd: bytes) -> dict:
     # Insert into People
     person = People(
         email     = creds.email,
-        passwd    = hash_password(creds.password),
+        passwd    = passwd,
         bday      = creds.bday,           # already a date-object (or None)
         gender    = creds.gender,
         nickname  = creds.display_name,
@@ -242,13 +347,26 @@ def debug_update_user_to_restaurant_score(
     u_id: int,
     r_id: int,
     force_update: bool = True,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ):
     """
     Debug endpoint – returns either a plain score (float) or, when
     `force_update=True`, a dict {score, user_keywords, rest_keywords}.
+
+    ``ETag`` = both state ids; a matching ``If-None-Match`` skips scoring,
+    except with ``force_update`` (always recomputed).
     """
-    try:
+    def states():
+        return (
+            db.query(Users.state_id).filter(Users.user_id == u_id).scalar(),
+            db.query(Restaurant.state_id).filter(Restaurant.restaurant_id == r_id).scalar(),
+        )
+
+    def etag():
+        return make_etag("score_user_rest", u_id, r_id, force_update, *states())
+
+    def build():
         result = update_user_to_restaurant_score(
             u_id=u_id, 
             r_id=r_id, 
@@ -267,8 +385,13 @@ def debug_update_user_to_restaurant_score(
             "user_keywords": kw_user_doc,
             "rest_keywords": kw_rest_doc,
         }
-        return JSONResponse(content=_json_ready(payload))
+        return _json_ready(payload)
 
+    try:
+        # Unassigned state ids are set inside build(), so the tag comes after it
+        if force_update or None in states():
+            return fresh_json(etag, build)
+        return conditional_json(etag(), if_none_match, build)
     except Exception as e:                          # pragma: no cover
         raise HTTPException(status_code=500, detail=str(e)) from e
 
@@ -277,13 +400,28 @@ def debug_update_user_to_user_score(
     u_id_a: int,
     u_id_b: int,
     force_update: bool = True,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ):
     """
     Debug endpoint – returns either a plain score (float) or, when
     `force_update=True`, a dict {score, user_a_keywords, user_b_keywords}.
+
+    ``ETag`` = both state ids; a matching ``If-None-Match`` skips scoring,
+    except with ``force_update`` (always recomputed).
     """
-    try:
+    def states():
+        found = dict(
+            db.query(Users.user_id, Users.state_id)
+            .filter(Users.user_id.in_([u_id_a, u_id_b]))
+            .all()
+        )
+        return found.get(u_id_a), found.get(u_id_b)
+
+    def etag():
+        return make_etag("score_user_user", u_id_a, u_id_b, force_update, *states())
+
+    def build():
         result = update_user_to_user_score(
             u_id_a=u_id_a, 
             u_id_b=u_id_b, 
@@ -301,7 +439,11 @@ def debug_update_user_to_user_score(
             "user_a_keywords": kw_a_doc,
             "user_b_keywords": kw_b_doc,
         }
-        return JSONResponse(content=_json_ready(payload))
+        return _json_ready(payload)
 
+    try:
+        if force_update or None in states():
+            return fresh_json(etag, build)
+        return conditional_json(etag(), if_none_match, build)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
@@ -2,8 +2,11 @@ from fastapi import HTTPException
 
 from ..services.keyword_extract import extract_keyword_from_review
 from ..services.generate_embedding import embed_small
+from ..services.embedding_codec import encode_embedding
 from ..schemas.review import Review, KeywordInitRequest
 from ..connection.mongodb import user_keywords_collection
+from ..services.counters import SCOPE_USER, on_keywords_changed
+from ..services.profile_vectors import KIND_USER, update_profile_vector
 
 from typing import Optional, List
 
@@ -35,7 +38,7 @@ def initialize_keywords(req: KeywordInitRequest):
         )
 
     keyword_embeddings = embed_small(keywords)
-    keyword_embedding_map = {keyword: embedding for keyword, embedding in zip(keywords, keyword_embeddings)}
+    keyword_embedding_map = {keyword: encode_embedding(embedding) for keyword, embedding in zip(keywords, keyword_embeddings)}
     result = [
         {
             "name": keyword,
@@ -49,4 +52,6 @@ def initialize_keywords(req: KeywordInitRequest):
         "user_id": user_id,
         "keywords": result
     })
+    update_profile_vector(KIND_USER, user_id, {}, {"keywords": result})
+    on_keywords_changed(SCOPE_USER, user_id, len(result))
     return {"message": "Keywords initialized successfully."}
\ No newline at end of file
@@ -1,9 +1,8 @@
-import os
-import requests
 from collections import Counter
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from anyio import from_thread
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import func
@@ -20,13 +19,18 @@ from ..services.calc_score  import (
     update_user_to_restaurant_score,
     batch_user_rest_scores,
 )
-from ..services.utilities   import get_location_from_ip, random_prime_in_range
+from ..services.geo_index   import restaurant_geo_index
+from ..services.http_cache  import conditional_json, make_etag
+from ..services.ip_geo      import get_location_from_ip
+from ..services.kakao       import kakao_client
+from ..services.map_tiles   import MAP_PERSONALISE_MAX, check_bbox, viewport_clusters
+from ..services.nearby_topk import cursor_after, decode_cursor, topk_nearby
+from ..services.name_index  import restaurant_name_index
+from ..services.restaurant_card import get_card, set_card_base
+from ..services.search_sync import ENTITY_RESTAURANT, OP_DELETE, record_change
+from ..services.utilities   import random_prime_in_range
 from .common_imports        import *       # noqa: F401,F403
 
-# ────────────────────────── Kakao API set-up ──────────────────────────
-KAKAO_KEY    = os.getenv("KAKAO_MAP_APP_KEY")           # REST API key
-KAKAO_HEADER = {"Authorization": f"KakaoAK {KAKAO_KEY}"}
-
 router = APIRouter()
 
 # ──────────────────────────────────────────────────────────────────────
@@ -36,74 +40,23 @@ def _safe_score(viewer_id: Optional[int], r_id: int, db: Session) -> float:
     """
     Wrapper around `update_user_to_restaurant_score()` that returns **0.0**
     whenever the viewer is anonymous *or* the scorer raises `ValueError`.
+
+    Served from the state-id keyed score cache; a rescore only happens when
+    either keyword profile changed since the last computation.
     """
     if viewer_id is None:
         return 0.0
     try:
-        score, *_ = update_user_to_restaurant_score(  # type: ignore
+        return update_user_to_restaurant_score(
             u_id=viewer_id,
             r_id=r_id,
             db=db,
-            force_update=True,
         )
-        return score
     except ValueError:
         return 0.0
 
-# ── Kakao helpers ─────────────────────────────────────────────────────
-def _coords_from_address(addr: str) -> tuple[float, float] | None:
-    """Geocodes **road / jibun** address → (lat, lon)."""
-    url = "https://dapi.kakao.com/v2/local/search/address.json"
-    res = requests.get(url, headers=KAKAO_HEADER, params={"query": addr})
-    if res.ok and (docs := res.json().get("documents")):
-        first = docs[0]
-        return float(first["y"]), float(first["x"])             # (lat, lon)
-    return None
-
-def _address_from_coords(lat: float, lon: float) -> str | None:
-    """Reverse-geocodes (lat, lon) → road address string."""
-    url = "https://dapi.kakao.com/v2/local/geo/coord2address.json"
-    res = requests.get(url, headers=KAKAO_HEADER, params={"x": lon, "y": lat})
-    if res.ok and (docs := res.json().get("documents")):
-        road = docs[0]["road_address"] or docs[0]["address"]
-        return road["address_name"]
-    return None
-
-def _search_kakao_places(keyword: str, max_pages: int = 3) -> list[dict[str, Any]]:
-    """
-    Retrieve up to **45** place records from Kakao Local Keyword-Search.
-
-    Parameters
-    ----------
-    keyword : str
-        Free-text search term.
-    max_pages : int, default 3
-        Kakao returns 15 results per page → 3 pages = 45 max.
-
-    Returns
-    -------
-    List[Dict] - each item contains the **full** document returned by Kakao.
-    """
-    results: list[dict[str, Any]] = []
-    url = "https://dapi.kakao.com/v2/local/search/keyword.json"
-
-    for page in range(1, max_pages + 1):
-        params = {"query": keyword, "page": page}
-        res    = requests.get(url, headers=KAKAO_HEADER, params=params)
-        if not res.ok:
-            raise HTTPException(
-                status_code=res.status_code,
-                detail=f"Kakao API error → {res.text}",
-            )
-        data = res.json()
-        results.extend(data.get("documents", []))
-        if data.get("meta", {}).get("is_end"):
-            break
-
-    return results
-
 @router.get("/search_kakao", tags=["Restaurant"])
-def search_kakao(
+async def search_kakao(
     keyword: str = Query(..., min_length=1, description="검색 키워드 (예: '딸부자네')"),
 ):
     """
@@ -128,7 +81,7 @@ def search_kakao(
     }
     """
     try:
-        docs = _search_kakao_places(keyword)
+        docs = await kakao_client.search_places(keyword)
     except HTTPException:
         raise 
     except Exception as exc:
@@ -215,30 +168,89 @@ def search_restaurant_es(
     return {"success": True, "result": results}
 
 
+@router.get("/autocomplete_restaurant", tags=["Restaurant"])
+def autocomplete_restaurant(
+    q: str = Query(..., min_length=1, description="What the user has typed so far"),
+    size: int = Query(10, ge=1, le=50),
+):
+    """
+    Search-as-you-type on restaurant names.
+
+    Served from the in-process prefix index (jamo-aware, so "딸ㅂ" matches
+    "딸부자네"); Elasticsearch's ``name.suggest`` completion field is only
+    consulted while the index is still loading.
+
+    Returns
+    -------
+    {"success": True, "result": [{restaurant_id, name, address}, ...]}
+    """
+    if restaurant_name_index.ready:
+        return {"success": True, "result": restaurant_name_index.search(q, size)}
+
+    es_query = {
+        "_source": ["r_id", "name", "address"],
+        "suggest": {
+            "name_suggest": {
+                "prefix": q,
+                "completion": {"field": "name.suggest", "size": size, "skip_duplicates": True},
+            }
+        },
+    }
+    try:
+        options = es.search(index="full_restaurant_kor", body=es_query)["suggest"]["name_suggest"][0]["options"]
+    except Exception as exc:  # pragma: no cover
+        return {"success": False, "error": f"Elasticsearch query failed → {exc}"}
+
+    return {
+        "success": True,
+        "result": [
+            {
+                "restaurant_id": o["_source"]["r_id"],
+                "name":          o["_source"]["name"],
+                "address":       o["_source"].get("address"),
+            }
+            for o in options
+        ],
+    }
+
 # ───────────────────────────────────────────────────────────────────
 # 2) NEARBY RESTAURANTS (GEO SEARCH)
 # ───────────────────────────────────────────────────────────────────
-@router.get("/nearby_restaurant_es", tags=["Restaurant"])
-def nearby_restaurant_es(
-    request: Request,
-    distance: str = Query("5km", pattern=r"^[0-9]+(m|km)$"),
-    size: int = Query(10, gt=1, le=10000),
-    viewer_id: Optional[int] = Query(None, description="Viewer ID for personalised scoring"),
-    # Frontend-supplied coordinates (aliases y / x for convenience)
-    lat: Optional[float] = Query(None, alias="y", description="Latitude of the client"),
-    lon: Optional[float] = Query(None, alias="x", description="Longitude of the client"),
-    db: Session = Depends(get_db),
-):
-    # ── Determine reference point ─────────────────────────────────
-    if lat is None or lon is None:
-        caller_ip = request.client.host
-        if caller_ip.startswith("127.") or caller_ip == "localhost":
-            caller_ip = "121.162.119.1"  # Seoul fallback for local dev
-        user_location = get_location_from_ip(caller_ip)
-        if not user_location:
-            return {"success": False, "error": "Could not determine location"}
-        lat, lon = user_location["lat"], user_location["lon"]
-
+def _resolve_origin(request: Request, lat: Optional[float], lon: Optional[float]) -> Optional[tuple[float, float]]:
+    """Client-supplied coordinates, else the caller IP's location."""
+    if lat is not None and lon is not None:
+        return lat, lon
+    caller_ip = request.client.host
+    if caller_ip.startswith("127.") or caller_ip == "localhost":
+        caller_ip = "121.162.119.1"  # Seoul fallback for local dev
+    user_location = get_location_from_ip(caller_ip)
+    if not user_location:
+        return None
+    return user_location["lat"], user_location["lon"]
+
+def _distance_km(distance: str) -> float:
+    """Convert the ``distance`` query value ("500m" / "5km") to kilometres."""
+    return float(distance[:-2]) if distance.endswith("km") else float(distance[:-1]) / 1000.0
+
+def _nearby_from_index(lat: float, lon: float, distance: str, size: int) -> List[Dict[str, Any]]:
+    ids, dists = restaurant_geo_index.within(lat, lon, _distance_km(distance), limit=size)
+    lats, lons = restaurant_geo_index.coords(ids)
+    out = []
+    for r_id, d, y, x in zip(ids.tolist(), dists.tolist(), lats.tolist(), lons.tolist()):
+        doc = restaurant_geo_index.doc(r_id)
+        out.append({
+            "restaurant_id": r_id,
+            "name":        doc.get("name"),
+            "categories":  doc.get("categories", ""),
+            "address":     doc.get("address", ""),
+            "distance_km": d,
+            "x": x,
+            "y": y,
+        })
+    return out
+
+def _nearby_from_es(lat: float, lon: float, distance: str, size: int, db: Session) -> List[Dict[str, Any]]:
+    """Fallback while the geo index is loading."""
     es_query = {
         "query": {
             "bool": {
@@ -262,11 +274,7 @@ def nearby_restaurant_es(
         "_source": ["r_id", "name", "categories", "address"],
         "size": size,
     }
-
-    try:
-        hits = es.search(index="full_restaurant_kor", body=es_query)["hits"]["hits"]
-    except Exception as exc:  # pragma: no cover
-        return {"success": False, "error": f"Elasticsearch query failed → {exc}"}
+    hits = es.search(index="full_restaurant_kor", body=es_query)["hits"]["hits"]
 
     # Fetch relational data for x/y
     rest_ids = {h["_source"]["r_id"] for h in hits}
@@ -274,30 +282,55 @@ def nearby_restaurant_es(
         r.restaurant_id: r
         for r in db.query(Restaurant).filter(Restaurant.restaurant_id.in_(rest_ids)).all()
     }
+    out = []
+    for h in hits:
+        src = h["_source"]
+        row = rest_map.get(src["r_id"])
+        out.append({
+            "restaurant_id": src["r_id"],
+            "name":        src["name"],
+            "categories":  src.get("categories", ""),
+            "address":     src.get("address", ""),
+            "distance_km": h["sort"][0],
+            "x": getattr(row, "longitude", None),
+            "y": getattr(row, "latitude",  None),
+        })
+    return out
+
+@router.get("/nearby_restaurant_es", tags=["Restaurant"])
+def nearby_restaurant_es(
+    request: Request,
+    distance: str = Query("5km", pattern=r"^[0-9]+(m|km)$"),
+    size: int = Query(10, gt=1, le=10000),
+    viewer_id: Optional[int] = Query(None, description="Viewer ID for personalised scoring"),
+    # Frontend-supplied coordinates (aliases y / x for convenience)
+    lat: Optional[float] = Query(None, alias="y", description="Latitude of the client"),
+    lon: Optional[float] = Query(None, alias="x", description="Longitude of the client"),
+    db: Session = Depends(get_db),
+):
+    # ── Determine reference point ─────────────────────────────────
+    origin = _resolve_origin(request, lat, lon)
+    if origin is None:
+        return {"success": False, "error": "Could not determine location"}
+    lat, lon = origin
+
+    if restaurant_geo_index.ready:
+        hits = _nearby_from_index(lat, lon, distance, size)
+    else:
+        try:
+            hits = _nearby_from_es(lat, lon, distance, size, db)
+        except Exception as exc:  # pragma: no cover
+            return {"success": False, "error": f"Elasticsearch query failed → {exc}"}
+    rest_ids = {h["restaurant_id"] for h in hits}
 
     ratings = (
         {} if viewer_id is None
         else batch_user_rest_scores(viewer_id, list(rest_ids), db=db)
     )
 
-    results: list[dict[str, Any]] = []
-    for h in hits:
-        src  = h["_source"]
-        r_id = src["r_id"]
-        row  = rest_map.get(r_id)
-
-        results.append(
-            {
-                "restaurant_id": r_id,
-                "name":      src["name"],
-                "categories": src.get("categories", ""),
-                "address":   src.get("address", ""),
-                "distance_km": h["sort"][0],
-                "x": getattr(row, "longitude", None),
-                "y": getattr(row, "latitude",  None),
-                "rating": ratings.get(r_id, 0.0),
-            }
-        )
+    results: list[dict[str, Any]] = [
+        {**h, "rating": ratings.get(h["restaurant_id"], 0.0)} for h in hits
+    ]
 
     # Mixed sort: rating DESC, then distance ASC
     if viewer_id is not None:
@@ -310,6 +343,85 @@ def nearby_restaurant_es(
     }
 
 
+@router.get("/nearby_restaurant_topk", tags=["Restaurant"])
+def nearby_restaurant_topk(
+    request: Request,
+    viewer_id: int = Query(..., description="Viewer ID for personalised scoring"),
+    distance: str = Query("5km", pattern=r"^[0-9]+(m|km)$"),
+    k: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    lat: Optional[float] = Query(None, alias="y", description="Latitude of the client"),
+    lon: Optional[float] = Query(None, alias="x", description="Longitude of the client"),
+    db: Session = Depends(get_db),
+):
+    """
+    The *k* best-rated restaurants nearby (ties → nearer first), one page at
+    a time.  Only as many candidates are scored as needed to prove the page
+    correct; pass ``next_cursor`` back to fetch the following page.
+    """
+    if not restaurant_geo_index.ready:
+        raise HTTPException(503, "Geo index is still loading", headers={"Retry-After": "5"})
+    origin = _resolve_origin(request, lat, lon)
+    if origin is None:
+        return {"success": False, "error": "Could not determine location"}
+    lat, lon = origin
+
+    results, stats = topk_nearby(
+        viewer_id, lat, lon, _distance_km(distance), k, decode_cursor(cursor), db,
+    )
+    return {
+        "success": True,
+        "origin": {"lat": lat, "lon": lon},
+        "results": results,
+        "next_cursor": cursor_after(results[-1]) if len(results) == k else None,
+        "stats": stats,
+    }
+
+
+@router.get("/map_viewport", tags=["Restaurant"])
+def map_viewport(
+    south: float = Query(..., ge=-90, le=90),
+    west: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=22),
+    viewer_id: Optional[int] = Query(None, description="Viewer ID for personalised scoring"),
+    db: Session = Depends(get_db),
+):
+    """
+    Clustered markers for a map viewport.
+
+    Each cluster carries its count, centroid and most-reviewed restaurant.
+    ``zoom`` is the zoom the clusters were built at, which is lower than
+    ``requested_zoom`` when the viewport spans too many tiles.
+    Clusters come from per-tile results cached by (z, x, y); with a viewer,
+    only the top restaurants of the largest clusters (at most
+    ``MAP_PERSONALISE_MAX``) are scored.
+    """
+    try:
+        check_bbox(south, west, north, east)
+    except ValueError as exc:
+        raise HTTPException(400, f"Invalid bounding box: {exc}")
+    if not restaurant_geo_index.ready:
+        raise HTTPException(503, "Geo index is still loading", headers={"Retry-After": "5"})
+
+    # Oversized viewports are clustered at a coarser zoom than requested
+    effective_zoom, clusters = viewport_clusters(south, west, north, east, zoom)
+    clusters.sort(key=lambda c: -c["count"])
+
+    if viewer_id is not None and clusters:
+        visible = [c["top"]["restaurant_id"] for c in clusters[:MAP_PERSONALISE_MAX]]
+        ratings = batch_user_rest_scores(viewer_id, visible, db=db)
+        # Tile results are shared through the cache – copy before annotating
+        clusters = [
+            {**c, "top": {**c["top"], "rating": ratings.get(c["top"]["restaurant_id"], 0.0)}}
+            if i < MAP_PERSONALISE_MAX else c
+            for i, c in enumerate(clusters)
+        ]
+
+    return {"success": True, "zoom": effective_zoom, "requested_zoom": zoom, "clusters": clusters}
+
+
 # ───────────────────────────────────────────────────────────────────
 # 3) SINGLE RESTAURANT DETAIL
 # ───────────────────────────────────────────────────────────────────
@@ -317,11 +429,15 @@ def nearby_restaurant_es(
 def get_restaurant_info(
     restaurant_id: int,
     viewer_id: Optional[int] = Query(None, description="Viewer ID for personalised compatibility"),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ):
     """
     Consolidated payload for **RestaurantInfoPage**.
 
+    Carries an ``ETag`` derived from the card revision and both state ids;
+    a matching ``If-None-Match`` is answered with **304** before scoring.
+
     Returns
     -------
     {
@@ -331,56 +447,49 @@ def get_restaurant_info(
             "name":       str,
             "address":    str | None,
             "image":      str | None,
-            "keywords":   List[{keyword:str, frequency:int}],
+            "keywords":   List[{keyword:str, frequency:int}],   # top-N
+            "review_count": int,
             "rating":     float,
             "x":          float | None,
             "y":          float | None,
         }
     }
     """
-    # 1 ── Basic profile ───────────────────────────────────────────
-    row = db.query(Restaurant).filter(Restaurant.restaurant_id == restaurant_id).first()
-    if row is None:
+    # 1 ── Materialised card (one document read) ─────────────────
+    card = get_card(restaurant_id, db)
+    if card is None:
         raise HTTPException(status_code=404, detail="Restaurant not found")
 
-    # 2 ── Aggregated keywords ─────────────────────────────────────
-    projection = {"_id": 0, "keywords.keyword": 1, "keywords.frequency": 1}
-    kw_doc = restaurant_keywords_collection.find_one(
-        {"r_id": restaurant_id}, projection=projection
-    ) or {}
-    keywords = kw_doc.get("keywords", [])
-
-    # 3 ── Thumbnail (first photo URL) ─────────────────────────────
-    thumb_url: Optional[str] = None
-    first_review = (
-        db.query(Review.review_id)
-        .filter(Review.restaurant_id == restaurant_id)
-        .order_by(Review.created_at.asc())
-        .first()
+    # 2 ── Validator: card revision + restaurant / viewer state ──
+    r_state = (
+        db.query(Restaurant.state_id)
+        .filter(Restaurant.restaurant_id == restaurant_id)
+        .scalar()
     )
-    if first_review:
-        photo_doc = photo_collection.find_one({"review_id": first_review[0]}) or {}
-        urls = photo_doc.get("photo_urls", [])
-        if urls:
-            thumb_url = urls[0]
-
-    # 4 ── Personalised score ─────────────────────────────────────
-    rating = _safe_score(viewer_id, restaurant_id, db)
+    u_state = (
+        db.query(Users.state_id).filter(Users.user_id == viewer_id).scalar()
+        if viewer_id is not None else None
+    )
+    etag = make_etag("restaurant_info", restaurant_id, card.get("rev"), r_state, viewer_id, u_state)
+
+    # 3 ── Personalised score (cached) + payload ─────────────────
+    def build() -> Dict[str, Any]:
+        return {
+            "success": True,
+            "data": {
+                "id":           restaurant_id,
+                "name":         card["name"],
+                "address":      card.get("address"),
+                "image":        card.get("image"),
+                "keywords":     card.get("keywords", []),
+                "review_count": card.get("review_count", 0),
+                "rating":       _safe_score(viewer_id, restaurant_id, db),
+                "x":            card.get("x"),
+                "y":            card.get("y"),
+            },
+        }
 
-    # 5 ── Assemble response ──────────────────────────────────────
-    return {
-        "success": True,
-        "data": {
-            "id":       restaurant_id,
-            "name":     row.name,
-            "address":  getattr(row, "location", None),
-            "image":    thumb_url,
-            "keywords": keywords,
-            "rating":   rating,
-            "x":        getattr(row, "longitude", None),
-            "y":        getattr(row, "latitude", None),
-        },
-    }
+    return conditional_json(etag, if_none_match, build)
 
 @router.post("/add_restaurant", tags=["Restaurant"])
 def add_restaurant(
@@ -396,7 +505,8 @@ def add_restaurant(
     1.  Resolve missing geo / address data (Kakao)  
     2.  Insert row in MySQL (manual PK)  
     3.  Index document in Elasticsearch  
-    4.  Stub keywords doc in MongoDB  
+    4.  Stub keywords doc + materialised card in MongoDB  
+    5.  Register the name / coordinates with the in-process indexes  
 
     Returns
     -------
@@ -428,14 +538,14 @@ def add_restaurant(
 
     # 1‑A. Need coordinates → forward‑geocode address
     if (lat is None or lon is None) and addr:
-        coords = _coords_from_address(addr)
+        coords = from_thread.run(kakao_client.geocode, addr)
         if coords is None:
             raise HTTPException(400, "Unable to geocode supplied address")
         lat, lon = coords
 
     # 1‑B. Need address → reverse‑geocode coordinates
     if not addr:
-        addr = _address_from_coords(lat, lon)
+        addr = from_thread.run(kakao_client.reverse_geocode, lat, lon)
         if not addr:
             raise HTTPException(400, "Unable to reverse‑geocode coordinates")
 
@@ -473,9 +583,19 @@ def add_restaurant(
         # Best‑effort rollback so PKs stay contiguous
         db.query(Restaurant).filter(Restaurant.restaurant_id == new_id).delete()
         db.commit()
+        record_change(ENTITY_RESTAURANT, new_id, OP_DELETE)
         raise HTTPException(500, f"Elasticsearch insert failed → {exc!s}")
 
-    # ── 4) Stub keywords doc in MongoDB ──────────────────────────
+    # ── 4) Stub keywords doc + card in MongoDB ─────────────────────────
+    # (the id is reused after a rollback above, so the sync worker's id
+    #  high-water mark may already be past it – the outbox covers that)
+    record_change(ENTITY_RESTAURANT, new_id)
     restaurant_keywords_collection.insert_one({"r_id": new_id, "keywords": []})
+    set_card_base(new_id, payload.name, addr, lat, lon)
+    restaurant_name_index.add(new_id, payload.name, addr)
+    restaurant_geo_index.add(
+        new_id, lat, lon,
+        {"name": payload.name, "categories": payload.cuisine_type or "", "address": addr},
+    )
 
     return {"success": True, "restaurant_id": new_id}
\ No newline at end of file
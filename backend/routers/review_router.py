@@ -4,16 +4,35 @@ from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import create_session, Session
 from random import randint
 from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from ..connection.mysqldb import get_db, Review, Restaurant, Users, People
 from ..connection.mongodb import photo_collection, review_keywords_collection, user_keywords_collection, user_rest_score, restaurant_keywords_collection
-from ..connection.elasticdb import es_client as es
 
 from ..schemas.review import ReviewCreate, ReviewUpdate
 
 from ..services.utilities import random_prime_in_range
 from ..services.generate_embedding import embed_small
+from ..services.embedding_codec import encode_embedding
 from ..services.calc_score import update_user_to_restaurant_score
+from ..services.restaurant_card import (
+    adjust_card_review_count,
+    set_card_keywords,
+    set_card_thumbnail,
+)
+from ..services.counters import (
+    SCOPE_RESTAURANT,
+    SCOPE_USER,
+    get_counters,
+    on_keywords_changed,
+    on_review_created,
+    on_review_deleted,
+)
+from ..connection.elasticdb import es_client
+from ..services.es_indexer import ES_BULK_WAIT_TIMEOUT_S, es_indexer
+from ..services.search_sync import ENTITY_REVIEW, OP_DELETE, record_change
+from ..services.profile_compaction import add_keywords, subtract_keywords
+from ..services.profile_vectors import KIND_RESTAURANT, KIND_USER, profile_weights, update_profile_vector
 
 from .common_imports import *
 
@@ -51,6 +70,7 @@ def update_user_keywords(
 
     # Step 2: Load existing MongoDB document
     doc = user_keywords_collection.find_one({"user_id": user_id}) or {"user_id": user_id, "keywords": []}
+    before = profile_weights(KIND_USER, doc)
     existing: dict[tuple[str, str], dict] = {
         (kw["name"], kw["sentiment"]): kw for kw in doc["keywords"]
     }
@@ -69,7 +89,7 @@ def update_user_keywords(
     if to_embed:
         try:
             vectors = embed_small(list(to_embed))
-            embedding_map = {kw: [round(float(x), 5) for x in vectors[i]] for i, kw in enumerate(to_embed)}
+            embedding_map = {kw: encode_embedding(vectors[i]) for i, kw in enumerate(to_embed)}
             print(f"embed_small success - embedded {len(embedding_map)} keywords")
         except Exception as exc:
             raise HTTPException(status_code=500, detail=f"Embedding service failed: {exc}") from exc
@@ -114,6 +134,8 @@ def update_user_keywords(
         print(f"MongoDB update acknowledged: {result.acknowledged}")
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"MongoDB update failed: {exc}") from exc
+    update_profile_vector(KIND_USER, user_id, before, {"keywords": list(existing.values())})
+    on_keywords_changed(SCOPE_USER, user_id, len(existing))
 
     # Step 6: Update relational DB (user state_id)
     user = db.query(Users).filter(Users.user_id == user_id).first()
@@ -148,54 +170,32 @@ def update_restaurant_keywords(
     keyword_counter = Counter(keywords)
 
     # Fetch existing keywords for this restaurant
-    existing_keywords = (
-        restaurant_keywords_collection.find_one({"r_id": restaurant_id})
-        or {"r_id": restaurant_id, "keywords": []}
-    )
-
-    existing_map = {
-        kw["keyword"]: kw for kw in existing_keywords.get("keywords", [])
-    }
-
-    print(f"[DEBUG] Before update - Existing keywords for restaurant {restaurant_id}: {existing_map}")
-    new_keywords = set(keyword_counter.keys()) - set(existing_map)
+    existing_doc = restaurant_keywords_collection.find_one({"r_id": restaurant_id})
+    before = profile_weights(KIND_RESTAURANT, existing_doc)
 
-    if new_keywords:
+    def embed(new_keywords: list[str]) -> list:
+        print(f"[DEBUG] Embedding new keywords for restaurant {restaurant_id}: {new_keywords}")
         try:
-            vectors = embed_small(list(new_keywords))
-            embedding_map = {kw: vectors[i] for i, kw in enumerate(new_keywords)}
+            return embed_small(new_keywords)
         except Exception as exc:
             raise HTTPException(
                 status_code=500,
                 detail=f"Embedding service failed: {exc}",
             ) from exc
 
-    # Update or insert keywords
-    for name, freq in keyword_counter.items():
-        if name in existing_map:
-            existing_map[name]["frequency"] += freq
-        else:
-            existing_map[name] = {
-                "keyword": name,
-                "frequency": freq,
-                "embedding": embedding_map.get(name)
-            }
-
-    # Save updated keywords back to MongoDB
-    cleaned_keywords = [
-        {
-            "keyword": kw["keyword"],
-            "frequency": kw["frequency"],
-            "embedding": kw.get("embedding")
-        }
-        for kw in existing_map.values()
-    ]
+    # Merge near-duplicates into their representative and cap the scored
+    # profile; the per-string counts stay in `history`
+    compacted = add_keywords(existing_doc, dict(keyword_counter), embed)
 
     restaurant_keywords_collection.update_one(
         {"r_id": restaurant_id},
-        {"$set": {"keywords": cleaned_keywords}},
+        {"$set": compacted},
         upsert=True,
     )
+    update_profile_vector(KIND_RESTAURANT, restaurant_id, before, compacted)
+    cleaned_keywords = compacted["history"]
+    on_keywords_changed(SCOPE_RESTAURANT, restaurant_id, len(cleaned_keywords))
+    set_card_keywords(restaurant_id, cleaned_keywords)
     # Set a new_state_id for the restaurant
     r_state_id = random_prime_in_range()
     rest_obj = db.query(Restaurant).filter(Restaurant.restaurant_id == restaurant_id).first()
@@ -218,6 +218,7 @@ def subtract_user_keywords(
     doc = user_keywords_collection.find_one({"user_id": user_id})
     if not doc:
         return
+    before = profile_weights(KIND_USER, doc)
 
     # Create a dictionary from current keywords
     keyword_map = {kw["name"]: kw for kw in doc.get("keywords", [])}
@@ -241,6 +242,8 @@ def subtract_user_keywords(
         {"$set": {"keywords": updated_keywords}},
         upsert=True
     )
+    update_profile_vector(KIND_USER, user_id, before, {"keywords": updated_keywords})
+    on_keywords_changed(SCOPE_USER, user_id, len(updated_keywords))
 
     # Set a new state_id for the user
     u_state_id = random_prime_in_range()
@@ -273,28 +276,22 @@ def subtract_restaurant_keywords(
         return
 
     # Fetch existing keywords for this restaurant
-    existing_keywords = (
-        review_keywords_collection.find_one({"r_id": restaurant_id})
-        or {"r_id": restaurant_id, "keywords": []}
-    )
-
-    existing_map = {kw["keyword"]: kw for kw in existing_keywords.get("keywords", [])}
-
-    # Subtract frequencies for each keyword
-    for kw in keywords:
-        if kw in existing_map:
-            existing_map[kw]["frequency"] -= 1
+    existing_doc = restaurant_keywords_collection.find_one({"r_id": restaurant_id})
+    if not existing_doc:
+        return
 
-            # Remove keyword if frequency <= 0
-            if existing_map[kw]["frequency"] <= 0:
-                del existing_map[kw]
+    before = profile_weights(KIND_RESTAURANT, existing_doc)
+    compacted = subtract_keywords(existing_doc, keywords)
 
     # Save updated keywords back to MongoDB
     restaurant_keywords_collection.update_one(
         {"r_id": restaurant_id},
-        {"$set": {"keywords": list(existing_map.values())}},
+        {"$set": compacted},
         upsert=True,
     )
+    update_profile_vector(KIND_RESTAURANT, restaurant_id, before, compacted)
+    on_keywords_changed(SCOPE_RESTAURANT, restaurant_id, len(compacted["history"]))
+    set_card_keywords(restaurant_id, compacted["history"])
 
     # Set a new state_id for the restaurant
     r_state_id = random_prime_in_range()
@@ -308,11 +305,56 @@ def subtract_restaurant_keywords(
     else:
         raise HTTPException(status_code=404, detail="Restaurant not found")
 
+# delete_by_query fallbacks run here: es_indexer resolves futures on its
+# flusher thread, which must never wait on network I/O
+_es_fallback_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="es-delete-fallback")
+
+def delete_review_document(review_id: int, wait: bool = False) -> Future:
+    """
+    Remove a review from the search index.
+
+    Documents written by the app are keyed by review_id, so the bulk delete
+    by id normally does it.  Ones loaded by the old reindexing script carry
+    auto-generated ids; when the delete reports not_found, fall back to a
+    delete_by_query on the review_id field.  The returned future resolves
+    once the fallback (if any) has run.
+    """
+    done: Future = Future()
+
+    def _delete_by_query(result: dict) -> None:
+        try:
+            es_client.delete_by_query(
+                index="user_review_nickname",
+                query={"term": {"review_id": review_id}},
+                conflicts="proceed",
+                refresh=wait,
+            )
+        except Exception as exc:
+            logger.warning("ES delete_by_query of review %s failed: %s", review_id, exc)
+            done.set_exception(exc)
+        else:
+            done.set_result(result)
+
+    def _on_deleted(deleted: Future) -> None:
+        exc = deleted.exception()
+        if exc is not None:
+            logger.warning("ES delete of review %s failed: %s", review_id, exc)
+            done.set_exception(exc)
+            return
+        result = deleted.result()
+        if result.get("status") == 404 or result.get("result") == "not_found":
+            _es_fallback_pool.submit(_delete_by_query, result)
+        else:
+            done.set_result(result)
+
+    es_indexer.delete("user_review_nickname", review_id, wait=wait).add_done_callback(_on_deleted)
+    return done
+
 '''
 create, update, and delete review APIs
 '''
 @router.post("/reviews", tags=["Reviews"])
-def create_review(payload: ReviewCreate, db: Session = Depends(get_db)):
+def create_review(payload: ReviewCreate, wait: bool = False, db: Session = Depends(get_db)):
 
     filenames_str = ",".join(payload.photo_filenames) if payload.photo_filenames else None
 
@@ -345,6 +387,7 @@ def create_review(payload: ReviewCreate, db: Session = Depends(get_db)):
         db.commit()
         db.refresh(new_review)
         review_id = new_review.review_id
+        first_review_id = on_review_created(payload.user_id, payload.restaurant_id, review_id, db)
 
         # Save photo URLs to MongoDB
         if payload.photo_urls:
@@ -383,8 +426,10 @@ def create_review(payload: ReviewCreate, db: Session = Depends(get_db)):
         person = db.query(People).filter(People.user_id == payload.user_id).first()
         nickname = person.nickname if person else None
 
-        # Index in Elasticsearch (with nickname)
-        es.index(index="user_review_nickname", id=review_id, document={
+        # Index in Elasticsearch (with nickname); the outbox entry lets the
+        # sync worker repair the index if this write is lost
+        record_change(ENTITY_REVIEW, review_id)
+        indexed = es_indexer.index("user_review_nickname", review_id, {
             "review_id": review_id,
             "user_id": payload.user_id,
             "restaurant_id": payload.restaurant_id,
@@ -393,7 +438,12 @@ def create_review(payload: ReviewCreate, db: Session = Depends(get_db)):
             "review": payload.review or "",
             "photo_filenames": payload.photo_filenames or [],
             "created_at": new_review.created_at.isoformat()
-        })
+        }, wait=wait)
+
+        # Keep the materialised restaurant card in step
+        adjust_card_review_count(payload.restaurant_id, +1)
+        if first_review_id == review_id:
+            set_card_thumbnail(payload.restaurant_id, review_id)
 
         # Lastly, update the user-to-restaurant score
         update_user_to_restaurant_score(
@@ -402,6 +452,9 @@ def create_review(payload: ReviewCreate, db: Session = Depends(get_db)):
             db=db
         )
 
+        if wait:
+            indexed.result(timeout=ES_BULK_WAIT_TIMEOUT_S)
+
         return {
             "message": "Review created", 
             "review_id": review_id,
@@ -415,7 +468,7 @@ def create_review(payload: ReviewCreate, db: Session = Depends(get_db)):
 
 
 @router.put("/update_reviews/{review_id}", tags=["Reviews"])
-def update_review(review_id: int, payload: ReviewUpdate, db: Session = Depends(get_db)):
+def update_review(review_id: int, payload: ReviewUpdate, wait: bool = False, db: Session = Depends(get_db)):
     try:
         review = db.query(Review).filter(Review.review_id == review_id).first()
         if not review:
@@ -448,6 +501,9 @@ def update_review(review_id: int, payload: ReviewUpdate, db: Session = Depends(g
                 {"$set": {"photo_urls": payload.photo_urls}},
                 upsert=True
             )
+            first = get_counters(SCOPE_RESTAURANT, review.restaurant_id)["first_review_id"]
+            if first == review_id:
+                set_card_thumbnail(review.restaurant_id, review_id)
 
         # Fetch previous review keywords
         prev_keywords = review_keywords_collection.find_one({"review_id": review_id}) or {
@@ -505,13 +561,14 @@ def update_review(review_id: int, payload: ReviewUpdate, db: Session = Depends(g
         )
 
         # Update Elasticsearch
-        es.update(index="user_review_nickname", id=review_id, body={
-            "doc": {
-                "comments": payload.comments,
-                "review": payload.review,
-                "photo_filenames": payload.photo_filenames or []
-            }
-        })
+        record_change(ENTITY_REVIEW, review_id)
+        updated = es_indexer.update("user_review_nickname", review_id, {
+            "comments": payload.comments,
+            "review": payload.review,
+            "photo_filenames": payload.photo_filenames or []
+        }, wait=wait)
+        if wait:
+            updated.result(timeout=ES_BULK_WAIT_TIMEOUT_S)
 
         return {"message": "Review updated", "review_id": review_id}
 
@@ -590,7 +647,7 @@ def get_review(review_id: int, db: Session = Depends(get_db)):
     }
 
 @router.delete("/delete_reviews/{review_id}", tags=["Reviews"])
-def delete_review(review_id: int, db: Session = Depends(get_db)):
+def delete_review(review_id: int, wait: bool = False, db: Session = Depends(get_db)):
     try:
         # Step 1: Find review (MySQL)
         review = db.query(Review).filter(Review.review_id == review_id).first()
@@ -605,6 +662,7 @@ def delete_review(review_id: int, db: Session = Depends(get_db)):
         # Step 3: Delete from MySQL
         db.delete(review)
         db.commit()
+        first_changed = on_review_deleted(review.user_id, review.restaurant_id, review_id, db)
 
         # Step 4: Delete from MongoDB
         photo_collection.delete_one({"review_id": review_id})
@@ -619,17 +677,8 @@ def delete_review(review_id: int, db: Session = Depends(get_db)):
         )
 
         # Step 6: Delete from Elasticsearch
-        es.delete_by_query(
-            index="user_review_nickname",
-            body={
-                "query": {
-                    "term": {
-                        "review_id": review_id  # use the source field
-                    }
-                }
-            },
-            refresh=True
-        )
+        record_change(ENTITY_REVIEW, review_id, OP_DELETE)
+        deleted = delete_review_document(review_id, wait=wait)
         # Step 7: Subtract keywords from restaurant_keywords
         subtract_restaurant_keywords(
             restaurant_id=review.restaurant_id,
@@ -637,13 +686,24 @@ def delete_review(review_id: int, db: Session = Depends(get_db)):
             db=db
         )
 
-        # Step 8: Update user-to-restaurant score
+        # Step 8: Refresh the materialised restaurant card
+        adjust_card_review_count(review.restaurant_id, -1)
+        if first_changed:
+            set_card_thumbnail(
+                review.restaurant_id,
+                get_counters(SCOPE_RESTAURANT, review.restaurant_id)["first_review_id"],
+            )
+
+        # Step 9: Update user-to-restaurant score
         update_user_to_restaurant_score(
             u_id=review.user_id,
             r_id=review.restaurant_id,
             db=db
         )
 
+        if wait:
+            deleted.result(timeout=ES_BULK_WAIT_TIMEOUT_S)
+
         return {"message": f"Review {review_id} deleted successfully"}
 
     except Exception as e:
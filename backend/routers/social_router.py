@@ -1,6 +1,6 @@
 import os
 
-from fastapi import HTTPException, Depends, Query, UploadFile, File
+from fastapi import HTTPException, Depends, Header, Query, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import List, Dict, Optional
 from uuid import uuid4
@@ -18,9 +18,18 @@ from ..connection.mongodb import (
     follow_collection,
     user_keywords_collection,
 )
+from ..connection.elasticdb import es_client as es
 from ..connection.s3 import BUCKET_NAME, REGION_NAME
 from ..services.s3 import upload_bytes, guess_content_type, delete_object
 from ..services.calc_score import update_user_to_user_score
+from ..services.counters import (
+    SCOPE_USER,
+    get_counters,
+    on_follow_changed,
+    seed_review_counters,
+    sql_follow_counts,
+)
+from ..services.http_cache import conditional_json, make_etag
 
 from .common_imports import *
 
@@ -51,11 +60,19 @@ def _compat_score(holder_id: int, partner_id: int, db: Session) -> float:
         return 0.0
 
 @router.get("/social/{user_id}", tags=["Social"])
-def get_user_social(user_id: int, db: Session = Depends(get_db)):
+def get_user_social(
+    user_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
     """
     Return follower / following statistics **plus** nickname and keyword
     profile for the given user.
 
+    The ``ETag`` is derived from the user's ``state_id``, avatar and
+    follow/keyword counters; polls with a matching ``If-None-Match`` get a
+    **304** without touching the follow or keyword documents.
+
     Response schema
     ---------------
     {
@@ -68,46 +85,124 @@ def get_user_social(user_id: int, db: Session = Depends(get_db)):
         "keywords":          list[dict]          # raw doc from Mongo
     }
     """
-    # 1. ── Core user row (for counts & validity)
+    # 1. ── Core user row (for validity & validator)
     user = db.query(Users).filter(Users.user_id == user_id).first()
-    profile_url = user.profile_image if user else None
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    profile_url = user.profile_image
+
+    # 2. ── Counts – maintained counters, O(1)
+    counters = get_counters(SCOPE_USER, user_id, sql_follow_counts(user))
+    etag = make_etag(
+        "social", user_id, user.state_id, profile_url,
+        counters["followers"], counters["following"],
+        counters["following_rev"], counters["keywords"],
+    )
+
+    def build() -> dict:
+        # 3. ── Nickname (People table)
+        person = db.query(People).filter(People.user_id == user_id).first()
+        nickname = person.nickname if person else None
+
+        # 4. ── Following IDs (MongoDB)
+        doc = follow_collection.find_one(
+            {"user_id": user_id}, {"_id": 0, "following_ids": 1}
+        ) or {}
+        following_ids = doc.get("following_ids", [])
+
+        # 5. ── Keyword profile (MongoDB)
+        projection = {"_id": 0, "keywords.name": 1, "keywords.sentiment": 1, "keywords.frequency": 1}
+        kw_doc = user_keywords_collection.find_one({"user_id": user_id}, projection) or {}
+        keywords = kw_doc.get("keywords", [])  # each item: {name, sentiment, frequency}
+
+        # 6. ── Assemble response
+        return {
+            "user_id": user_id,
+            "profile_url": profile_url,
+            "nickname": nickname,
+            "follower_count": counters["followers"],
+            "following_count": counters["following"],
+            "following_ids": following_ids,
+            "keywords": keywords,
+        }
+
+    return conditional_json(etag, if_none_match, build)
+
+@router.get("/profile_summary/{user_id}", tags=["Social"])
+def get_profile_summary(
+    user_id: int,
+    recent: int = Query(5, ge=0, le=50, description="How many latest review ids to return"),
+    viewer_id: Optional[int] = Query(None, description="Adds `is_following` (viewer → user)"),
+    exact: bool = Query(False, description="Count reviews with ES `_count` instead of the maintained counter"),
+    db: Session = Depends(get_db),
+):
+    """
+    Cheap aggregates for profile headers – no per-review enrichment.
+
+    Response
+    --------
+    {
+        "user_id":           int,
+        "review_count":      int,
+        "follower_count":    int,
+        "following_count":   int,
+        "recent_review_ids": list[int],     # newest first
+        "is_following":      bool | None    # only with viewer_id
+    }
+    """
+    user = db.query(Users).filter(Users.user_id == user_id).first()
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Users reconcile_all has not reached yet count from MySQL (once)
+    seed_review_counters(SCOPE_USER, user_id, db)
+    counters = get_counters(SCOPE_USER, user_id, sql_follow_counts(user))
+    review_count = counters["reviews"]
+    by_author = {"term": {"user_id": user_id}}
+
+    try:
+        if exact:
+            review_count = es.count(index="user_review_nickname", body={"query": by_author})["count"]
+
+        recent_ids: List[int] = []
+        if recent:
+            hits = es.search(
+                index="user_review_nickname",
+                body={
+                    "_source": ["review_id"],
+                    "query": by_author,
+                    "sort": [{"created_at": {"order": "desc"}}],
+                    "size": recent,
+                },
+            )["hits"]["hits"]
+            recent_ids = [h["_source"]["review_id"] for h in hits]
+    except Exception as exc:  # pragma: no cover
+        raise HTTPException(500, f"Elasticsearch query failed → {exc}") from exc
+
+    is_following: Optional[bool] = None
+    if viewer_id is not None:
+        is_following = follow_collection.count_documents(
+            {"user_id": viewer_id, "following_ids": user_id}, limit=1
+        ) > 0
 
-    # 2. ── Nickname (People table)
-    person = db.query(People).filter(People.user_id == user_id).first()
-    nickname = person.nickname if person else None
-
-    # 3. ── Follower / following IDs (MongoDB)
-    doc = follow_collection.find_one({"user_id": user_id}) or {}
-    follower_ids = doc.get("follower_ids", [])
-    following_ids = doc.get("following_ids", [])
-
-    # 4. ── Counts – update MySQL cache if stale
-    follower_count = len(follower_ids)
-    following_count = len(following_ids)
-    if (user.follower_count != follower_count or
-            user.following_count != following_count):
-        user.follower_count = follower_count
-        user.following_count = following_count
-        db.commit()
-
-    # 5. ── Keyword profile (MongoDB)
-    projection = {"_id": 0, "keywords.name": 1, "keywords.sentiment": 1, "keywords.frequency": 1}
-    kw_doc = user_keywords_collection.find_one({"user_id": user_id}, projection) or {}
-    keywords = kw_doc.get("keywords", [])  # each item: {name, sentiment, frequency, embedding}
-
-    # 6. ── Assemble response
     return {
         "user_id": user_id,
-        "profile_url": profile_url,
-        "nickname": nickname,
-        "follower_count": follower_count,
-        "following_count": following_count,
-        "following_ids": following_ids,
-        "keywords": keywords,
+        "review_count": review_count,
+        "follower_count": counters["followers"],
+        "following_count": counters["following"],
+        "recent_review_ids": recent_ids,
+        "is_following": is_following,
     }
 
+def _follow_changed(user: Users, target: Users, delta: int, db: Session) -> None:
+    """Counters first (seeded from SQL), then the legacy SQL columns that some readers still use."""
+    user.following_count, target.follower_count = on_follow_changed(
+        user.user_id, target.user_id, delta,
+        following_seed=sql_follow_counts(user)["following"],
+        followers_seed=sql_follow_counts(target)["followers"],
+    )
+    db.commit()
+
 @router.post("/follow/{user_id}/{target_id}", tags=["Social"])
 def follow_user(user_id: int, target_id: int, db: Session = Depends(get_db)):
     if user_id == target_id:
@@ -123,7 +218,7 @@ def follow_user(user_id: int, target_id: int, db: Session = Depends(get_db)):
     if target_id in following_ids:
         raise HTTPException(status_code=409, detail="Already following this user.")
 
-    follow_collection.update_one(
+    res = follow_collection.update_one(
         {"user_id": user_id},
         {"$addToSet": {"following_ids": target_id}},
         upsert=True
@@ -134,13 +229,9 @@ def follow_user(user_id: int, target_id: int, db: Session = Depends(get_db)):
         upsert=True
     )
 
-    # Recalculate counts
-    updated_user_doc = follow_collection.find_one({"user_id": user_id})
-    updated_target_doc = follow_collection.find_one({"user_id": target_id})
-
-    user.following_count = len(updated_user_doc.get("following_ids", []))
-    target.follower_count = len(updated_target_doc.get("follower_ids", []))
-    db.commit()
+    # Adjust counters only if the edge was actually added (no rescans)
+    if res.modified_count or res.upserted_id is not None:
+        _follow_changed(user, target, +1, db)
 
     return {"message": "Followed successfully"}
 
@@ -160,7 +251,7 @@ def unfollow_user(user_id: int, target_id: int, db: Session = Depends(get_db)):
     if target_id not in following_ids:
         raise HTTPException(status_code=409, detail="Not following this user.")
 
-    follow_collection.update_one(
+    res = follow_collection.update_one(
         {"user_id": user_id},
         {"$pull": {"following_ids": target_id}}
     )
@@ -169,13 +260,8 @@ def unfollow_user(user_id: int, target_id: int, db: Session = Depends(get_db)):
         {"$pull": {"follower_ids": user_id}}
     )
 
-    # Recalculate counts
-    updated_user_doc = follow_collection.find_one({"user_id": user_id})
-    updated_target_doc = follow_collection.find_one({"user_id": target_id})
-
-    user.following_count = len(updated_user_doc.get("following_ids", []))
-    target.follower_count = len(updated_target_doc.get("follower_ids", []))
-    db.commit()
+    if res.modified_count:
+        _follow_changed(user, target, -1, db)
 
     return {"message": "Unfollowed successfully"}
 
@@ -0,0 +1,47 @@
+"""
+Geo index check + micro-benchmark on synthetic Seoul-area points:
+results of GeoIndex.within / nearest are compared with a brute-force
+haversine scan, then per-query latency is reported.
+
+    python -m backend.scripts.bench_geo_index
+"""
+import time
+
+import numpy as np
+
+from backend.services.geo_index import GeoIndex, haversine_km
+
+N_POINTS: int = 200_000
+N_QUERIES: int = 2_000
+RADIUS_KM: float = 2.0
+K: int = 20
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(37.40, 37.70, N_POINTS)
+    lons = rng.uniform(126.80, 127.20, N_POINTS)
+    idx = GeoIndex()
+    t0 = time.perf_counter()
+    idx.build([(i, lats[i], lons[i], {}) for i in range(N_POINTS)])
+    print(f"build: {N_POINTS} points in {time.perf_counter() - t0:.2f}s")
+
+    queries = np.column_stack([rng.uniform(37.45, 37.65, N_QUERIES), rng.uniform(126.85, 127.15, N_QUERIES)])
+    for qlat, qlon in queries[:50]:
+        d = haversine_km(qlat, qlon, lats, lons)
+        ids, _ = idx.within(qlat, qlon, RADIUS_KM)
+        assert set(ids.tolist()) == set(np.flatnonzero(d <= RADIUS_KM).tolist())
+        ids, _ = idx.nearest(qlat, qlon, K)
+        assert ids.tolist() == np.argsort(d, kind="stable")[:K].tolist()
+    print("correctness: within / nearest match brute force")
+
+    for name, fn in (
+        ("within", lambda la, lo: idx.within(la, lo, RADIUS_KM)),
+        ("nearest", lambda la, lo: idx.nearest(la, lo, K)),
+    ):
+        t0 = time.perf_counter()
+        for qlat, qlon in queries:
+            fn(qlat, qlon)
+        print(f"{name:>8}: {(time.perf_counter() - t0) / N_QUERIES * 1e6:8.1f} µs/query")
+
+if __name__ == "__main__":
+    main()
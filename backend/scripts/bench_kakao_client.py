@@ -0,0 +1,108 @@
+"""
+Exercise services/kakao.KakaoClient against a local fake Kakao server:
+serial page fetching (old `_search_kakao_places`) vs concurrent pages,
+a cached repeat lookup, and 429 back-off.  No network or API key needed.
+
+    python -m backend.scripts.bench_kakao_client
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from backend.services.kakao import KEYWORD_PATH, KakaoClient
+
+# ────────────────────────── configuration knobs ──────────────────────────
+RTT_S: float = 0.08            # simulated Kakao round trip
+TOTAL_PLACES: int = 40         # → 3 pages of 15 / 15 / 10
+THROTTLE_KEYWORD: str = "throttled"
+
+_hits = {"count": 0, "throttled": 0}
+
+class _FakeKakao(BaseHTTPRequestHandler):
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        q = parse_qs(url.query)
+        _hits["count"] += 1
+        time.sleep(RTT_S)
+        keyword, page = q["query"][0], int(q.get("page", ["1"])[0])
+
+        if keyword == THROTTLE_KEYWORD and _hits["throttled"] < 2:
+            _hits["throttled"] += 1
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+
+        if url.path != KEYWORD_PATH:
+            self.send_response(404)
+            self.end_headers()
+            return
+        first = (min(page, 3) - 1) * 15
+        docs = [
+            {"id": str(i), "place_name": f"{keyword} {i}", "x": "127.0", "y": "37.5"}
+            for i in range(first, min(first + 15, TOTAL_PLACES))
+        ]
+        body = json.dumps({
+            "documents": docs,
+            "meta": {"pageable_count": TOTAL_PLACES, "total_count": TOTAL_PLACES,
+                     "is_end": first + 15 >= TOTAL_PLACES},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def _serial(base: str, keyword: str) -> list:
+    out = []
+    for page in range(1, 4):
+        data = requests.get(base + KEYWORD_PATH, params={"query": keyword, "page": page}).json()
+        out.extend(data["documents"])
+        if data["meta"]["is_end"]:
+            break
+    return out
+
+async def _run(base: str) -> None:
+    client = KakaoClient(base_url=base, api_key="fake")
+    await client.search_places("warmup")               # open the keep-alive connection
+
+    t0 = time.perf_counter()
+    serial = _serial(base, "딸부자네")
+    t_serial = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    pooled = await client.search_places("딸부자네")
+    t_pooled = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    cached = await client.search_places("  딸부자네 ")
+    t_cached = time.perf_counter() - t0
+
+    assert [d["id"] for d in serial] == [d["id"] for d in pooled] == [d["id"] for d in cached]
+    print(f"serial : {t_serial * 1000:7.1f} ms ({len(serial)} places)")
+    print(f"pooled : {t_pooled * 1000:7.1f} ms")
+    print(f"cached : {t_cached * 1000:7.1f} ms")
+
+    t0 = time.perf_counter()
+    throttled = await client.search_places(THROTTLE_KEYWORD, max_pages=1)
+    print(f"429 ×2 : {(time.perf_counter() - t0) * 1000:7.1f} ms, {len(throttled)} places after back-off")
+    await client.aclose()
+
+def main() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeKakao)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        asyncio.run(_run(f"http://127.0.0.1:{server.server_address[1]}"))
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Login-burst benchmark: p99 of a cheap "search-like" sync route while a burst
+of bcrypt verifications is in flight.
+
+  inline – bcrypt runs in the request threadpool (old sync /login)
+  pool   – bcrypt runs in `password_hasher` (async /login)
+
+Run from the project root:
+    python -m backend.scripts.bench_login_burst
+"""
+import asyncio
+import time
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from backend.services.passwords import (
+    hash_password,
+    password_hasher,
+    verify_and_update_password,
+)
+
+# ────────────────────────── configuration knobs ──────────────────────────
+LOGIN_BURST: int = 200          # concurrent logins
+SEARCH_INTERVAL_S: float = 0.01  # one search request every 10 ms
+SEARCH_IO_S: float = 0.005       # simulated ES/SQL wait inside the search route
+PASSWORD: str = "correct horse battery staple"
+
+def _search_route() -> None:
+    time.sleep(SEARCH_IO_S)
+
+async def _search_load(stop: asyncio.Event, latencies: list[float]) -> None:
+    async def one() -> None:
+        t0 = time.perf_counter()
+        await run_in_threadpool(_search_route)
+        latencies.append(time.perf_counter() - t0)
+
+    tasks = []
+    while not stop.is_set():
+        tasks.append(asyncio.create_task(one()))
+        await asyncio.sleep(SEARCH_INTERVAL_S)
+    await asyncio.gather(*tasks)
+
+async def _login_inline(stored: bytes) -> None:
+    await run_in_threadpool(verify_and_update_password, PASSWORD, stored)
+
+async def _login_pool(stored: bytes) -> None:
+    try:
+        await password_hasher.verify(PASSWORD, stored)
+    except Exception:
+        pass    # 503 fast-rejection counts as handled
+
+async def _run(mode: str, stored: bytes) -> None:
+    login = _login_inline if mode == "inline" else _login_pool
+    stop = asyncio.Event()
+    latencies: list[float] = []
+    search = asyncio.create_task(_search_load(stop, latencies))
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(login(stored) for _ in range(LOGIN_BURST)))
+    burst_s = time.perf_counter() - t0
+    stop.set()
+    await search
+
+    lat_ms = np.asarray(latencies) * 1000.0
+    print(
+        f"{mode:>6}: burst {burst_s:6.2f}s | search n={lat_ms.size:4d} "
+        f"p50={np.percentile(lat_ms, 50):7.1f}ms p99={np.percentile(lat_ms, 99):7.1f}ms"
+    )
+
+async def main() -> None:
+    stored = hash_password(PASSWORD)
+    # warm the worker processes so spawn cost is not measured
+    await password_hasher.verify(PASSWORD, stored)
+    for mode in ("inline", "pool"):
+        await _run(mode, stored)
+    password_hasher.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
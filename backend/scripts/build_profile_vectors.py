@@ -0,0 +1,139 @@
+"""
+Rebuild the profile summary vectors (see services/profile_vectors.py) from
+the keyword documents.  The review endpoints keep them current
+incrementally; run this once to fill the matrices, after bulk jobs that
+write keyword documents directly (update_blog_keywords, compact_profiles,
+crawl_kakao) and whenever the drift check reports a gap.
+
+    python -m backend.scripts.build_profile_vectors
+    python -m backend.scripts.build_profile_vectors --kind restaurant --check
+
+`--check` only compares the stored rows with a recomputation (cosine) and
+exits non-zero when any row drifted.  Concurrent updates of one profile
+can leave a row off its document, so schedule it (e.g. nightly) and run
+the full rebuild whenever it fails.
+
+Without Mongo, replays random add / subtract updates on synthetic
+profiles in a temporary directory and reports incremental vs
+from-scratch drift:
+
+    python -m backend.scripts.build_profile_vectors --synthetic
+"""
+import argparse
+import tempfile
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from backend.services.profile_vectors import (
+    KIND_RESTAURANT,
+    KIND_USER,
+    ProfileVectorStore,
+    profile_weights,
+    restaurant_vectors,
+    user_vectors,
+)
+
+# ───── configuration knobs ─────
+DRIFT_COS = 0.9999                # rows below this cosine to a recomputation are reported
+SYN_ENTITIES = 200
+SYN_UPDATES = 5000
+
+def _documents(kind: str) -> Iterable[Tuple[int, Dict[str, Any]]]:
+    from backend.connection.mongodb import restaurant_keywords_collection, user_keywords_collection
+
+    if kind == KIND_USER:
+        for doc in user_keywords_collection.find({}, {"_id": 0, "user_id": 1, "keywords": 1}):
+            yield doc["user_id"], doc
+    else:
+        for doc in restaurant_keywords_collection.find({}, {"_id": 0, "r_id": 1, "keywords": 1, "tail": 1}):
+            yield doc["r_id"], doc
+
+def _reference(store: ProfileVectorStore, kind: str, doc: Dict[str, Any]) -> np.ndarray:
+    with tempfile.TemporaryDirectory(prefix="pv-ref-") as directory:
+        scratch = ProfileVectorStore(kind, directory, store.dim)
+        scratch.put(0, profile_weights(kind, doc))
+        return scratch.vectors([0])[0][0]
+
+def rebuild(kind: str, store: ProfileVectorStore, check: bool) -> Dict[str, Any]:
+    stats = {"docs": 0, "drifted": 0, "min_cos": 1.0}
+    for entity_id, doc in _documents(kind):
+        stats["docs"] += 1
+        if check:
+            got = store.vector(entity_id)
+            ref = _reference(store, kind, doc)
+            cos = float(got @ ref) if got is not None else (1.0 if not ref.any() else 0.0)
+            stats["min_cos"] = min(stats["min_cos"], cos)
+            stats["drifted"] += cos < DRIFT_COS
+        else:
+            store.put(entity_id, profile_weights(kind, doc))
+    store.flush()
+    return stats
+
+# ───────────────────────────── synthetic replay ───────────────────────────────
+def synthetic(directory: str) -> None:
+    from backend.scripts.calibrate_int8 import synthetic_sample
+
+    rng = np.random.default_rng(0)
+    users, _ = synthetic_sample(SYN_ENTITIES, 0)
+    store = ProfileVectorStore(KIND_USER, directory)
+    docs: Dict[int, List[Dict[str, Any]]] = {i: [] for i in range(SYN_ENTITIES)}
+    t_inc = 0.0
+    for _ in range(SYN_UPDATES):
+        uid = int(rng.integers(SYN_ENTITIES))
+        doc = docs[uid]
+        before = profile_weights(KIND_USER, {"keywords": doc})
+        if doc and rng.random() < 0.35:                       # subtract one occurrence
+            kw = doc[int(rng.integers(len(doc)))]
+            kw["frequency"] -= 1
+            docs[uid] = doc = [k for k in doc if k["frequency"] > 0]
+        else:                                                 # add a keyword from the profile pool
+            pick = dict(users[uid][int(rng.integers(len(users[uid])))], frequency=1)
+            same = next((k for k in doc if k["name"] == pick["name"] and k["sentiment"] == pick["sentiment"]), None)
+            if same:
+                same["frequency"] += 1
+            else:
+                doc.append(pick)
+        t = time.perf_counter()
+        store.apply(uid, before, profile_weights(KIND_USER, {"keywords": doc}))
+        t_inc += time.perf_counter() - t
+
+    got, ok = store.vectors(range(SYN_ENTITIES))
+    cos = []
+    for uid in range(SYN_ENTITIES):
+        ref = _reference(store, KIND_USER, {"keywords": docs[uid]})
+        if ok[uid] and ref.any():
+            cos.append(float(got[uid] @ ref))
+    cos_a = np.array(cos)
+    print(f"[SYN] {SYN_UPDATES} updates on {SYN_ENTITIES} users, {t_inc / SYN_UPDATES * 1e3:.3f} ms per update")
+    print(f"    incremental vs recomputed cosine: min {cos_a.min():.6f}  mean {cos_a.mean():.6f}"
+          f"  below {DRIFT_COS}: {int((cos_a < DRIFT_COS).sum())}")
+    print(f"    matrix {store.capacity} rows × {store.columns} float32 = {store.capacity * store.columns * 4 / 1e6:.1f} MB")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kind", choices=(KIND_USER, KIND_RESTAURANT, "all"), default="all")
+    parser.add_argument("--check", action="store_true", help="report drift without writing")
+    parser.add_argument("--synthetic", action="store_true", help="replay generated updates, no Mongo")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        with tempfile.TemporaryDirectory(prefix="profile-vectors-") as directory:
+            synthetic(directory)
+        return
+
+    stores = {KIND_USER: user_vectors, KIND_RESTAURANT: restaurant_vectors}
+    drifted = 0
+    for kind in (stores if args.kind == "all" else (args.kind,)):
+        t0 = time.perf_counter()
+        s = rebuild(kind, stores[kind], args.check)
+        drifted += s["drifted"]
+        tag = "CHECK" if args.check else "OK"
+        extra = f", {s['drifted']} drifted (min cos {s['min_cos']:.5f})" if args.check else ""
+        print(f"[{tag}] {kind}: {s['docs']} profiles in {time.perf_counter() - t0:.1f}s{extra}")
+    if drifted:
+        raise SystemExit(f"[FAIL] {drifted} drifted rows – run without --check to rebuild")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Write a new embedding snapshot generation (see services/embedding_snapshot.py)
+that every uvicorn worker maps read-only and swaps to without a restart:
+
+    user        normalised profile summary vectors, keyed by user_id
+    restaurant  normalised profile summary vectors, keyed by r_id
+    vocab       keyword embeddings (users + restaurants), keyed by string
+
+    python -m backend.scripts.build_snapshot
+    python -m backend.scripts.build_snapshot --skip-vocab
+
+Schedule it after build_profile_vectors / train_concepts, e.g. hourly.
+
+Without Mongo, builds a synthetic snapshot in a temporary directory, maps
+it from several worker processes, publishes a second generation and
+reports per-worker private vs shared memory and the hot swap:
+
+    python -m backend.scripts.build_snapshot --synthetic --workers 4
+"""
+import argparse
+import multiprocessing as mp
+import os
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from backend.services.embedding_snapshot import SNAPSHOT_DIR, EmbeddingSnapshot, SnapshotWriter
+from backend.services.profile_vectors import KIND_RESTAURANT, KIND_USER, restaurant_vectors, user_vectors
+
+# ───── configuration knobs ─────
+SYN_ROWS = 50_000
+SYN_DIM = 1536
+
+def _profile_table(store) -> Tuple[np.ndarray, np.ndarray]:
+    vectors, ok = store.vectors(range(store.capacity))
+    return np.flatnonzero(ok), vectors[ok]
+
+def build(root: str, vocab: bool) -> int:
+    with SnapshotWriter(root) as writer:
+        for kind, store in ((KIND_USER, user_vectors), (KIND_RESTAURANT, restaurant_vectors)):
+            ids, matrix = _profile_table(store)
+            writer.add_ids(kind, ids, matrix)
+            print(f"    {kind:<10} {len(ids)} rows")
+        if vocab:
+            from backend.scripts.train_concepts import mongo_vocabulary
+
+            keywords, matrix = mongo_vocabulary()
+            writer.add_keys("vocab", keywords, matrix)
+            print(f"    {'vocab':<10} {len(keywords)} rows")
+    return writer.generation
+
+# ───────────────────────────── synthetic check ────────────────────────────────
+def _memory_kb() -> Dict[str, int]:
+    out = {}
+    try:
+        with open("/proc/self/smaps_rollup") as fh:
+            for line in fh:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss", "Shared_Clean", "Private_Clean", "Private_Dirty"):
+                    out[key] = int(rest.split()[0])
+    except OSError:
+        pass
+    return out
+
+def _worker(root: str, ready, go, results) -> None:
+    snap = EmbeddingSnapshot(root)
+    snap.load()
+    m = snap.matrix(KIND_RESTAURANT)
+    checksum = float(m.sum())                                        # touch every page
+    ready.put(snap.generation)
+    go.wait()
+    before = snap.generation
+    snap._checked = 0.0                                              # poll now
+    row, found = snap.by_ids(KIND_RESTAURANT, [7])
+    results.put({"pid": os.getpid(), "gen": (before, snap.generation), "found": bool(found[0]),
+                 "checksum": checksum, "mem": _memory_kb()})
+
+def synthetic(n_workers: int) -> None:
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory(prefix="snapshot-") as root:
+        ids = rng.choice(SYN_ROWS * 4, SYN_ROWS, replace=False)
+        matrix = rng.standard_normal((SYN_ROWS, SYN_DIM), dtype=np.float32)
+        t0 = time.perf_counter()
+        with SnapshotWriter(root) as w:
+            w.add_ids(KIND_RESTAURANT, ids, matrix)
+        size_mb = matrix.nbytes / 1e6
+        print(f"[SYN] generation 1: {SYN_ROWS} × {SYN_DIM} float32 ({size_mb:.0f} MB) in {time.perf_counter() - t0:.1f}s")
+
+        ctx = mp.get_context("spawn")
+        ready, results, go = ctx.Queue(), ctx.Queue(), ctx.Event()
+        procs = [ctx.Process(target=_worker, args=(root, ready, go, results)) for _ in range(n_workers)]
+        for p in procs:
+            p.start()
+        gens = [ready.get() for _ in procs]
+
+        with SnapshotWriter(root) as w:                               # hot swap
+            w.add_ids(KIND_RESTAURANT, np.append(ids, 7), np.vstack([matrix, np.ones((1, SYN_DIM), np.float32)]))
+        go.set()
+        rows: List[dict] = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+        print(f"    workers mapped generation {sorted(set(gens))}")
+        for r in rows:
+            mem = r["mem"]
+            print(f"    pid {r['pid']}: gen {r['gen'][0]} → {r['gen'][1]}, new row found {r['found']}; "
+                  f"RSS {mem.get('Rss', 0) / 1e3:.0f} MB, PSS {mem.get('Pss', 0) / 1e3:.0f} MB, "
+                  f"private {(mem.get('Private_Clean', 0) + mem.get('Private_Dirty', 0)) / 1e3:.0f} MB")
+        print(f"    (a private copy per worker would be {size_mb:.0f} MB each; PSS splits shared pages)")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default=SNAPSHOT_DIR)
+    parser.add_argument("--skip-vocab", action="store_true", help="profile vectors only, no Mongo read")
+    parser.add_argument("--synthetic", action="store_true", help="generated matrix, several reader processes")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        synthetic(args.workers)
+        return
+    t0 = time.perf_counter()
+    generation = build(args.root, vocab=not args.skip_vocab)
+    print(f"[OK] generation {generation} published in {time.perf_counter() - t0:.1f}s → {args.root}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Calibrate the int8 scoring mode (SCORE_INT8, see services/calc_score.py)
+against the float path: every sampled (user, restaurant) pair is scored by
+`_score_pair`, by `score_matrices` on float32 profiles and on int8 ones.
+
+Reports score drift, keyword-pair cosines that cross THRESHOLD after
+quantisation, profile memory and scoring time.
+
+    python -m backend.scripts.calibrate_int8 --users 50 --restaurants 200
+
+Without Mongo, on synthetic profiles whose keyword cosines straddle
+THRESHOLD:
+
+    python -m backend.scripts.calibrate_int8 --synthetic
+"""
+import argparse
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from backend.services.calc_score import (
+    EMBED_DIM,
+    THRESHOLD,
+    _canonize_kw_list,
+    _score_pair,
+    build_keyword_matrix,
+    score_matrices,
+    similarity_matrix,
+)
+from backend.services.embedding_codec import encode_embedding
+
+# ───── configuration knobs ─────
+NEAR_BAND = 0.01                  # |cos − THRESHOLD| counted as "near the cut"
+DRIFT_POINTS = 0.5                # score drift (0–100 scale) worth reporting
+SYN_CONCEPTS = 150
+SYN_VOCAB = 3000
+SYN_KEYWORDS = (5, 40)            # keywords per profile, min / max
+
+Profile = List[Dict[str, Any]]
+
+# ───────────────────────────── samples ────────────────────────────────────────
+def mongo_sample(n_users: int, n_rests: int) -> Tuple[List[Profile], List[Profile]]:
+    from backend.connection.mongodb import restaurant_keywords_collection, user_keywords_collection
+
+    def _sample(coll, n: int) -> List[Profile]:
+        docs = coll.aggregate([
+            {"$match": {"keywords.0": {"$exists": True}}},
+            {"$sample": {"size": n}},
+            {"$project": {"_id": 0, "keywords": 1}},
+        ])
+        return [d["keywords"] for d in docs]
+
+    return _sample(user_keywords_collection, n_users), _sample(restaurant_keywords_collection, n_rests)
+
+def synthetic_sample(n_users: int, n_rests: int, seed: int = 0) -> Tuple[List[Profile], List[Profile]]:
+    """
+    Vocabulary words scattered around shared concepts: word·concept cosines
+    in [0.7, 0.95], so cosines between words of one concept land around
+    THRESHOLD, as they do for real near-synonyms.
+    """
+    rng = np.random.default_rng(seed)
+
+    def _unit(m: np.ndarray) -> np.ndarray:
+        return m / np.linalg.norm(m, axis=-1, keepdims=True)
+
+    concepts = _unit(rng.standard_normal((SYN_CONCEPTS, EMBED_DIM)))
+    owner = rng.integers(0, SYN_CONCEPTS, SYN_VOCAB)
+    a = rng.uniform(0.7, 0.95, SYN_VOCAB)[:, None]
+    noise = _unit(rng.standard_normal((SYN_VOCAB, EMBED_DIM)))
+    vocab = _unit(a * concepts[owner] + np.sqrt(1 - a ** 2) * noise).astype(np.float32)
+    encoded = [encode_embedding(v) for v in vocab]
+
+    def _profile(key: str) -> Profile:
+        n = int(rng.integers(*SYN_KEYWORDS))
+        words = rng.choice(SYN_VOCAB, n, replace=False)
+        return [
+            {
+                key: f"w{w}",
+                "sentiment": "positive" if rng.random() < 0.8 else "negative",
+                "frequency": int(rng.geometric(0.4)),
+                "embedding": encoded[w],
+            }
+            for w in words
+        ]
+
+    return [_profile("name") for _ in range(n_users)], [_profile("keyword") for _ in range(n_rests)]
+
+# ───────────────────────────── evaluation ─────────────────────────────────────
+def calibrate(users: List[Profile], rests: List[Profile]) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    u_canon = [_canonize_kw_list(u) for u in users]
+    r_canon = [_canonize_kw_list(r) for r in rests]
+    t_canon = time.perf_counter() - t0
+    u_f32 = [build_keyword_matrix(u) for u in users]
+    r_f32 = [build_keyword_matrix(r) for r in rests]
+    t0 = time.perf_counter()
+    u_i8 = [build_keyword_matrix(u, int8=True) for u in users]
+    r_i8 = [build_keyword_matrix(r, int8=True) for r in rests]
+    t_i8_build = time.perf_counter() - t0
+
+    ref, vec, q8 = [], [], []
+    t_ref = t_vec = t_q8 = 0.0
+    for i in range(len(users)):
+        for j in range(len(rests)):
+            t = time.perf_counter()
+            ref.append(_score_pair(u_canon[i], r_canon[j]))
+            t_ref += time.perf_counter() - t
+            t = time.perf_counter()
+            vec.append(score_matrices(u_f32[i], r_f32[j]))
+            t_vec += time.perf_counter() - t
+            t = time.perf_counter()
+            q8.append(score_matrices(u_i8[i], r_i8[j]))
+            t_q8 += time.perf_counter() - t
+
+    # Keyword-pair cosines around the cut
+    near = flips = 0
+    max_cos_err = 0.0
+    for i in range(len(users)):
+        for j in range(len(rests)):
+            if not len(u_f32[i]) or not len(r_f32[j]):
+                continue
+            sf = similarity_matrix(u_f32[i], r_f32[j])
+            sq = similarity_matrix(u_i8[i], r_i8[j])
+            max_cos_err = max(max_cos_err, float(np.abs(sf - sq).max()))
+            near += int((np.abs(sf - THRESHOLD) < NEAR_BAND).sum())
+            flips += int(((sf >= THRESHOLD) != (sq >= THRESHOLD)).sum())
+
+    ref_a, vec_a, q8_a = np.array(ref), np.array(vec), np.array(q8)
+    drift = np.abs(q8_a - ref_a)
+    return {
+        "pairs": len(ref),
+        "vector_vs_loop_max": float(np.abs(vec_a - ref_a).max(initial=0.0)),
+        "drift_mean": float(drift.mean()) if drift.size else 0.0,
+        "drift_p95": float(np.percentile(drift, 95)) if drift.size else 0.0,
+        "drift_max": float(drift.max(initial=0.0)),
+        "drift_over": int((drift > DRIFT_POINTS).sum()),
+        "cos_err_max": max_cos_err,
+        "near_threshold": near,
+        "threshold_flips": flips,
+        "mem_f32": sum(m.nbytes for m in u_f32 + r_f32),
+        "mem_i8": sum(m.nbytes for m in u_i8 + r_i8),
+        "t_canon": t_canon,
+        "t_i8_build": t_i8_build,
+        "t_ref": t_ref,
+        "t_vec": t_vec,
+        "t_q8": t_q8,
+    }
+
+def _print(s: Dict[str, Any]) -> None:
+    n = max(s["pairs"], 1)
+    print(f"pairs scored              : {s['pairs']}")
+    print(f"vectorised vs _score_pair : max |Δ| {s['vector_vs_loop_max']:.2e} points")
+    print(f"int8 drift (0–100 scale)  : mean {s['drift_mean']:.3f}  p95 {s['drift_p95']:.3f}"
+          f"  max {s['drift_max']:.3f}  >{DRIFT_POINTS}: {s['drift_over']}")
+    print(f"keyword cosines           : max |Δ| {s['cos_err_max']:.2e}, {s['near_threshold']} within "
+          f"±{NEAR_BAND} of THRESHOLD={THRESHOLD}, {s['threshold_flips']} flipped side")
+    print(f"profile memory            : float32 {s['mem_f32'] / 1e6:.2f} MB → int8 {s['mem_i8'] / 1e6:.2f} MB"
+          f"  (×{s['mem_f32'] / max(s['mem_i8'], 1):.1f})")
+    print(f"time per pair             : _score_pair {s['t_ref'] / n * 1e3:.3f} ms, "
+          f"float32 matrix {s['t_vec'] / n * 1e3:.3f} ms, int8 matrix {s['t_q8'] / n * 1e3:.3f} ms")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=30)
+    parser.add_argument("--restaurants", type=int, default=100)
+    parser.add_argument("--synthetic", action="store_true", help="generated profiles, no Mongo")
+    args = parser.parse_args()
+
+    sample = synthetic_sample if args.synthetic else mongo_sample
+    users, rests = sample(args.users, args.restaurants)
+    _print(calibrate(users, rests))
+
+if __name__ == "__main__":
+    main()
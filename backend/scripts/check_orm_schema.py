@@ -0,0 +1,66 @@
+"""
+Compare the explicit ORM models in connection/mysqldb.py with the live
+MySQL tables.  The app no longer reflects the schema at import, so run
+this after every migration (and in CI against a staging database):
+
+    python -m backend.scripts.check_orm_schema
+
+Reports, per model: columns the model declares but the table lacks
+(queries would fail), table columns the model does not declare (fine
+unless the app needs them), primary-key and type-family mismatches.
+Exits non-zero on anything that would break queries.
+"""
+import argparse
+from typing import List
+
+from sqlalchemy import inspect
+
+from backend.connection.mysqldb import Base, get_engine
+
+def _family(sql_type) -> str:
+    try:
+        family = sql_type.python_type
+        return "int" if family is bool else family.__name__      # MySQL BOOLEAN is TINYINT(1)
+    except (NotImplementedError, AttributeError):
+        return type(sql_type).__name__
+
+def check(strict_types: bool) -> List[str]:
+    inspector = inspect(get_engine())
+    problems: List[str] = []
+    tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            problems.append(f"[FAIL] {table.name}: table missing")
+            continue
+        live = {c["name"]: c for c in inspector.get_columns(table.name)}
+        live_pk = set(inspector.get_pk_constraint(table.name).get("constrained_columns") or [])
+        for col in table.columns:
+            got = live.get(col.name)
+            if got is None:
+                problems.append(f"[FAIL] {table.name}.{col.name}: declared but not in the table")
+                continue
+            want, have = _family(col.type), _family(got["type"])
+            if want != have:
+                tag = "[FAIL]" if strict_types else "[WARN]"
+                problems.append(f"{tag} {table.name}.{col.name}: model {col.type} ({want}), table {got['type']} ({have})")
+        model_pk = {c.name for c in table.primary_key.columns}
+        if model_pk != live_pk:
+            problems.append(f"[FAIL] {table.name}: primary key {sorted(model_pk)} vs table {sorted(live_pk)}")
+        for name in sorted(live.keys() - {c.name for c in table.columns}):
+            problems.append(f"[INFO] {table.name}.{name}: in the table, not mapped")
+    return problems
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--strict-types", action="store_true", help="type-family mismatches fail too")
+    args = parser.parse_args()
+
+    problems = check(args.strict_types)
+    for line in problems:
+        print(line)
+    if any(p.startswith("[FAIL]") for p in problems):
+        raise SystemExit(1)
+    print(f"[OK] {len(Base.metadata.tables)} models match the live schema")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compact restaurant keyword profiles (see services/profile_compaction.py):
+merge near-duplicate keywords (cosine ≥ COMPACT_MERGE_COS) into their most
+frequent string, cap the scored list at PROFILE_TOP_K and keep per-string
+counts in `history` for display.
+
+Run once to migrate existing documents, then after bulk imports or when
+the merge threshold changes:
+
+    python -m backend.scripts.compact_profiles --dry-run
+    python -m backend.scripts.compact_profiles --merge-cos 0.9 --top-k 48
+"""
+import argparse
+from typing import Any, Dict, List
+
+import bson
+from pymongo import UpdateOne
+
+from backend.connection.mongodb import restaurant_keywords_collection
+from backend.services.profile_compaction import COMPACT_MERGE_COS, PROFILE_TOP_K, compact_profile
+
+# ───── configuration knobs ─────
+BATCH_SIZE = 200
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--merge-cos", type=float, default=COMPACT_MERGE_COS)
+    parser.add_argument("--top-k", type=int, default=PROFILE_TOP_K)
+    parser.add_argument("--dry-run", action="store_true", help="report without writing")
+    args = parser.parse_args()
+
+    stats = {"docs": 0, "conflicts": 0, "reps_before": 0, "reps_after": 0,
+             "scored_before": 0, "scored_after": 0, "max_scored_before": 0,
+             "bytes_before": 0, "bytes_after": 0}
+    ops: List[UpdateOne] = []
+
+    def _flush() -> None:
+        if ops and not args.dry_run:
+            res = restaurant_keywords_collection.bulk_write(ops, ordered=False)
+            stats["conflicts"] += len(ops) - res.matched_count
+        ops.clear()
+
+    cursor = restaurant_keywords_collection.find({}, {"r_id": 1, "keywords": 1, "tail": 1, "history": 1})
+    for doc in cursor:
+        new: Dict[str, Any] = compact_profile(doc, merge_cos=args.merge_cos, top_k=args.top_k)
+        stats["docs"] += 1
+        stats["reps_before"] += len(doc.get("keywords", [])) + len(doc.get("tail", []))
+        stats["reps_after"] += len(new["keywords"]) + len(new["tail"])
+        stats["scored_before"] += len(doc.get("keywords", []))
+        stats["scored_after"] += len(new["keywords"])
+        stats["max_scored_before"] = max(stats["max_scored_before"], len(doc.get("keywords", [])))
+        stats["bytes_before"] += len(bson.encode({"keywords": doc.get("keywords", [])}))
+        stats["bytes_after"] += len(bson.encode({"keywords": new["keywords"]}))
+        # Guard on what was read so a concurrent review write wins
+        guard = {"_id": doc["_id"], "keywords": doc.get("keywords", [])}
+        ops.append(UpdateOne(guard, {"$set": new}))
+        if len(ops) >= BATCH_SIZE:
+            _flush()
+    _flush()
+
+    n = max(stats["docs"], 1)
+    print(f"[{'DRY' if args.dry_run else 'OK'}] {stats['docs']} profiles, {stats['conflicts']} skipped (changed meanwhile)")
+    print(f"    representatives  {stats['reps_before']} → {stats['reps_after']}")
+    print(f"    scored keywords  {stats['scored_before'] / n:.1f} → {stats['scored_after'] / n:.1f} per profile"
+          f" (max {stats['max_scored_before']} → ≤ {args.top_k})")
+    print(f"    scored payload   {stats['bytes_before'] / 1e6:.2f} MB → {stats['bytes_after'] / 1e6:.2f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Convert keyword embeddings in `keywords` (restaurants: the scored
+`keywords` list and the compacted `tail`) and `user_keyword` (users) from
+arrays of BSON doubles to unit-normalised BSON Binary vectors (see
+services/embedding_codec.py).  Readers accept both formats, so this
+can run while the app is serving; rerun it until it reports nothing left.
+
+    python -m backend.scripts.convert_embeddings --dry-run
+    python -m backend.scripts.convert_embeddings --dtype float16
+
+Binary vectors are re-encoded when the target is narrower, e.g.
+`--dtype int8` turns float32 data into the int8 form SCORE_INT8 views in
+place instead of quantising on every call.
+
+Without Mongo, measure the codec on synthetic profiles instead:
+
+    python -m backend.scripts.convert_embeddings --synthetic 200
+"""
+import argparse
+import time
+from typing import Any, Dict, List, Tuple
+
+import bson
+import numpy as np
+from pymongo import UpdateOne
+
+from backend.services.calc_score import EMBED_DIM, _canonize_kw_list
+from backend.services.embedding_codec import encode_embedding, needs_reencode
+
+# ───── configuration knobs ─────
+BATCH_SIZE = 200
+KEYWORDS_PER_PROFILE = 30         # synthetic mode only
+
+def _convert_keywords(keywords: List[Dict[str, Any]], dtype: str) -> Tuple[List[Dict[str, Any]], int]:
+    out, changed = [], 0
+    for kw in keywords:
+        emb = kw.get("embedding")
+        if needs_reencode(emb, dtype):
+            kw = {**kw, "embedding": encode_embedding(emb, dtype)}
+            changed += 1
+        out.append(kw)
+    return out, changed
+
+def _decode_seconds(keywords: List[Dict[str, Any]], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        _canonize_kw_list(keywords)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def convert_collection(coll, fields: Tuple[str, ...], dtype: str, dry_run: bool) -> Dict[str, float]:
+    stats = {"docs": 0, "keywords": 0, "conflicts": 0, "bytes_before": 0, "bytes_after": 0,
+             "decode_before_s": 0.0, "decode_after_s": 0.0}
+    ops: List[UpdateOne] = []
+
+    def _flush() -> None:
+        if ops and not dry_run:
+            res = coll.bulk_write(ops, ordered=False)
+            stats["conflicts"] += len(ops) - res.matched_count
+        ops.clear()
+
+    # Narrower than float32: Binary vectors qualify too (filtered per keyword)
+    types = ["array", "binData"] if dtype in ("float16", "int8") else ["array"]
+    query = {"$or": [{f"{f}.embedding": {"$type": types}} for f in fields]}
+    for doc in coll.find(query, {f: 1 for f in fields}):
+        before = {f: doc.get(f, []) for f in fields}
+        after: Dict[str, List[Dict[str, Any]]] = {}
+        changed = 0
+        for f, keywords in before.items():
+            after[f], n = _convert_keywords(keywords, dtype)
+            changed += n
+        if not changed:
+            continue
+        stats["docs"] += 1
+        stats["keywords"] += changed
+        stats["bytes_before"] += len(bson.encode(before))
+        stats["bytes_after"] += len(bson.encode(after))
+        if stats["docs"] <= 50:                       # timing sample
+            stats["decode_before_s"] += sum(_decode_seconds(kws) for kws in before.values())
+            stats["decode_after_s"] += sum(_decode_seconds(kws) for kws in after.values())
+        # Guard on the arrays we read so a concurrent profile write wins;
+        # the next run picks that document up again
+        guard = {"_id": doc["_id"], **{f: kws for f, kws in before.items() if f in doc}}
+        ops.append(UpdateOne(guard, {"$set": {f: after[f] for f in fields if f in doc}}))
+        if len(ops) >= BATCH_SIZE:
+            _flush()
+    _flush()
+    return stats
+
+def synthetic_stats(n_profiles: int, dtype: str) -> Dict[str, float]:
+    rng = np.random.default_rng(0)
+    stats = {"docs": n_profiles, "keywords": 0, "conflicts": 0, "bytes_before": 0, "bytes_after": 0,
+             "decode_before_s": 0.0, "decode_after_s": 0.0}
+    for _ in range(n_profiles):
+        vecs = rng.standard_normal((KEYWORDS_PER_PROFILE, EMBED_DIM)).astype(np.float32)
+        vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+        # As written today: rounded doubles
+        keywords = [
+            {"name": f"kw{i}", "sentiment": "positive", "frequency": 1, "embedding": [round(float(x), 5) for x in v]}
+            for i, v in enumerate(vecs)
+        ]
+        # Round-trip through BSON so both sides decode what Mongo would return
+        before = bson.decode(bson.encode({"keywords": keywords}))["keywords"]
+        converted, changed = _convert_keywords(keywords, dtype)
+        after = bson.decode(bson.encode({"keywords": converted}))["keywords"]
+        stats["keywords"] += changed
+        stats["bytes_before"] += len(bson.encode({"keywords": before}))
+        stats["bytes_after"] += len(bson.encode({"keywords": after}))
+        stats["decode_before_s"] += _decode_seconds(before)
+        stats["decode_after_s"] += _decode_seconds(after)
+    return stats
+
+def _report(name: str, s: Dict[str, float]) -> None:
+    print(f"[{name}] {s['docs']} docs, {s['keywords']} embeddings, {s['conflicts']} conflicts")
+    if s["bytes_after"]:
+        print(f"    size   {s['bytes_before'] / 1e6:8.2f} MB → {s['bytes_after'] / 1e6:8.2f} MB"
+              f"  (×{s['bytes_before'] / s['bytes_after']:.1f})")
+    if s["decode_after_s"]:
+        print(f"    decode {s['decode_before_s'] * 1e3:8.2f} ms → {s['decode_after_s'] * 1e3:8.2f} ms"
+              f"  (×{s['decode_before_s'] / s['decode_after_s']:.1f}, sampled)")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dtype", choices=("float32", "float16", "int8"), default="float32")
+    parser.add_argument("--collection", choices=("keywords", "user_keyword", "all"), default="all")
+    parser.add_argument("--dry-run", action="store_true", help="report sizes without writing")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="benchmark N synthetic profiles, no Mongo")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        _report(f"synthetic/{args.dtype}", synthetic_stats(args.synthetic, args.dtype))
+        return
+
+    from backend.connection.mongodb import restaurant_keywords_collection, user_keywords_collection
+    targets = {
+        "keywords":     (restaurant_keywords_collection, ("keywords", "tail")),
+        "user_keyword": (user_keywords_collection, ("keywords",)),
+    }
+    for name, (coll, fields) in targets.items():
+        if args.collection in (name, "all"):
+            _report(name, convert_collection(coll, fields, args.dtype, args.dry_run))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Bulk restaurant seeding from Kakao Local keyword search.
+
+Two resumable phases, both checkpointed in a local SQLite file:
+
+  crawl – every query (one per line of --queries, e.g. "강남역 맛집") is
+          searched concurrently under a shared rate limiter; places are
+          staged in SQLite, deduplicated by Kakao place id and by
+          normalised name + geohash.  Finished queries are skipped on rerun.
+  write – staged places get contiguous restaurant ids and are written in
+          batches: one multi-row INSERT into MySQL, one ES bulk request, one
+          Mongo bulk_write.  Every step is idempotent, so a crash mid-batch
+          is repaired by simply rerunning.
+
+Record real responses once, then replay them without network / API key:
+
+    python -m backend.scripts.crawl_kakao --queries q.txt --record fixtures/kakao
+    python -m backend.scripts.crawl_kakao --queries q.txt --fixtures fixtures/kakao --dry-run
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from backend.services.geo_index import geohash
+from backend.services.kakao import KakaoClient, RateLimiter, normalize_keyword
+
+# ────────────────────────── configuration knobs ──────────────────────────
+CRAWL_RPS: float = float(os.getenv("CRAWL_RPS", 8))             # Kakao requests per second
+CRAWL_CONCURRENCY: int = int(os.getenv("CRAWL_CONCURRENCY", 8))  # queries in flight
+WRITE_BATCH: int = int(os.getenv("CRAWL_WRITE_BATCH", 500))
+DEDUPE_GEOHASH_PRECISION: int = 7                                # ≈ 150 m cells
+ES_INDEX: str = "full_restaurant_kor"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS queries (
+    query  TEXT PRIMARY KEY,
+    done   INTEGER NOT NULL DEFAULT 0,
+    found  INTEGER
+);
+CREATE TABLE IF NOT EXISTS places (
+    kakao_id   TEXT PRIMARY KEY,
+    dedupe_key TEXT NOT NULL UNIQUE,
+    doc        TEXT NOT NULL,
+    r_id       INTEGER UNIQUE,         -- assigned in the write phase
+    written    INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# ───────────────────────────── Fixtures ───────────────────────────────────────
+def _fixture_name(request: httpx.Request) -> str:
+    params = sorted(request.url.params.multi_items())
+    raw = f"{request.url.path}?{json.dumps(params, ensure_ascii=False)}"
+    return hashlib.sha1(raw.encode()).hexdigest() + ".json"
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serves responses previously saved by :class:`RecordTransport`."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        path = os.path.join(self.directory, _fixture_name(request))
+        if not os.path.exists(path):
+            return httpx.Response(404, json={"message": f"no fixture for {request.url}"})
+        with open(path, encoding="utf-8") as fh:
+            saved = json.load(fh)
+        return httpx.Response(saved["status"], json=saved["body"])
+
+class RecordTransport(httpx.AsyncHTTPTransport):
+    """Real HTTP, with every successful response written to *directory*."""
+
+    def __init__(self, directory: str) -> None:
+        super().__init__()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await super().handle_async_request(request)
+        body = await response.aread()
+        if response.status_code == 200:
+            with open(os.path.join(self.directory, _fixture_name(request)), "w", encoding="utf-8") as fh:
+                json.dump(
+                    {"url": str(request.url), "status": 200, "body": json.loads(body)},
+                    fh, ensure_ascii=False,
+                )
+        return httpx.Response(response.status_code, headers=response.headers, content=body)
+
+# ───────────────────────────── Dedupe helpers ─────────────────────────────────
+def dedupe_key(name: str, lat: float, lon: float) -> str:
+    return f"{normalize_keyword(name).replace(' ', '')}@{geohash(lat, lon, DEDUPE_GEOHASH_PRECISION)}"
+
+def _cuisine(category_name: Optional[str]) -> Optional[str]:
+    """Second level of Kakao's category path, e.g. 음식점 > 한식 > 해물,생선 → 한식."""
+    if not category_name:
+        return None
+    parts = [p.strip() for p in category_name.split(">")]
+    return parts[1] if len(parts) > 1 else parts[0]
+
+# ───────────────────────────── Crawl phase ────────────────────────────────────
+def _stage(conn: sqlite3.Connection, query: str, docs: Iterable[Dict[str, Any]]) -> int:
+    rows: List[Tuple[str, str, str]] = []
+    for d in docs:
+        if not d.get("id") or not d.get("x") or not d.get("y"):
+            continue
+        lat, lon = float(d["y"]), float(d["x"])
+        doc = {
+            "name":     d.get("place_name"),
+            "address":  d.get("road_address_name") or d.get("address_name"),
+            "cuisine":  _cuisine(d.get("category_name")),
+            "lat":      lat,
+            "lon":      lon,
+        }
+        rows.append((str(d["id"]), dedupe_key(doc["name"] or "", lat, lon), json.dumps(doc, ensure_ascii=False)))
+    with conn:
+        before = conn.total_changes
+        # Both the id and the name+geohash key are UNIQUE → either duplicate is dropped
+        conn.executemany("INSERT OR IGNORE INTO places (kakao_id, dedupe_key, doc) VALUES (?, ?, ?)", rows)
+        added = conn.total_changes - before
+        conn.execute("UPDATE queries SET done = 1, found = ? WHERE query = ?", (len(rows), query))
+    return added
+
+async def crawl(conn: sqlite3.Connection, client: KakaoClient, queries: List[str]) -> None:
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO queries (query) VALUES (?)", [(q,) for q in queries])
+    todo = [q for (q,) in conn.execute("SELECT query FROM queries WHERE done = 0")]
+    print(f"[crawl] {len(todo)} of {len(queries)} queries left")
+
+    sem = asyncio.Semaphore(CRAWL_CONCURRENCY)
+    stats = {"queries": 0, "new": 0, "failed": 0}
+    t0 = time.perf_counter()
+
+    async def one(query: str) -> None:
+        async with sem:
+            try:
+                docs = await client.search_places(query)
+            except Exception as exc:
+                stats["failed"] += 1
+                print(f"[crawl] {query!r} failed → {exc}")
+                return
+        # SQLite writes stay on the event-loop thread (one connection)
+        stats["new"] += _stage(conn, query, docs)
+        stats["queries"] += 1
+
+    await asyncio.gather(*(one(q) for q in todo))
+    print(f"[crawl] {stats} in {time.perf_counter() - t0:.1f}s")
+
+# ───────────────────────────── Write phase ────────────────────────────────────
+def _drop_existing(conn: sqlite3.Connection, db) -> int:
+    """Remove staged places that already exist in MySQL (same name + geohash)."""
+    from backend.connection.mysqldb import Restaurant
+
+    existing = set()
+    for name, lat, lon in db.query(Restaurant.name, Restaurant.latitude, Restaurant.longitude).yield_per(5000):
+        if name and lat is not None and lon is not None:
+            existing.add(dedupe_key(name, lat, lon))
+    stale = [
+        (kid,) for kid, key in conn.execute("SELECT kakao_id, dedupe_key FROM places WHERE r_id IS NULL")
+        if key in existing
+    ]
+    with conn:
+        conn.executemany("DELETE FROM places WHERE kakao_id = ?", stale)
+    return len(stale)
+
+def _assign_ids(conn: sqlite3.Connection, db) -> int:
+    from sqlalchemy import func
+    from backend.connection.mysqldb import Restaurant
+
+    pending = [kid for (kid,) in conn.execute("SELECT kakao_id FROM places WHERE r_id IS NULL ORDER BY rowid")]
+    if not pending:
+        return 0
+    sql_max = db.query(func.max(Restaurant.restaurant_id)).scalar() or 0
+    staged_max = conn.execute("SELECT MAX(r_id) FROM places").fetchone()[0] or 0
+    start = max(sql_max, staged_max) + 1
+    with conn:
+        conn.executemany(
+            "UPDATE places SET r_id = ? WHERE kakao_id = ?",
+            [(start + i, kid) for i, kid in enumerate(pending)],
+        )
+    return len(pending)
+
+def _write_batch(db, batch: List[Tuple[int, Dict[str, Any]]]) -> None:
+    from elasticsearch import helpers
+    from pymongo import UpdateOne
+    from sqlalchemy import insert
+    from backend.connection.elasticdb import es_client
+    from backend.connection.mongodb import restaurant_keywords_collection
+    from backend.connection.mysqldb import Restaurant
+    from backend.services.utilities import random_prime_in_range
+
+    ids = [r_id for r_id, _ in batch]
+    present = {r for (r,) in db.query(Restaurant.restaurant_id).filter(Restaurant.restaurant_id.in_(ids))}
+    rows = [
+        {
+            "restaurant_id": r_id,
+            "name":         d["name"],
+            "location":     d["address"],
+            "cuisine_type": d["cuisine"],
+            "state_id":     random_prime_in_range(),
+            "latitude":     d["lat"],
+            "longitude":    d["lon"],
+        }
+        for r_id, d in batch if r_id not in present
+    ]
+    if rows:
+        db.execute(insert(Restaurant.__table__), rows)
+        db.commit()
+
+    helpers.bulk(
+        es_client,
+        (
+            {
+                "_index": ES_INDEX,
+                "_id": r_id,
+                "_source": {
+                    "r_id": r_id,
+                    "name": d["name"],
+                    "address": d["address"],
+                    "categories": d["cuisine"],
+                    "location": {"lat": d["lat"], "lon": d["lon"]},
+                },
+            }
+            for r_id, d in batch
+        ),
+        chunk_size=WRITE_BATCH,
+    )
+    restaurant_keywords_collection.bulk_write(
+        [UpdateOne({"r_id": r_id}, {"$setOnInsert": {"r_id": r_id, "keywords": []}}, upsert=True) for r_id in ids],
+        ordered=False,
+    )
+
+def write(conn: sqlite3.Connection) -> None:
+    from backend.connection.mysqldb import SessionLocal
+
+    db = SessionLocal()
+    try:
+        dropped = _drop_existing(conn, db)
+        assigned = _assign_ids(conn, db)
+        print(f"[write] {dropped} already in MySQL, {assigned} new ids assigned")
+
+        t0, written = time.perf_counter(), 0
+        while True:
+            batch = [
+                (r_id, json.loads(doc))
+                for r_id, doc in conn.execute(
+                    "SELECT r_id, doc FROM places WHERE written = 0 ORDER BY r_id LIMIT ?", (WRITE_BATCH,)
+                )
+            ]
+            if not batch:
+                break
+            _write_batch(db, batch)
+            with conn:
+                conn.executemany("UPDATE places SET written = 1 WHERE r_id = ?", [(r,) for r, _ in batch])
+            written += len(batch)
+            print(f"[write] {written} restaurants ({written / (time.perf_counter() - t0):.0f}/s)")
+    finally:
+        db.close()
+
+# ───────────────────────────── Entry point ────────────────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--queries", required=True, help="text file, one search query per line")
+    ap.add_argument("--checkpoint", default="kakao_crawl.sqlite3")
+    ap.add_argument("--fixtures", help="replay recorded responses from this directory")
+    ap.add_argument("--record", help="record live responses into this directory")
+    ap.add_argument("--dry-run", action="store_true", help="crawl + stage only; skip MySQL/ES/Mongo")
+    args = ap.parse_args()
+
+    with open(args.queries, encoding="utf-8") as fh:
+        queries = [line.strip() for line in fh if line.strip() and not line.startswith("#")]
+
+    conn = sqlite3.connect(args.checkpoint)
+    conn.executescript(SCHEMA)
+
+    transport: Optional[httpx.AsyncBaseTransport] = None
+    if args.fixtures:
+        transport = ReplayTransport(args.fixtures)
+    elif args.record:
+        transport = RecordTransport(args.record)
+    client = KakaoClient(rate_limiter=RateLimiter(CRAWL_RPS, burst=CRAWL_CONCURRENCY), transport=transport)
+
+    async def run_crawl() -> None:
+        try:
+            await crawl(conn, client, queries)
+        finally:
+            await client.aclose()
+
+    asyncio.run(run_crawl())
+    staged = conn.execute("SELECT COUNT(*), SUM(written) FROM places").fetchone()
+    print(f"[stage] {staged[0]} unique places staged, {staged[1] or 0} written")
+    if not args.dry_run:
+        write(conn)
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Add a ``name.suggest`` completion sub-field to ``full_restaurant_kor`` and
+populate it in place.  Used by /autocomplete_restaurant while the in-process
+name index (services/name_index.py) is still loading.
+
+    python -m backend.scripts.elastic.add_name_completion
+"""
+from backend.connection.elasticdb import es_client as es
+
+INDEX = "full_restaurant_kor"
+
+def main() -> None:
+    mapping = es.indices.get_mapping(index=INDEX)[INDEX]["mappings"]
+    name_field = dict(mapping["properties"]["name"])
+    fields = dict(name_field.get("fields", {}))
+    if "suggest" in fields:
+        print("[SKIP] name.suggest already mapped")
+        return
+
+    # Multi-fields may be added to an existing field as long as the parent
+    # definition is repeated unchanged.
+    fields["suggest"] = {"type": "completion", "analyzer": "standard"}
+    name_field["fields"] = fields
+    es.indices.put_mapping(index=INDEX, properties={"name": name_field})
+
+    # Re-index every document onto itself so the new sub-field is filled
+    resp = es.update_by_query(index=INDEX, conflicts="proceed", wait_for_completion=True, refresh=True)
+    print(f"[OK] name.suggest populated → {resp.get('updated', 0)} docs")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Streaming bulk loader shared by the Elasticsearch scripts.
+
+* sources are generators over server-side cursors (MySQL via SQLAlchemy,
+  SQLite via ``fetchmany``, CSV via ``DictReader``) – nothing is collected
+  in memory;
+* documents go through ``helpers.parallel_bulk`` with tuned chunk sizes;
+* during a load the target index runs with ``refresh_interval=-1`` and
+  zero replicas, both restored (and the index refreshed) afterwards;
+* items rejected with 429 / 5xx are retried with exponential backoff;
+* throughput is reported while loading;
+* :func:`rebuild_with_alias` fills a fresh timestamped index and swaps the
+  alias atomically, so readers never see a half-built index.
+
+CLI:
+    python -m backend.scripts.elastic.bulk_loader restaurants --source mysql
+    python -m backend.scripts.elastic.bulk_loader restaurants --source sqlite:clean_copy.sqlite
+    python -m backend.scripts.elastic.bulk_loader restaurants --source csv:info.csv
+    python -m backend.scripts.elastic.bulk_loader reviews
+"""
+import argparse
+import contextlib
+import csv
+import os
+import sqlite3
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from elasticsearch import Elasticsearch, helpers
+
+# ────────────────────────── configuration knobs ──────────────────────────
+BULK_THREADS: int = int(os.getenv("ES_BULK_THREADS", 4))
+BULK_CHUNK_DOCS: int = int(os.getenv("ES_BULK_CHUNK_DOCS", 1000))
+BULK_CHUNK_BYTES: int = int(os.getenv("ES_BULK_CHUNK_BYTES", 10 * 1024 * 1024))
+BULK_MAX_RETRIES: int = int(os.getenv("ES_BULK_MAX_RETRIES", 5))
+BULK_BACKOFF_S: float = float(os.getenv("ES_BULK_BACKOFF_S", 1.0))
+REPORT_EVERY_S: float = 5.0
+SOURCE_BATCH: int = 5000
+
+RETRYABLE = {429, 502, 503, 504}
+
+# ───────────────────────────── Sources ────────────────────────────────────────
+def sql_rows(sql: str, params: Optional[Dict[str, Any]] = None, engine=None) -> Iterator[Dict[str, Any]]:
+    """Rows of *sql* from MySQL through a server-side (streaming) cursor."""
+    from sqlalchemy import text
+
+    if engine is None:
+        from backend.connection.mysqldb import engine
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=SOURCE_BATCH).execute(text(sql), params or {})
+        for partition in result.mappings().partitions():
+            for row in partition:
+                yield dict(row)
+
+def sqlite_rows(path: str, sql: str, params: Tuple = ()) -> Iterator[Dict[str, Any]]:
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.execute(sql, params)
+        while rows := cursor.fetchmany(SOURCE_BATCH):
+            for row in rows:
+                yield dict(row)
+    finally:
+        conn.close()
+
+def csv_rows(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8") as fh:
+        yield from csv.DictReader(fh)
+
+def index_actions(
+    rows: Iterable[Dict[str, Any]],
+    index: str,
+    transform: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+    id_field: str,
+) -> Iterator[Dict[str, Any]]:
+    """Bulk ``index`` actions; *transform* may return None to skip a row."""
+    for row in rows:
+        doc = transform(row)
+        if doc is not None:
+            yield {"_op_type": "index", "_index": index, "_id": doc[id_field], "_source": doc}
+
+# ───────────────────────────── Index settings ─────────────────────────────────
+@contextlib.contextmanager
+def bulk_load_settings(es: Elasticsearch, index: str):
+    """No refreshes, no replicas while loading; previous values restored after."""
+    current = es.indices.get_settings(index=index, flat_settings=True)[index]["settings"]
+    refresh = current.get("index.refresh_interval", "1s")
+    replicas = current.get("index.number_of_replicas", "1")
+    es.indices.put_settings(index=index, settings={"index": {"refresh_interval": "-1", "number_of_replicas": 0}})
+    try:
+        yield
+    finally:
+        es.indices.put_settings(index=index, settings={"index": {"refresh_interval": refresh, "number_of_replicas": replicas}})
+        es.indices.refresh(index=index)
+
+# ───────────────────────────── Loader ─────────────────────────────────────────
+class LoadStats:
+    def __init__(self) -> None:
+        self.ok = self.failed = self.retried = 0
+        self.t0 = self._last = time.perf_counter()
+
+    def tick(self) -> None:
+        now = time.perf_counter()
+        if now - self._last >= REPORT_EVERY_S:
+            self._last = now
+            print(f"[bulk] {self.ok:>10,d} docs  {self.ok / (now - self.t0):8.0f} docs/s  "
+                  f"retried={self.retried} failed={self.failed}")
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.t0
+        return {"ok": self.ok, "failed": self.failed, "retried": self.retried,
+                "seconds": round(elapsed, 1), "docs_per_s": round(self.ok / elapsed, 1) if elapsed else 0.0}
+
+def _item_key(item: Dict[str, Any]) -> Tuple[str, str]:
+    info = next(iter(item.values()))
+    return info.get("_index", ""), str(info.get("_id"))
+
+def load(
+    es: Elasticsearch,
+    actions: Iterable[Dict[str, Any]],
+    *,
+    threads: int = BULK_THREADS,
+    chunk_size: int = BULK_CHUNK_DOCS,
+    max_chunk_bytes: int = BULK_CHUNK_BYTES,
+    max_retries: int = BULK_MAX_RETRIES,
+) -> Dict[str, Any]:
+    """
+    Stream *actions* through ``parallel_bulk``.  Only in-flight actions are
+    remembered, so rejected ones can be resent without keeping the whole
+    load in memory.
+    """
+    stats = LoadStats()
+    in_flight: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def remember(stream: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for action in stream:
+            in_flight[(action["_index"], str(action["_id"]))] = action
+            yield action
+
+    def run(stream: Iterable[Dict[str, Any]], n_threads: int) -> List[Dict[str, Any]]:
+        rejected: List[Dict[str, Any]] = []
+        for ok, item in helpers.parallel_bulk(
+            es, remember(stream),
+            thread_count=n_threads,
+            chunk_size=chunk_size,
+            max_chunk_bytes=max_chunk_bytes,
+            raise_on_error=False,
+            raise_on_exception=False,
+        ):
+            action = in_flight.pop(_item_key(item), None)
+            status = next(iter(item.values())).get("status", 0)
+            if ok:
+                stats.ok += 1
+            elif status in RETRYABLE and action is not None:
+                rejected.append(action)
+            else:
+                stats.failed += 1
+                if stats.failed <= 10:
+                    print(f"[bulk] failed: {item}")
+            stats.tick()
+        return rejected
+
+    rejected = run(actions, threads)
+    for attempt in range(max_retries):
+        if not rejected:
+            break
+        delay = BULK_BACKOFF_S * 2 ** attempt
+        print(f"[bulk] {len(rejected)} rejected, retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+        time.sleep(delay)
+        stats.retried += len(rejected)
+        # Retries go single-threaded: the cluster just said it is overloaded
+        rejected = run(rejected, 1)
+    stats.failed += len(rejected)
+
+    summary = stats.summary()
+    print(f"[bulk] done → {summary}")
+    return summary
+
+# ───────────────────────────── Alias rebuild ──────────────────────────────────
+def _body_from_existing(es: Elasticsearch, name: str) -> Optional[Dict[str, Any]]:
+    """Mappings + analysis settings of the index currently behind *name*."""
+    if not es.indices.exists(index=name):
+        return None
+    concrete, info = next(iter(es.indices.get(index=name).items()))
+    analysis = info["settings"]["index"].get("analysis")
+    return {
+        "mappings": info["mappings"],
+        "settings": {"analysis": analysis} if analysis else {},
+    }
+
+def rebuild_with_alias(
+    es: Elasticsearch,
+    alias: str,
+    actions_for: Callable[[str], Iterable[Dict[str, Any]]],
+    body: Optional[Dict[str, Any]] = None,
+    delete_old: bool = False,
+) -> str:
+    """
+    Build ``<alias>_<timestamp>`` from ``actions_for(new_index)`` and point
+    *alias* at it in one ``update_aliases`` call.  Without *body* the new
+    index copies mappings/analysis from whatever *alias* resolves to now.
+    A concrete index that still carries the alias name is replaced
+    (``remove_index``) in the same atomic step.
+    """
+    body = body or _body_from_existing(es, alias) or {}
+    new_index = f"{alias}_{time.strftime('%Y%m%d%H%M%S')}"
+    es.indices.create(index=new_index, mappings=body.get("mappings"), settings=body.get("settings"))
+    print(f"[OK] created {new_index}")
+
+    with bulk_load_settings(es, new_index):
+        load(es, actions_for(new_index))
+
+    ops: List[Dict[str, Any]] = []
+    old_indices: List[str] = []
+    if es.indices.exists_alias(name=alias):
+        old_indices = list(es.indices.get_alias(name=alias).keys())
+        ops += [{"remove": {"index": old, "alias": alias}} for old in old_indices]
+    elif es.indices.exists(index=alias):
+        ops.append({"remove_index": {"index": alias}})
+    ops.append({"add": {"index": new_index, "alias": alias}})
+    es.indices.update_aliases(actions=ops)
+    print(f"[OK] alias {alias} → {new_index}")
+
+    if delete_old:
+        for old in old_indices:
+            es.indices.delete(index=old)
+            print(f"[OK] deleted {old}")
+    return new_index
+
+# ───────────────────────────── Datasets ───────────────────────────────────────
+RESTAURANT_SQL = (
+    "SELECT restaurant_id AS r_id, name, location AS address, cuisine_type AS categories, "
+    "latitude AS lat, longitude AS lon FROM Restaurant ORDER BY restaurant_id"
+)
+RESTAURANT_SQLITE_SQL = "SELECT r_id, name, type AS categories, lat, lon FROM restaurants"
+
+REVIEW_SQL = """
+SELECT r.review_id, r.user_id, r.restaurant_id, p.nickname, r.comments, r.review,
+       r.photo_filenames, r.created_at
+FROM Review r
+LEFT JOIN People p ON p.user_id = r.user_id
+ORDER BY r.review_id
+"""
+
+def restaurant_doc(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    lat, lon = row.get("lat"), row.get("lon")
+    if lat in (None, "") or lon in (None, ""):
+        return None
+    return {
+        "r_id": int(row["r_id"]),
+        "name": row["name"],
+        "address": row.get("address"),
+        "categories": row.get("categories") or row.get("type"),
+        "location": {"lat": float(lat), "lon": float(lon)},
+    }
+
+def review_doc(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "review_id":     int(row["review_id"]),
+        "user_id":       int(row["user_id"]),
+        "restaurant_id": int(row["restaurant_id"]),
+        "nickname":      row["nickname"] or None,
+        "comments":      row["comments"] or "",
+        "review":        row["review"] or "",
+        "photo_filenames": [
+            fn.strip() for fn in (row["photo_filenames"] or "").split(",") if fn.strip()
+        ],
+        "created_at":    row["created_at"].isoformat() if row["created_at"] else None,
+    }
+
+def restaurant_rows(source: str) -> Iterator[Dict[str, Any]]:
+    kind, _, path = source.partition(":")
+    if kind == "mysql":
+        return sql_rows(RESTAURANT_SQL)
+    if kind == "sqlite":
+        return sqlite_rows(path, RESTAURANT_SQLITE_SQL)
+    if kind == "csv":
+        return csv_rows(path)
+    raise ValueError(f"Unknown source {source!r} (mysql | sqlite:<path> | csv:<path>)")
+
+def main() -> None:
+    from backend.connection.elasticdb import es_client
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("dataset", choices=["restaurants", "reviews"])
+    ap.add_argument("--source", default="mysql", help="mysql | sqlite:<path> | csv:<path> (restaurants only)")
+    ap.add_argument("--alias", help="target alias (default: full_restaurant_kor / user_review_nickname)")
+    ap.add_argument("--delete-old", action="store_true", help="drop the previous indices after the swap")
+    args = ap.parse_args()
+
+    if args.dataset == "restaurants":
+        alias = args.alias or "full_restaurant_kor"
+        actions_for = lambda idx: index_actions(restaurant_rows(args.source), idx, restaurant_doc, "r_id")
+    else:
+        alias = args.alias or "user_review_nickname"
+        actions_for = lambda idx: index_actions(sql_rows(REVIEW_SQL), idx, review_doc, "review_id")
+
+    rebuild_with_alias(es_client, alias, actions_for, delete_old=args.delete_old)
+
+if __name__ == "__main__":
+    main()
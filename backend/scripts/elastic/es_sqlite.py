@@ -1,13 +1,29 @@
-import sqlite3
-from elasticsearch import Elasticsearch, helpers
-import os
-from dotenv import load_dotenv
-import json
-
-# Load environment variables
-load_dotenv()
-print(os.getcwd())
-
+"""
+Rebuild the restaurant index from the cleaned SQLite copy.
+
+    python -m backend.scripts.elastic.es_sqlite [path/to/clean_copy.sqlite]
+"""
+import sys
+from typing import Any, Dict, Optional
+
+from backend.connection.elasticdb import es_client
+from backend.scripts.elastic.bulk_loader import index_actions, rebuild_with_alias, sqlite_rows
+
+SQLITE_PATH = sys.argv[1] if len(sys.argv) > 1 else "../routers/clean_copy.sqlite"
+ALIAS = "full_restaurant"
+
+MAPPINGS = {
+    "properties": {
+        "r_id": {"type": "integer"},
+        "id": {"type": "keyword"},
+        "name": {"type": "text"},
+        "type": {"type": "keyword"},
+        "categories": {"type": "keyword"},
+        "lat": {"type": "float"},
+        "lon": {"type": "float"},
+        "location": {"type": "geo_point"}
+    }
+}
 
 def extract_categories(type_str):
     if not type_str:
@@ -23,82 +39,27 @@ def extract_categories(type_str):
     except:
         return []
 
-
-
-# Connect to SQLite
-conn = sqlite3.connect("../routers/clean_copy.sqlite")
-cursor = conn.cursor()
-
-# Fetch all columns
-cursor.execute("SELECT r_id, id, name, type, lat, lon FROM restaurants;")
-rows = cursor.fetchall()
-
-# Format documents
-documents = []
-for row in rows:
-    r_id, rid, name, r_type, lat, lon = row
-    if lat is None or lon is None:
-        continue
-
-    categories = extract_categories(r_type)
-
-    doc = {
-        "r_id": r_id,
-        "id": rid,
-        "name": name,
-        "type": r_type,
-        "categories": categories,
-        "lat": lat,
-        "lon": lon,
-        "location": {
-            "lat": lat,
-            "lon": lon
-        }
+def to_doc(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if row["lat"] is None or row["lon"] is None:
+        return None
+    return {
+        "r_id": row["r_id"],
+        "id": row["id"],
+        "name": row["name"],
+        "type": row["type"],
+        "categories": extract_categories(row["type"]),
+        "lat": row["lat"],
+        "lon": row["lon"],
+        "location": {"lat": row["lat"], "lon": row["lon"]},
     }
-    documents.append(doc)
-
-# Connect to Elasticsearch
-es = Elasticsearch(
-    "https://2ae07f7bf36d47cc9da14549c264281b.us-central1.gcp.cloud.es.io:443",
-    api_key=(os.getenv("API_KEY_ID"), os.getenv("API_KEY"))
-)
-
-
-# Define the mapping you need
-mappings = {
-    "mappings": {
-        "properties": {
-            "r_id": {"type": "integer"},
-            "id": {"type": "keyword"},
-            "name": {"type": "text"},
-            "type": {"type": "keyword"},
-            "categories": {"type": "keyword"},
-            "lat": {"type": "float"},
-            "lon": {"type": "float"},
-            "location": {"type": "geo_point"}
-        }
-    }
-}
-
-index_name = "full_restaurant"
-
-# Delete existing index to avoid type conflicts
-if es.indices.exists(index=index_name):
-    es.indices.delete(index=index_name)
-
-# Create new index with exact mapping
-es.indices.create(index=index_name, body=mappings)
-
-# Upload documents with r_id as unique _id
-actions = [
-    {
-        "_index": index_name,
-        "_id": doc["r_id"],
-        "_source": doc
-    }
-    for doc in documents
-]
-
-helpers.bulk(es, actions)
 
-print(f"Uploaded {len(documents)} documents to Elasticsearch index '{index_name}' with your exact mapping.")
+if __name__ == "__main__":
+    rebuild_with_alias(
+        es_client,
+        ALIAS,
+        lambda index: index_actions(
+            sqlite_rows(SQLITE_PATH, "SELECT r_id, id, name, type, lat, lon FROM restaurants"),
+            index, to_doc, "r_id",
+        ),
+        body={"mappings": MAPPINGS},
+    )
@@ -1,50 +1,35 @@
-import csv
-from elasticsearch import Elasticsearch
-import os
-import sys
-
-sys.stdout.reconfigure(encoding='utf-8')
-from dotenv import load_dotenv
-import os
+"""
+Load the Kakao CSV export (r_id, id, name, type, lat, lon) into the
+``restaurant`` index.  Streams the file through the shared bulk loader;
+re-running simply overwrites documents with the same r_id.
 
-load_dotenv()
+    python -m backend.scripts.elastic.import_restaurants [path/to/info.csv]
+"""
+import sys
+from typing import Any, Dict
 
-client = Elasticsearch(
-    "https://2ae07f7bf36d47cc9da14549c264281b.us-central1.gcp.cloud.es.io:443",
-    api_key=os.getenv("API_KEY")
-)
+from backend.connection.elasticdb import es_client
+from backend.scripts.elastic.bulk_loader import bulk_load_settings, csv_rows, index_actions, load
 
+sys.stdout.reconfigure(encoding='utf-8')
 
+CSV_PATH = sys.argv[1] if len(sys.argv) > 1 else "MangoBerry/backend/info.csv"
 index_name = "restaurant"
-print("current working directory", os.getcwd())
-
-# Read CSV and insert each row into Elasticsearch
-with open("MangoBerry/backend/info.csv", newline='', encoding="utf-8") as csvfile:
-    reader = csv.DictReader(csvfile)
-    for row in reader:
-        try:
-            doc = {
-                "r_id": int(row["r_id"]),
-                "id": row["id"],
-                "name": row["name"],
-                "type": row["type"].split(">")[1].strip() if ">" in row["type"] else row["type"],
-                "lat": float(row["lat"]),
-                "lon": float(row["lon"]),
-                "location": {
-                    "lat": float(row["lat"]),
-                    "lon": float(row["lon"])
-                }
-            }
-            # response = client.index(index=index_name, id=row["r_id"], document=doc)
-            # print(f"Inserted: {row['name']} | ID: {response['_id']}")
-
-            doc_id = row["r_id"]
-
-            if not client.exists(index=index_name, id=doc_id):
-                response = client.index(index=index_name, id=doc_id, document=doc)
-                print(f"Inserted: {row['name']} | ID: {doc_id}")
-            else:
-                print(f"Skipped duplicate: {row['name']} | ID: {doc_id}")
 
-        except Exception as e:
-            print(f"Failed to insert row: {row} — {e}")
\ No newline at end of file
+def to_doc(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "r_id": int(row["r_id"]),
+        "id": row["id"],
+        "name": row["name"],
+        "type": row["type"].split(">")[1].strip() if ">" in row["type"] else row["type"],
+        "lat": float(row["lat"]),
+        "lon": float(row["lon"]),
+        "location": {
+            "lat": float(row["lat"]),
+            "lon": float(row["lon"])
+        }
+    }
+
+if __name__ == "__main__":
+    with bulk_load_settings(es_client, index_name):
+        load(es_client, index_actions(csv_rows(CSV_PATH), index_name, to_doc, "r_id"))
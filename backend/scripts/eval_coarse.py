@@ -0,0 +1,119 @@
+"""
+Rank agreement of the truncated-dimension first pass (SCORE_COARSE, see
+services/calc_score.py) with the full-dimension scorer.
+
+For every sampled user, all sampled restaurants are scored with full
+vectors and with each (dimension, band) setting; reported per setting,
+averaged over users: Spearman ρ of the two rankings, top-K overlap,
+mean |Δscore|, the share of keyword pairs refined on full vectors, and
+scoring time.
+
+    python -m backend.scripts.eval_coarse --users 50 --restaurants 300
+
+Without Mongo (random synthetic vectors carry no Matryoshka structure,
+so agreement there is a pessimistic floor):
+
+    python -m backend.scripts.eval_coarse --synthetic
+"""
+import argparse
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from backend.scripts.calibrate_int8 import mongo_sample, synthetic_sample
+from backend.services.calc_score import (
+    THRESHOLD,
+    KeywordMatrix,
+    _greedy_score,
+    build_keyword_matrix,
+    coarse_similarity_matrix,
+    score_matrices,
+)
+
+# ───── configuration knobs ─────
+DIMS = (64, 128, 256, 512)
+BANDS = (0.0, 0.03, 0.05, 0.10)
+TOP_K = 10
+
+def _ranks(x: np.ndarray) -> np.ndarray:
+    """Average ranks, ties shared (as Spearman expects)."""
+    order = np.argsort(x, kind="mergesort")
+    ranks = np.empty(len(x), dtype=np.float64)
+    ranks[order] = np.arange(len(x), dtype=np.float64)
+    _, inverse, counts = np.unique(x, return_inverse=True, return_counts=True)
+    sums = np.bincount(inverse, weights=ranks)
+    return sums[inverse] / counts[inverse]
+
+def spearman(a: np.ndarray, b: np.ndarray) -> float:
+    ra, rb = _ranks(a), _ranks(b)
+    if ra.std() == 0 or rb.std() == 0:
+        return 1.0 if np.array_equal(ra, rb) else 0.0
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+def top_overlap(a: np.ndarray, b: np.ndarray, k: int = TOP_K) -> float:
+    k = min(k, len(a))
+    return len(set(np.argsort(-a, kind="mergesort")[:k]) & set(np.argsort(-b, kind="mergesort")[:k])) / k if k else 1.0
+
+def _coarse_scores(u: KeywordMatrix, rests: List[KeywordMatrix], dim: int, band: float) -> Tuple[np.ndarray, int, int]:
+    out = np.zeros(len(rests))
+    refined = total = 0
+    for j, r in enumerate(rests):
+        if not len(u) or not len(r):
+            continue
+        sim, n = coarse_similarity_matrix(u, r, threshold=THRESHOLD, dim=dim, band=band)
+        refined += n
+        total += sim.size
+        out[j] = _greedy_score(sim, u, r, THRESHOLD)
+    return out, refined, total
+
+def evaluate(users: List[KeywordMatrix], rests: List[KeywordMatrix]) -> List[Dict[str, float]]:
+    t0 = time.perf_counter()
+    full = [np.array([score_matrices(u, r) for r in rests]) for u in users]
+    t_full = time.perf_counter() - t0
+
+    rows = []
+    for dim in DIMS:
+        for r in rests:                       # build the copies outside the timing
+            r.coarse(dim)
+        for u in users:
+            u.coarse(dim)
+        for band in BANDS:
+            rho, overlap, diff = [], [], []
+            refined = total = 0
+            t0 = time.perf_counter()
+            for u, ref in zip(users, full):
+                got, n_ref, n_tot = _coarse_scores(u, rests, dim, band)
+                refined += n_ref
+                total += n_tot
+                rho.append(spearman(ref, got))
+                overlap.append(top_overlap(ref, got))
+                diff.append(float(np.abs(ref - got).mean()))
+            rows.append({
+                "dim": dim, "band": band,
+                "spearman": float(np.mean(rho)), "top_k": float(np.mean(overlap)),
+                "mean_abs": float(np.mean(diff)),
+                "refined": refined / max(total, 1),
+                "speedup": t_full / max(time.perf_counter() - t0, 1e-9),
+            })
+    return rows
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--restaurants", type=int, default=200)
+    parser.add_argument("--synthetic", action="store_true", help="generated profiles, no Mongo")
+    args = parser.parse_args()
+
+    sample = synthetic_sample if args.synthetic else mongo_sample
+    users_raw, rests_raw = sample(args.users, args.restaurants)
+    users = [build_keyword_matrix(u) for u in users_raw]
+    rests = [build_keyword_matrix(r) for r in rests_raw]
+
+    print(f"{'dim':>5} {'band':>5} {'spearman':>9} {'top' + str(TOP_K):>6} {'|Δ|':>7} {'refined':>8} {'speed':>6}")
+    for row in evaluate(users, rests):
+        print(f"{row['dim']:>5} {row['band']:>5.2f} {row['spearman']:>9.4f} {row['top_k']:>6.2f} "
+              f"{row['mean_abs']:>7.3f} {row['refined']:>8.2%} {row['speedup']:>5.1f}×")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Repair drift in the maintained counters (see services/counters.py) from the
+sources of truth: review counts / first review from MySQL, follower and
+keyword counts via Mongo aggregation pipelines, then copy follow counts back
+into the legacy Users columns and correct restaurant cards built from
+counters that were not backfilled yet.
+
+Until a user is backfilled, reads fall back to those SQL columns and
+follow/unfollow seeds the counters from them, so the first run is not a
+deploy blocker.  Run it once after deploying, then periodically (e.g.
+hourly cron):
+
+    python -m backend.scripts.reconcile_counters
+"""
+from backend.connection.mysqldb import get_db
+from backend.services.counters import reconcile_all
+
+def main() -> None:
+    db_gen = get_db()
+    db = next(db_gen)
+    try:
+        stats = reconcile_all(db)
+        print(f"[OK] counters reconciled → {stats}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
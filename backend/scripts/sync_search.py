@@ -0,0 +1,70 @@
+"""
+Incremental MySQL/Mongo → Elasticsearch sync (see services/search_sync.py).
+
+Picks up new reviews / restaurants by id high-water mark and replays the
+router-written change outbox, in bulk batches, so the search indices stay
+current without full rebuilds (reindexing.py / elastic/bulk_loader.py are
+still the tools for those).  The first pass only records the current
+MAX(review_id) / MAX(restaurant_id): rows that exist before the worker
+starts come from the bulk loader, not from here.
+
+Continuously, a pass every SYNC_INTERVAL_S seconds:
+
+    python -m backend.scripts.sync_search
+
+Or a single pass from cron:
+
+    python -m backend.scripts.sync_search --once
+"""
+import argparse
+import logging
+import os
+import time
+
+from backend.connection.mysqldb import get_db
+from backend.services.search_sync import prune_outbox, sync_once
+
+# ───── configuration knobs ─────
+SYNC_INTERVAL_S = float(os.getenv("SYNC_INTERVAL_S", 5))
+SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE", 1000))
+SYNC_OUTBOX_KEEP_S = float(os.getenv("SYNC_OUTBOX_KEEP_S", 7 * 86400))
+PRUNE_EVERY_S = 3600
+
+def run_pass(batch_size: int) -> dict:
+    db_gen = get_db()
+    db = next(db_gen)
+    try:
+        return sync_once(db, batch_size=batch_size)
+    finally:
+        db.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit (cron mode)")
+    parser.add_argument("--interval", type=float, default=SYNC_INTERVAL_S, help="seconds between passes")
+    parser.add_argument("--batch-size", type=int, default=SYNC_BATCH_SIZE)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.once:
+        stats = run_pass(args.batch_size)
+        print(f"[OK] search sync → {stats}, pruned {prune_outbox(SYNC_OUTBOX_KEEP_S)} outbox entries")
+        return
+
+    last_prune = 0.0
+    while True:
+        started = time.monotonic()
+        try:
+            stats = run_pass(args.batch_size)
+            if any(stats.values()):
+                logging.info("search sync → %s", stats)
+            if started - last_prune >= PRUNE_EVERY_S:
+                logging.info("pruned %d outbox entries", prune_outbox(SYNC_OUTBOX_KEEP_S))
+                last_prune = started
+        except Exception:
+            # Marks were not advanced; the next pass retries the same batch
+            logging.exception("search sync pass failed")
+        time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Cluster every keyword string in the corpus into global taste concepts
+(see services/concepts.py): spherical mini-batch k-means over the user and
+restaurant keyword embeddings, then one nearest-centroid assignment per
+string, stored as a new version and switched in atomically.  Workers pick
+the new version up on restart (load_concept_index).
+
+    python -m backend.scripts.train_concepts --k 1024
+    python -m backend.scripts.train_concepts --dry-run --report
+
+`--report` compares concept-space scores (SCORE_CONCEPTS) with the exact
+`_score_pair` on sampled pairs: per-user Spearman ρ and top-K overlap,
+Pearson r, mean |Δscore|, time per pair, and how well "same concept"
+reproduces "cosine ≥ THRESHOLD" at the keyword level.
+
+Without Mongo, trained on and evaluated against synthetic profiles:
+
+    python -m backend.scripts.train_concepts --synthetic --report
+"""
+import argparse
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from backend.scripts.calibrate_int8 import SYN_CONCEPTS, mongo_sample, synthetic_sample
+from backend.scripts.eval_coarse import spearman, top_overlap
+from backend.services.calc_score import (
+    THRESHOLD,
+    _canonize_kw_list,
+    _score_pair,
+    concept_profile,
+    score_concepts,
+)
+from backend.services.concepts import CONCEPT_K, concept_index, minibatch_kmeans, nearest_centroid
+from backend.services.embedding_codec import decode_embedding
+
+# ───── configuration knobs ─────
+REPORT_USERS = 30
+REPORT_RESTAURANTS = 200
+PAIR_SAMPLE = 200_000             # keyword pairs for the precision / recall check
+
+Profile = List[Dict[str, Any]]
+
+# ───────────────────────────── vocabulary ─────────────────────────────────────
+def mongo_vocabulary() -> Tuple[List[str], np.ndarray]:
+    from backend.connection.mongodb import restaurant_keywords_collection, user_keywords_collection
+
+    seen: Dict[str, np.ndarray] = {}
+    for doc in user_keywords_collection.find({}, {"_id": 0, "keywords.name": 1, "keywords.embedding": 1}):
+        for kw in doc.get("keywords", []):
+            seen.setdefault(kw.get("name"), kw.get("embedding"))
+    for doc in restaurant_keywords_collection.find(
+        {}, {"_id": 0, "keywords.keyword": 1, "keywords.embedding": 1, "tail.keyword": 1, "tail.embedding": 1}
+    ):
+        for kw in doc.get("keywords", []) + doc.get("tail", []):
+            seen.setdefault(kw.get("keyword"), kw.get("embedding"))
+    return _stack(seen)
+
+def profile_vocabulary(profiles: List[Profile]) -> Tuple[List[str], np.ndarray]:
+    seen: Dict[str, Any] = {}
+    for prof in profiles:
+        for kw in prof:
+            seen.setdefault(kw.get("name") or kw.get("keyword"), kw.get("embedding"))
+    return _stack(seen)
+
+def _stack(seen: Dict[str, Any]) -> Tuple[List[str], np.ndarray]:
+    keywords, rows = [], []
+    dim = None
+    for kw, emb in seen.items():
+        vec = decode_embedding(emb)
+        if not kw or not vec.size:
+            continue
+        dim = dim or vec.size
+        if vec.size == dim:
+            keywords.append(kw)
+            rows.append(vec)
+    return keywords, np.stack(rows).astype(np.float32) if rows else np.zeros((0, 0), dtype=np.float32)
+
+# ───────────────────────────── agreement report ───────────────────────────────
+def keyword_agreement(x: np.ndarray, assignment: np.ndarray, seed: int = 0) -> Tuple[float, float]:
+    """Precision / recall of "same concept" against "cosine ≥ THRESHOLD"."""
+    rng = np.random.default_rng(seed)
+    n = min(PAIR_SAMPLE, len(x) * (len(x) - 1) // 2)
+    i, j = rng.integers(0, len(x), n), rng.integers(0, len(x), n)
+    keep = i != j
+    i, j = i[keep], j[keep]
+    unit = x / np.linalg.norm(x, axis=1, keepdims=True)
+    close = np.einsum("ij,ij->i", unit[i], unit[j]) >= THRESHOLD
+    same = assignment[i] == assignment[j]
+    both = int((close & same).sum())
+    return both / max(int(same.sum()), 1), both / max(int(close.sum()), 1)
+
+def report(users: List[Profile], rests: List[Profile]) -> Dict[str, float]:
+    u_canon = [_canonize_kw_list(u) for u in users]
+    r_canon = [_canonize_kw_list(r) for r in rests]
+    u_con = [concept_profile(u) for u in users]
+    r_con = [concept_profile(r, restaurant=True) for r in rests]
+
+    rho, overlap, diff, ref_all, got_all = [], [], [], [], []
+    t_ref = t_con = 0.0
+    for uc, ux in zip(u_canon, u_con):
+        t = time.perf_counter()
+        ref = np.array([_score_pair(uc, rc) for rc in r_canon])
+        t_ref += time.perf_counter() - t
+        t = time.perf_counter()
+        got = np.array([score_concepts(ux, rx) for rx in r_con])
+        t_con += time.perf_counter() - t
+        rho.append(spearman(ref, got))
+        overlap.append(top_overlap(ref, got))
+        diff.append(float(np.abs(ref - got).mean()))
+        ref_all.append(ref)
+        got_all.append(got)
+
+    ref_a, got_a = np.concatenate(ref_all), np.concatenate(got_all)
+    n = max(len(ref_a), 1)
+    pearson = float(np.corrcoef(ref_a, got_a)[0, 1]) if ref_a.std() and got_a.std() else 0.0
+    return {
+        "pairs": len(ref_a),
+        "spearman": float(np.mean(rho)),
+        "top_k": float(np.mean(overlap)),
+        "pearson": pearson,
+        "mean_abs": float(np.mean(diff)),
+        "ms_ref": t_ref / n * 1e3,
+        "ms_concepts": t_con / n * 1e3,
+    }
+
+# ───────────────────────────── main ───────────────────────────────────────────
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=CONCEPT_K, help="number of concepts")
+    parser.add_argument("--iters", type=int, default=None, help="mini-batch iterations")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dry-run", action="store_true", help="train and report without writing")
+    parser.add_argument("--report", action="store_true", help="compare concept scores with _score_pair")
+    parser.add_argument("--synthetic", action="store_true", help="generated profiles, no Mongo")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        users, rests = synthetic_sample(REPORT_USERS, REPORT_RESTAURANTS)
+        keywords, x = profile_vocabulary(users + rests)
+        k = min(args.k, SYN_CONCEPTS) if args.k == CONCEPT_K else args.k
+    else:
+        keywords, x = mongo_vocabulary()
+        k = args.k
+    if not keywords:
+        print("[SKIP] no keyword embeddings found")
+        return
+
+    t0 = time.perf_counter()
+    kwargs = {"iters": args.iters} if args.iters else {}
+    centroids = minibatch_kmeans(x, k, seed=args.seed, **kwargs)
+    unit = x / np.linalg.norm(x, axis=1, keepdims=True)
+    assignment = nearest_centroid(unit, centroids)
+    t_train = time.perf_counter() - t0
+
+    sizes = np.bincount(assignment, minlength=len(centroids))
+    cohesion = float(np.einsum("ij,ij->i", unit, centroids[assignment]).mean())
+    print(f"[TRAIN] {len(keywords)} keywords → {len(centroids)} concepts in {t_train:.1f}s")
+    print(f"    concept size     median {int(np.median(sizes))}  max {int(sizes.max())}  empty {int((sizes == 0).sum())}")
+    print(f"    keyword·centroid mean cosine {cohesion:.3f}")
+
+    if args.synthetic or args.dry_run:
+        concept_index.build(0, centroids, dict(zip(keywords, assignment.tolist())))
+    else:
+        from backend.services.concepts import ensure_indexes, store_concepts
+
+        ensure_indexes()
+        version = store_concepts(centroids, keywords, assignment)
+        concept_index.build(version, centroids, dict(zip(keywords, assignment.tolist())))
+        print(f"[OK] stored as version {version}")
+
+    if args.report:
+        precision, recall = keyword_agreement(unit, assignment, seed=args.seed)
+        if not args.synthetic:
+            users, rests = mongo_sample(REPORT_USERS, REPORT_RESTAURANTS)
+        s = report(users, rests)
+        print(f"[REPORT] {s['pairs']} pairs vs _score_pair")
+        print(f"    spearman ρ       {s['spearman']:.4f} (per user)   top-10 overlap {s['top_k']:.2f}")
+        print(f"    pearson r        {s['pearson']:.4f}   mean |Δ| {s['mean_abs']:.2f} points")
+        print(f"    time per pair    _score_pair {s['ms_ref']:.3f} ms, concepts {s['ms_concepts']:.4f} ms")
+        print(f"    same concept vs cos ≥ {THRESHOLD}: precision {precision:.2f}  recall {recall:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,15 @@ import sqlite3
 import os
 import sys
 import json
+from collections import Counter, defaultdict
 from pathlib import Path
 from tqdm import tqdm
 from tqdm.asyncio import tqdm_asyncio   # kept: you may still want async later
 
 from ..connection.mongodb import restaurant_keywords_collection
 from ..services.generate_embedding import embed_small
+from ..services.embedding_codec import encode_embedding
+from ..services.profile_compaction import add_keywords, history_of
 
 # ────────────────────────────────────────────────────────────────────────────────
 # CONSTANTS (unchanged)
@@ -77,108 +80,50 @@ def main() -> None:
     print(f"Loaded {len(rmap)} existing docs.")
 
     # ────────────────────────────────────────────────────────────────────────
-    # 4. 𝗠𝗲𝗿𝗴𝗲 𝗸𝗲𝘆𝘄𝗼𝗿𝗱𝘀 𝗶𝗻-𝗺𝗲𝗺𝗼𝗿𝘆 (keywords array only)
-    for row in tqdm(new_rows, desc="Merging keywords"):
-        r_id = row["r_id"]
-        kw_strings = row["keywords"]
-
-        # fetch or create a minimal schema-compliant document
-        doc = rmap.get(r_id)
-        if doc is None:
-            doc = {"r_id": r_id, "keywords": []}
-            rmap[r_id] = doc
-
-        # build index {keyword→obj} for O(1) access
-        kw_index = {item["keyword"]: item for item in doc["keywords"]}
-
-        # merge/update
-        for kw in kw_strings:
-            if kw in kw_index:
-                kw_index[kw]["frequency"] += 1
-            else:
-                kw_index[kw] = {"keyword": kw, "frequency": 1}  # embedding later
-
-        # write back flattened list
-        doc["keywords"] = list(kw_index.values())
-    
-    # ────────────────────────────────────────────────────────────────────────
-    # 4.5 𝗦𝗮𝗻𝗶𝘁𝘆 𝗰𝗵𝗲𝗰𝗸: print some merged documents
-
-    print("\nSample of merged documents:")
-    for r_id, doc in list(rmap.items())[:5]:  # show first 5 documents
-        print(f"r_id: {r_id}, keywords: {len(doc['keywords'])}")
-        for kw in doc["keywords"][:3]:  # show first 3 keywords
-            print(f"  - {kw['keyword']} (freq: {kw['frequency']})")
-            if "embedding" in kw and kw["embedding"] is not None:
-                print(f"    Embedding: {kw['embedding'][:5]}...")
-    print(f"Total documents processed: {len(rmap)}")
+    # 4. 𝗖𝗼𝘂𝗻𝘁 𝗸𝗲𝘆𝘄𝗼𝗿𝗱𝘀 per restaurant
+    counts: dict[int, Counter] = defaultdict(Counter)
+    for row in tqdm(new_rows, desc="Counting keywords"):
+        counts[row["r_id"]].update(row["keywords"])
+    print(f"Total documents processed: {len(counts)}")
 
     # ────────────────────────────────────────────────────────────────────────
-    # 5. 𝗖𝗼𝗺𝗽𝗶𝗹𝗲 𝗸𝗲𝘆𝘄𝗼𝗿𝗱𝘀 𝗻𝗲𝗲𝗱𝗶𝗻𝗴 𝗲𝗺𝗯𝗲𝗱𝗱𝗶𝗻𝗴𝘀
+    # 5. 𝗖𝗼𝗺𝗽𝗶𝗹𝗲 𝗸𝗲𝘆𝘄𝗼𝗿𝗱𝘀 𝗻𝗲𝗲𝗱𝗶𝗻𝗴 𝗲𝗺𝗯𝗲𝗱𝗱𝗶𝗻𝗴𝘀 (strings no profile has seen)
     pending = []
-    for d in rmap.values():
-        for kw_obj in d["keywords"]:
-            if "embedding" not in kw_obj or kw_obj["embedding"] is None:
-                pending.append(kw_obj["keyword"])
+    for r_id, counter in counts.items():
+        known = {h["keyword"] for h in history_of(rmap.get(r_id))}
+        pending.extend(kw for kw in counter if kw not in known)
 
     # unique while preserving order
     seen = set()
     unique_pending = [k for k in pending if not (k in seen or seen.add(k))]
     print(f"{len(unique_pending)} embeddings to generate…")
 
-    # ────────────────────────────────────────────────────────────────────────
-    # 5.5 𝗦𝗮𝗻𝗶𝘁𝘆 𝗰𝗵𝗲𝗰𝗸: print some pending keywords
-
     print("\nSample of pending keywords for embedding:")
     for kw in unique_pending[:10]:  # show first 10 keywords
         print(f"  - {kw}")
-    print(f"Total unique pending keywords: {len(unique_pending)}")
-
-    # sys.exit(0)
 
     # ────────────────────────────────────────────────────────────────────────
     # 6. 𝗚𝗲𝗻𝗲𝗿𝗮𝘁𝗲 𝗲𝗺𝗯𝗲𝗱𝗱𝗶𝗻𝗴𝘀
     BATCH_SIZE = 512
-    emb_map: dict[str, list[float]] = {}
+    emb_map: dict = {}
     for start in tqdm(range(0, len(unique_pending), BATCH_SIZE), desc="Embedding"):
         batch = unique_pending[start:start + BATCH_SIZE]
         vectors = embed_small(batch)
-        emb_map.update({kw: list(vec) for kw, vec in zip(batch, vectors)})
-
-    # attach embeddings
-    for d in rmap.values():
-        for kw_obj in d["keywords"]:
-            if "embedding" not in kw_obj or kw_obj["embedding"] is None:
-                kw_obj["embedding"] = emb_map.get(kw_obj["keyword"])
-
-    # ────────────────────────────────────────────────────────────────────────
-    # 6.5 Print some documents to be updated for sanity check
-    print("\nSample of updated documents:")
-    for r_id, doc in list(rmap.items())[:5]:  # show first 5 documents
-        print(f"r_id: {r_id}, keywords: {len(doc['keywords'])}")
-        for kw in doc["keywords"][:3]:  # show first 3 keywords
-            print(f"  - {kw['keyword']} (freq: {kw['frequency']})")
-            if kw.get("embedding"):
-                print(f"    Embedding: {kw['embedding'][:5]}...")   
+        emb_map.update({kw: encode_embedding(vec) for kw, vec in zip(batch, vectors)})
 
     # ────────────────────────────────────────────────────────────────────────
-    # 7. 𝗕𝘂𝗹𝗸-𝘂𝗽𝘀𝗲𝗿𝘁 𝗯𝗮𝗰𝗸 𝘁𝗼 MongoDB (only keywords field)
+    # 7. 𝗙𝗼𝗹𝗱 𝗶𝗻𝘁𝗼 𝘁𝗵𝗲 𝗰𝗼𝗺𝗽𝗮𝗰𝘁𝗲𝗱 𝗽𝗿𝗼𝗳𝗶𝗹𝗲𝘀 and bulk-upsert (see services/profile_compaction.py)
     print("Writing back to MongoDB…")
-    ops = [
-        UpdateOne(
-            {"r_id": d["r_id"]},
-            {"$set": {"keywords": d["keywords"]}},
-            upsert=True,
-        )
-        for d in rmap.values()
-    ]
+    ops = []
+    for r_id, counter in counts.items():
+        compacted = add_keywords(rmap.get(r_id), dict(counter), lambda kws: [emb_map[k] for k in kws])
+        ops.append(UpdateOne({"r_id": r_id}, {"$set": compacted}, upsert=True))
     if ops:
         result = restaurant_keywords_collection.bulk_write(ops, ordered=False)
         print("Bulk write complete:", result.bulk_api_result)
     else:
         print("No changes detected.")
 
-
 # ────────────────────────────────────────────────────────────────────────────────
 if __name__ == "__main__":
     main()
@@ -10,13 +10,17 @@ from sqlalchemy.orm import Session
 
 # ─────────────────────────────────── SQL / Mongo hooks ─────────────────────────
 from ..connection.mysqldb import Restaurant, Users, get_db
+from ..connection.pool_budget import per_worker
 from ..connection.mongodb import (  # type: ignore
     restaurant_keywords_collection,
     user_keywords_collection,
     user_rest_score,
     user_user_score,
 )
-from .utilities import PRIME_LOWER_CAP, PRIME_UPPER_CAP, random_prime_in_range
+from .concepts import SparseVector, concept_index, sparse_dot
+from .embedding_codec import decode_embedding, decode_embedding_int8
+from .http_cache import TTLCache
+from .utilities import PRIME_LOWER_CAP, PRIME_UPPER_CAP, available_cpus, random_prime_in_range
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +28,14 @@ logger = logging.getLogger(__name__)
 THRESHOLD: float = 0.60           # cosine ≥ THRESHOLD counts as a match
 EMBED_DIM: int = 1536             # OpenAI text‑embedding‑3‑small dimension
 LIFT_TAIL_B: int = 15             # 1 disables logarithmic skew
-print(f"DEBUG: USING CONFIG:\nTHRESHOLD = {THRESHOLD}\nEMBED_DIM = {EMBED_DIM}\nLIFT_TAIL_B = {LIFT_TAIL_B}")
+SCORE_INT8: bool = os.getenv("SCORE_INT8", "0") == "1"   # batch scoring on int8 profiles
+SCORE_COARSE: bool = os.getenv("SCORE_COARSE", "0") == "1"   # truncated first pass
+COARSE_DIM: int = int(os.getenv("SCORE_COARSE_DIM", 256))
+COARSE_BAND: float = float(os.getenv("SCORE_COARSE_BAND", 0.05))   # refine |cos − THRESHOLD| < band
+SCORE_CONCEPTS: bool = os.getenv("SCORE_CONCEPTS", "0") == "1"     # sparse concept-space scoring
+# Restaurant KeywordMatrix profiles kept per worker, keyed by state_id (0 disables)
+PROFILE_CACHE_ENTRIES: int = int(os.getenv("PROFILE_CACHE_ENTRIES", 4096))
+PROFILE_CACHE_TTL_S: float = float(os.getenv("PROFILE_CACHE_TTL_S", 600))   # bounds staleness of script writes
 
 def relu(x: float) -> float:
     """Rectified linear unit (ReLU) activation function."""
@@ -57,8 +68,7 @@ def _canon_frequency(rec: Dict[str, Any]) -> int:  # floor at 1
     return max(v, 1)
 
 def _canon_embedding(rec: Dict[str, Any]) -> np.ndarray:
-    emb = rec.get("embedding", [])
-    return np.asarray(emb, dtype=np.float32)
+    return decode_embedding(rec.get("embedding"))
 
 def _canonize_kw_list(records: Optional[Iterable[Dict[str, Any]]]) -> List[Dict[str, Any]]:
     if not records:
@@ -158,6 +168,249 @@ def _score_pair(
     score_fraction = skew_score(score_fraction)
     return float(np.clip(score_fraction * 100.0, 0.0, 100.0))
 
+# ───────────────────────────── Vectorised scoring ─────────────────────────────
+# float32 sums of integer products stay exact below 2**24; by Cauchy–Schwarz
+# every partial sum of q_u·q_r is bounded by ‖q_u‖·‖q_r‖.
+_F32_EXACT_INT = float(1 << 24)
+
+class KeywordMatrix:
+    """
+    A keyword profile as arrays, one row per keyword with a full-size
+    embedding – the form ``score_matrices`` works on.
+
+    ``vectors`` is float32, or int8 with per-row ``scales`` (``vec ≈ q ·
+    scale``) when built with ``int8=True``: a quarter of the memory.
+    ``norms`` are of the stored rows, so cosines need no dequantisation.
+    """
+
+    __slots__ = ("tokens", "token_ids", "signs", "freqs", "vectors", "scales", "norms", "_coarse")
+
+    def __init__(
+        self,
+        tokens: List[str],
+        signs: np.ndarray,
+        freqs: np.ndarray,
+        vectors: np.ndarray,
+        scales: Optional[np.ndarray] = None,
+    ) -> None:
+        self.tokens = tokens
+        ids: Dict[str, int] = {}
+        self.token_ids = np.array([ids.setdefault(t, len(ids)) for t in tokens], dtype=np.int64)
+        self.signs = signs
+        self.freqs = freqs
+        self.vectors = vectors
+        self.scales = scales
+        if vectors.dtype == np.int8:
+            sq = np.einsum("ij,ij->i", vectors, vectors, dtype=np.int64)
+            self.norms = np.sqrt(sq.astype(np.float64))
+        else:
+            self.norms = np.linalg.norm(vectors, axis=1).astype(np.float64)
+        self._coarse: Dict[int, np.ndarray] = {}
+
+    def coarse(self, dim: int = COARSE_DIM) -> np.ndarray:
+        """
+        Leading *dim* components, renormalised (text-embedding-3 vectors
+        are trained to survive truncation); int8 scales cancel out here.
+        Built on first use and kept.
+        """
+        out = self._coarse.get(dim)
+        if out is None:
+            out = self.vectors[:, :dim].astype(np.float32)
+            norms = np.linalg.norm(out, axis=1, keepdims=True)
+            out /= np.where(norms > 0, norms, 1.0)
+            self._coarse[dim] = out
+        return out
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.vectors.nbytes
+            + (self.scales.nbytes if self.scales is not None else 0)
+            + sum(c.nbytes for c in self._coarse.values())
+        )
+
+def build_keyword_matrix(records: Optional[Iterable[Dict[str, Any]]], *, int8: bool = False) -> KeywordMatrix:
+    """Raw Mongo keyword records → :class:`KeywordMatrix` (wrong-size embeddings dropped)."""
+    tokens: List[str] = []
+    signs: List[int] = []
+    freqs: List[int] = []
+    rows: List[np.ndarray] = []
+    scales: List[float] = []
+    for rec in records or []:
+        try:
+            token = _canon_token(rec)
+            if int8:
+                vec, scale = decode_embedding_int8(rec.get("embedding"))
+            else:
+                vec, scale = _canon_embedding(rec), 1.0
+        except Exception as exc:
+            logger.debug("Skipping malformed keyword %r (%s)", rec, exc)
+            continue
+        if vec.size != EMBED_DIM:
+            continue
+        tokens.append(token)
+        signs.append(1 if _canon_sentiment(rec) == "positive" else -1)
+        freqs.append(_canon_frequency(rec))
+        rows.append(vec)
+        scales.append(scale)
+
+    dtype = np.int8 if int8 else np.float32
+    vectors = np.stack(rows) if rows else np.zeros((0, EMBED_DIM), dtype=dtype)
+    return KeywordMatrix(
+        tokens,
+        np.asarray(signs, dtype=np.float64),
+        np.asarray(freqs, dtype=np.float64),
+        vectors,
+        np.asarray(scales, dtype=np.float32) if int8 else None,
+    )
+
+# Vectorised modes keep built restaurant profiles: int8 ones hold a quarter
+# of the float32 memory and, once stored as int8 (EMBED_STORE_DTYPE /
+# convert_embeddings --dtype int8), are never re-quantised.  The key
+# carries the restaurant state_id, which every keyword write through the
+# routers renews (after the Mongo write); the TTL covers scripts that write
+# keyword documents directly.
+_matrix_cache = TTLCache(ttl_s=PROFILE_CACHE_TTL_S, max_entries=max(PROFILE_CACHE_ENTRIES, 1))
+
+def restaurant_matrices(r_ids: List[int], *, int8: bool, db: Session) -> Dict[int, KeywordMatrix]:
+    """KeywordMatrix per restaurant, from the cache where its state_id still matches."""
+    states: Dict[int, Optional[int]] = {}
+    if PROFILE_CACHE_ENTRIES > 0:
+        states = dict(
+            db.query(Restaurant.restaurant_id, Restaurant.state_id)
+            .filter(Restaurant.restaurant_id.in_(r_ids)).all()
+        )
+    key = lambda r: f"{r}:{states[r]}:{'i8' if int8 else 'f32'}"
+
+    out: Dict[int, KeywordMatrix] = {}
+    missing: List[int] = []
+    for r in r_ids:
+        hit = _matrix_cache.get(key(r)) if states.get(r) is not None else None
+        if hit is None:
+            missing.append(r)
+        else:
+            out[r] = hit
+    if missing:
+        cursor = restaurant_keywords_collection.find({"r_id": {"$in": missing}}, {"_id": 0, "r_id": 1, "keywords": 1})
+        for doc in cursor:
+            r = doc["r_id"]
+            out[r] = build_keyword_matrix(doc.get("keywords", []), int8=int8)
+            if states.get(r) is not None:
+                _matrix_cache.set(key(r), out[r])
+    return out
+
+def similarity_matrix(u: KeywordMatrix, r: KeywordMatrix) -> np.ndarray:
+    """Cosine of every (user keyword, restaurant keyword) pair."""
+    if u.vectors.dtype == np.int8:
+        if u.norms.max(initial=0.0) * r.norms.max(initial=0.0) < _F32_EXACT_INT:
+            # BLAS on float32 – every product and partial sum is an exact
+            # integer, i.e. the int32 accumulation result
+            dots = u.vectors.astype(np.float32) @ r.vectors.astype(np.float32).T
+        else:
+            dots = np.matmul(u.vectors.astype(np.int32), r.vectors.astype(np.int32).T)
+    else:
+        dots = u.vectors @ r.vectors.T
+    denom = np.outer(np.where(u.norms > 0, u.norms, 1.0), np.where(r.norms > 0, r.norms, 1.0))
+    return dots / denom
+
+def _pair_cosines(u: KeywordMatrix, r: KeywordMatrix, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """Full-dimension cosine for selected (row, col) pairs only."""
+    a = u.vectors[rows].astype(np.float32)
+    b = r.vectors[cols].astype(np.float32)
+    dots = np.einsum("ij,ij->i", a, b, dtype=np.float64)
+    un, rn = u.norms[rows], r.norms[cols]
+    return dots / (np.where(un > 0, un, 1.0) * np.where(rn > 0, rn, 1.0))
+
+def coarse_similarity_matrix(
+    u: KeywordMatrix,
+    r: KeywordMatrix,
+    *,
+    threshold: float = THRESHOLD,
+    dim: int = COARSE_DIM,
+    band: float = COARSE_BAND,
+) -> Tuple[np.ndarray, int]:
+    """
+    Cosines from the *dim*-component copies; pairs whose coarse cosine is
+    within *band* of *threshold* – the only ones whose side of the cut is
+    in doubt – are recomputed on the full vectors.  Returns the matrix and
+    the number of refined pairs.
+    """
+    sim = (u.coarse(dim) @ r.coarse(dim).T).astype(np.float64)
+    rows, cols = np.nonzero(np.abs(sim - threshold) < band)
+    if rows.size:
+        sim[rows, cols] = _pair_cosines(u, r, rows, cols)
+    return sim, int(rows.size)
+
+def _greedy_score(sim: np.ndarray, u: KeywordMatrix, r: KeywordMatrix, threshold: float) -> float:
+    available = np.ones(len(r), dtype=bool)
+    score_sum = 0.0
+    for i in np.flatnonzero(sim.max(axis=1) >= threshold):
+        row = np.where(available, sim[i], -np.inf)
+        j = int(row.argmax())                      # first maximum, as in _score_pair
+        if row[j] >= threshold and row[j] > 0.0:
+            available &= r.token_ids != r.token_ids[j]
+            score_sum += u.signs[i] * u.freqs[i] * r.freqs[j]
+
+    denominator = (u.freqs.sum() + r.freqs.sum()) / 2.0
+    if denominator <= 0:
+        return 0.0
+    return float(np.clip(skew_score(score_sum / denominator) * 100.0, 0.0, 100.0))
+
+def score_matrices(
+    u: KeywordMatrix,
+    r: KeywordMatrix,
+    *,
+    threshold: float = THRESHOLD,
+    coarse: bool = False,
+) -> float:
+    """
+    ``_score_pair`` on :class:`KeywordMatrix` profiles: one matrix product
+    for all similarities (``coarse_similarity_matrix`` when *coarse*), then
+    the same greedy matching, normalisation and skew, scanned a row at a
+    time.
+    """
+    if not len(u) or not len(r):
+        return 0.0
+
+    if coarse:
+        sim, _ = coarse_similarity_matrix(u, r, threshold=threshold)
+    else:
+        sim = similarity_matrix(u, r)
+    return _greedy_score(sim, u, r, threshold)
+
+# ───────────────────────────── Concept-space scoring ──────────────────────────
+def concept_profile(records: Optional[Iterable[Dict[str, Any]]], *, restaurant: bool = False) -> Tuple[SparseVector, float]:
+    """
+    A keyword profile as a sparse concept vector plus its total weight.
+
+    User keywords contribute ``sign · frequency`` summed per concept;
+    restaurant keywords their *mean* frequency per concept – the expected
+    partner of one greedy ``_score_pair`` match, which takes a single
+    restaurant keyword per user keyword.
+    """
+    items = []
+    total = 0.0
+    for rec in records or []:
+        try:
+            token, freq = _canon_token(rec), _canon_frequency(rec)
+        except Exception:
+            continue
+        sign = 1 if restaurant or _canon_sentiment(rec) == "positive" else -1
+        items.append((token, float(sign * freq), rec.get("embedding")))
+        total += freq
+    return concept_index.vector(items, mean=restaurant), total
+
+def score_concepts(u: Tuple[SparseVector, float], r: Tuple[SparseVector, float]) -> float:
+    """Sparse-dot counterpart of ``_score_pair``: same normalisation and skew."""
+    (u_vec, u_total), (r_vec, r_total) = u, r
+    denominator = (u_total + r_total) / 2.0
+    if denominator <= 0 or not u_vec[0].size or not r_vec[0].size:
+        return 0.0
+    return float(np.clip(skew_score(sparse_dot(u_vec, r_vec) / denominator) * 100.0, 0.0, 100.0))
+
 # ─────────────────────────────── Cache helpers ────────────────────────────────
 def _ensure_state_id(obj: Any, attr: str, db: Session) -> int:
     val = getattr(obj, attr)
@@ -234,7 +487,7 @@ def _compute_user_rest_score(
             return cached
 
     kw_u = (user_keywords_collection.find_one({"user_id": u_id}) or {}).get("keywords", [])
-    kw_r = (restaurant_keywords_collection.find_one({"r_id": r_id}) or {}).get("keywords", [])
+    kw_r = (restaurant_keywords_collection.find_one({"r_id": r_id}, {"_id": 0, "keywords": 1}) or {}).get("keywords", [])
 
     score_val = _score_pair(
         _canonize_kw_list(kw_u),
@@ -320,7 +573,7 @@ def update_user_to_restaurant_score(
             user_keywords_collection.find_one({"user_id": u_id}) or {}
         ).get("keywords", [])
         kw_rest = (
-            restaurant_keywords_collection.find_one({"r_id": r_id}) or {}
+            restaurant_keywords_collection.find_one({"r_id": r_id}, {"_id": 0, "keywords": 1}) or {}
         ).get("keywords", [])
 
         strip = lambda rec: {
@@ -400,6 +653,9 @@ def batch_user_rest_scores(                       # <─ public helper
     threshold: float      = THRESHOLD,
     lift_tail_b: int      = 1,
     max_workers: int | None = None,
+    int8: bool = SCORE_INT8,
+    coarse: bool = SCORE_COARSE,
+    concepts: bool = SCORE_CONCEPTS,
 ) -> dict[int, float]:
     """
     Vector‑friendly batch computation of *compatibility scores* for one user
@@ -413,6 +669,9 @@ def batch_user_rest_scores(                       # <─ public helper
     threshold   : cosine cut‑off forwarded to `_score_pair`
     lift_tail_b : skew param – keep at 1 for linear mapping
     max_workers : override for thread pool size (defaults to 2×CPU)
+    int8        : score on int8-quantised profiles (``score_matrices``)
+    coarse      : truncated-dimension first pass, full vectors near the cut
+    concepts    : sparse concept-space scores (needs trained concepts)
 
     Returns
     -------
@@ -424,24 +683,39 @@ def batch_user_rest_scores(                       # <─ public helper
     # ── 1. ONE read for the user keyword profile ─────────────────────────────
     kw_user_raw = (user_keywords_collection.find_one({"user_id": u_id}) or {}) \
                      .get("keywords", [])
-    kw_user = _canonize_kw_list(kw_user_raw)
-    if not kw_user:
+    concepts = concepts and concept_index.ready
+    vectorised = int8 or coarse
+    if concepts:
+        user_canon = concept_profile
+        canon = lambda raw: concept_profile(raw, restaurant=True)
+    else:
+        canon = (lambda raw: build_keyword_matrix(raw, int8=int8)) if vectorised else _canonize_kw_list
+        user_canon = canon
+    kw_user = user_canon(kw_user_raw)
+    if not (kw_user[0][0].size if concepts else len(kw_user)):
         # anonymous / cold‑start – everybody gets 0.0
         return {r: 0.0 for r in r_ids}
 
     # ── 2. ONE bulk read for all requested restaurants ───────────────────────
-    rest_kw_cursor = restaurant_keywords_collection.find(
-        {"r_id": {"$in": r_ids}},
-        {"_id": 0, "r_id": 1, "keywords": 1},
-    )
-    rest_kw_map = {
-        doc["r_id"]: _canonize_kw_list(doc.get("keywords", []))
-        for doc in rest_kw_cursor
-    }
+    if vectorised and not concepts:
+        rest_kw_map = restaurant_matrices(r_ids, int8=int8, db=db)
+    else:
+        rest_kw_cursor = restaurant_keywords_collection.find(
+            {"r_id": {"$in": r_ids}},
+            {"_id": 0, "r_id": 1, "keywords": 1},
+        )
+        rest_kw_map = {
+            doc["r_id"]: canon(doc.get("keywords", []))
+            for doc in rest_kw_cursor
+        }
 
     # ── 3. Threaded fan‑out of the pure‑Python/NumPy scorer ───────────────────
     def _score_single(r_id: int) -> tuple[int, float]:
         kw_rest = rest_kw_map.get(r_id, [])
+        if concepts:
+            return r_id, score_concepts(kw_user, kw_rest) if kw_rest else 0.0
+        if vectorised:
+            return r_id, score_matrices(kw_user, kw_rest, threshold=threshold, coarse=coarse) if kw_rest else 0.0
         s = _score_pair(
             kw_user,
             kw_rest,
@@ -450,7 +724,8 @@ def batch_user_rest_scores(                       # <─ public helper
         )
         return r_id, s
 
-    pool_size = max_workers or min(len(r_ids), os.cpu_count() * 2)
+    # This worker's share of the CPUs – other server workers score too
+    pool_size = max_workers or min(len(r_ids), per_worker(available_cpus()) * 2)
     with ThreadPoolExecutor(max_workers=pool_size) as ex:
         fut_map = {ex.submit(_score_single, rid): rid for rid in r_ids}
         scores  = {rid: 0.0 for rid in r_ids}           # default fallback
@@ -0,0 +1,210 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pymongo import UpdateOne
+
+from ..connection.mongodb import concept_centroids_collection, keyword_concepts_collection
+from .embedding_codec import decode_embedding, encode_embedding
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────────────────── Tunables ────────────────────────────────
+CONCEPT_K: int = int(os.getenv("CONCEPT_K", 1024))
+CONCEPT_BATCH: int = int(os.getenv("CONCEPT_BATCH", 2048))
+CONCEPT_ITERS: int = int(os.getenv("CONCEPT_ITERS", 300))
+
+# Storage: one centroid document per concept and one mapping document per
+# keyword string, all tagged with the training `version`; the `meta`
+# centroid document {"_id": "active", "version": v} selects the live set,
+# so a retrain is written alongside and switched in one update.
+
+SparseVector = Tuple[np.ndarray, np.ndarray]       # (sorted concept ids, weights)
+
+# ───────────────────────────── Mini-batch k-means ─────────────────────────────
+def _unit_rows(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.where(norms > 0, norms, 1.0)
+
+def nearest_centroid(x: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+    """Index of the closest (max cosine) centroid for every row of *x*."""
+    out = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), chunk):
+        out[start:start + chunk] = (x[start:start + chunk] @ centroids.T).argmax(axis=1)
+    return out
+
+def minibatch_kmeans(
+    x: np.ndarray,
+    k: int,
+    *,
+    batch: int = CONCEPT_BATCH,
+    iters: int = CONCEPT_ITERS,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Spherical mini-batch k-means (Sculley 2010) on unit rows of *x*.
+
+    Every centroid moves towards the mean of the points it has absorbed so
+    far (learning rate 1/count) and is renormalised; centroids still empty
+    after half the iterations are re-seeded from random points.
+    """
+    rng = np.random.default_rng(seed)
+    x = _unit_rows(np.asarray(x, dtype=np.float32))
+    k = min(k, len(x))
+    centroids = x[rng.choice(len(x), k, replace=False)].copy()
+    counts = np.zeros(k, dtype=np.float64)
+
+    for it in range(iters):
+        b = x[rng.choice(len(x), min(batch, len(x)), replace=False)]
+        assign = nearest_centroid(b, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, b)
+        hits = np.bincount(assign, minlength=k).astype(np.float64)
+        moved = hits > 0
+        new_counts = counts + hits
+        centroids[moved] = (
+            centroids[moved] * (counts[moved] / new_counts[moved])[:, None]
+            + sums[moved] / new_counts[moved][:, None]
+        )
+        counts = new_counts
+        centroids[moved] = _unit_rows(centroids[moved])
+        if it == iters // 2:
+            dead = np.flatnonzero(counts == 0)
+            if dead.size:
+                centroids[dead] = x[rng.choice(len(x), dead.size, replace=False)]
+    return centroids
+
+# ───────────────────────────── Concept index ──────────────────────────────────
+class ConceptIndex:
+    """
+    Keyword string → concept id, with nearest-centroid assignment (and
+    persistence) for strings the last training run has not seen.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self.version: Optional[int] = None
+        self.centroids: Optional[np.ndarray] = None
+        self.mapping: Dict[str, int] = {}
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self.mapping)
+
+    def build(self, version: int, centroids: np.ndarray, mapping: Dict[str, int]) -> None:
+        with self._lock:
+            self.version = version
+            self.centroids = _unit_rows(np.asarray(centroids, dtype=np.float32))
+            self.mapping = dict(mapping)
+            self.ready = True
+
+    def assign(self, items: Iterable[Tuple[str, Any]]) -> Dict[str, int]:
+        """
+        Concept ids for ``(keyword, embedding)`` pairs.  Unknown keywords
+        go to their nearest centroid; those assignments are stored so every
+        process agrees on them.
+        """
+        out: Dict[str, int] = {}
+        fresh: List[Tuple[str, np.ndarray]] = []
+        with self._lock:
+            for kw, emb in items:
+                cid = self.mapping.get(kw)
+                if cid is not None:
+                    out[kw] = cid
+                    continue
+                vec = decode_embedding(emb)
+                if self.centroids is not None and vec.size == self.centroids.shape[1]:
+                    fresh.append((kw, vec))
+            if fresh:
+                ids = nearest_centroid(np.stack([v for _, v in fresh]), self.centroids)
+                for (kw, _), cid in zip(fresh, ids):
+                    self.mapping[kw] = out[kw] = int(cid)
+            version = self.version
+        if fresh:
+            try:
+                keyword_concepts_collection.bulk_write([
+                    UpdateOne(
+                        {"version": version, "keyword": kw},
+                        {"$setOnInsert": {"concept": out[kw], "incremental": True}},
+                        upsert=True,
+                    )
+                    for kw, _ in fresh
+                ], ordered=False)
+            except Exception:
+                logger.exception("Storing %d incremental concept assignments failed", len(fresh))
+        return out
+
+    def vector(self, items: Iterable[Tuple[str, float, Any]], *, mean: bool = False) -> SparseVector:
+        """
+        ``(keyword, weight, embedding)`` triples → sparse concept vector.
+        Weights of one concept are summed, or averaged with *mean*.
+        """
+        items = list(items)
+        ids = self.assign((kw, emb) for kw, _, emb in items)
+        pairs = [(ids[kw], w) for kw, w, _ in items if kw in ids]
+        if not pairs:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        cids = np.fromiter((c for c, _ in pairs), dtype=np.int64, count=len(pairs))
+        weights = np.fromiter((w for _, w in pairs), dtype=np.float64, count=len(pairs))
+        uniq, inverse = np.unique(cids, return_inverse=True)
+        sums = np.bincount(inverse, weights=weights)
+        if mean:
+            sums /= np.bincount(inverse)
+        return uniq, sums
+
+def sparse_dot(a: SparseVector, b: SparseVector) -> float:
+    _, ia, ib = np.intersect1d(a[0], b[0], assume_unique=True, return_indices=True)
+    return float(np.dot(a[1][ia], b[1][ib]))
+
+concept_index = ConceptIndex()
+
+# ───────────────────────────── Persistence ────────────────────────────────────
+def store_concepts(
+    centroids: np.ndarray,
+    keywords: Sequence[str],
+    assignment: np.ndarray,
+    batch_size: int = 5000,
+) -> int:
+    """Write a training run as a new version, switch to it, drop older ones."""
+    version = int(time.time())
+    concept_centroids_collection.insert_many([
+        {"version": version, "concept": i, "embedding": encode_embedding(c)}
+        for i, c in enumerate(centroids)
+    ])
+    for start in range(0, len(keywords), batch_size):
+        keyword_concepts_collection.insert_many([
+            {"version": version, "keyword": kw, "concept": int(cid)}
+            for kw, cid in zip(keywords[start:start + batch_size], assignment[start:start + batch_size])
+        ], ordered=False)
+    concept_centroids_collection.update_one({"_id": "active"}, {"$set": {"version": version}}, upsert=True)
+    keyword_concepts_collection.delete_many({"version": {"$ne": version}})
+    concept_centroids_collection.delete_many({"_id": {"$ne": "active"}, "version": {"$ne": version}})
+    return version
+
+def ensure_indexes() -> None:
+    keyword_concepts_collection.create_index([("version", 1), ("keyword", 1)], unique=True)
+    concept_centroids_collection.create_index([("version", 1), ("concept", 1)])
+
+def load_concept_index() -> int:
+    """Build :data:`concept_index` from the active version, if one exists."""
+    meta = concept_centroids_collection.find_one({"_id": "active"})
+    if not meta:
+        logger.info("No keyword concepts trained yet")
+        return 0
+    version = meta["version"]
+    docs = concept_centroids_collection.find(
+        {"version": version, "concept": {"$exists": True}},
+        {"_id": 0, "concept": 1, "embedding": 1},
+    )
+    rows = sorted(((d["concept"], decode_embedding(d["embedding"])) for d in docs), key=lambda r: r[0])
+    centroids = np.stack([v for _, v in rows])
+    mapping = {
+        d["keyword"]: d["concept"]
+        for d in keyword_concepts_collection.find({"version": version}, {"_id": 0, "keyword": 1, "concept": 1})
+    }
+    concept_index.build(version, centroids, mapping)
+    logger.info("Keyword concepts ready: %d keywords → %d concepts", len(mapping), len(centroids))
+    return len(mapping)
@@ -0,0 +1,371 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ASCENDING, ReturnDocument, UpdateMany, UpdateOne
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..connection.mysqldb import Review, Users
+from ..connection.mongodb import (
+    counters_collection,
+    follow_collection,
+    restaurant_keywords_collection,
+    user_keywords_collection,
+)
+
+logger = logging.getLogger(__name__)
+
+# One document per (scope, id):
+#   {"scope": "user", "id": 5, "reviews": 3, "followers": 10, "following": 2,
+#    "following_rev": 7, "keywords": 41}
+#   {"scope": "restaurant", "id": 9, "reviews": 7, "keywords": 120, "first_review_id": 311}
+SCOPE_USER: str = "user"
+SCOPE_RESTAURANT: str = "restaurant"
+
+USER_FIELDS = ("reviews", "followers", "following", "following_rev", "keywords")
+RESTAURANT_FIELDS = ("reviews", "keywords", "first_review_id")
+
+def ensure_indexes() -> None:
+    counters_collection.create_index([("scope", ASCENDING), ("id", ASCENDING)], unique=True)
+
+# ───────────────────────────── Write path ─────────────────────────────────────
+def incr(scope: str, entity_id: int, field: str, delta: int = 1) -> None:
+    """Atomically add *delta* to one counter; creates the document on demand."""
+    counters_collection.update_one(
+        {"scope": scope, "id": entity_id},
+        {"$inc": {field: delta}},
+        upsert=True,
+    )
+
+def set_fields(scope: str, entity_id: int, fields: Dict[str, Any]) -> None:
+    counters_collection.update_one(
+        {"scope": scope, "id": entity_id},
+        {"$set": fields},
+        upsert=True,
+    )
+
+def _review_column(scope: str):
+    return Review.user_id if scope == SCOPE_USER else Review.restaurant_id
+
+def seed_review_counters(
+    scope: str,
+    entity_id: int,
+    db: Session,
+    review_id: Optional[int] = None,
+    counted: bool = False,
+) -> None:
+    """
+    Backfill a missing ``reviews`` (and a restaurant's ``first_review_id``)
+    from MySQL, for entities reconcile_all has not reached yet.
+
+    The write paths seed the state *before* their own change: *review_id*
+    is left out of the SQL aggregate and added back when *counted*, so the
+    result is the same whether or not MySQL already reflects the change.
+    Fields that exist are never overwritten.
+    """
+    if counters_collection.find_one({"scope": scope, "id": entity_id, "reviews": {"$exists": True}}, {"_id": 1}):
+        return
+    query = db.query(func.count(Review.review_id), func.min(Review.review_id)).filter(_review_column(scope) == entity_id)
+    if review_id is not None:
+        query = query.filter(Review.review_id != review_id)
+    n, first_id = query.one()
+    if counted:
+        n += 1
+        first_id = review_id if first_id is None else min(first_id, review_id)
+
+    fields: Dict[str, Any] = {"reviews": {"$ifNull": ["$reviews", n]}}
+    if scope == SCOPE_RESTAURANT:
+        # $$REMOVE rather than null: null would win every later $min
+        fields["first_review_id"] = {"$ifNull": ["$first_review_id", "$$REMOVE" if first_id is None else first_id]}
+    counters_collection.update_one({"scope": scope, "id": entity_id}, [{"$set": fields}], upsert=True)
+
+def seed_many_review_counters(scope: str, ids: Iterable[int], db: Session) -> None:
+    """Batch :func:`seed_review_counters` for read paths: one GROUP BY for the missing ids."""
+    ids = list(ids)
+    if not ids:
+        return
+    seeded = {
+        doc["id"]
+        for doc in counters_collection.find(
+            {"scope": scope, "id": {"$in": ids}, "reviews": {"$exists": True}}, {"_id": 0, "id": 1}
+        )
+    }
+    missing = [i for i in ids if i not in seeded]
+    if not missing:
+        return
+    column = _review_column(scope)
+    rows = {
+        entity_id: (n, first_id)
+        for entity_id, n, first_id in db.query(column, func.count(Review.review_id), func.min(Review.review_id))
+        .filter(column.in_(missing))
+        .group_by(column)
+    }
+    ops = []
+    for entity_id in missing:
+        n, first_id = rows.get(entity_id, (0, None))
+        fields: Dict[str, Any] = {"reviews": {"$ifNull": ["$reviews", n]}}
+        if scope == SCOPE_RESTAURANT:
+            fields["first_review_id"] = {"$ifNull": ["$first_review_id", "$$REMOVE" if first_id is None else first_id]}
+        ops.append(UpdateOne({"scope": scope, "id": entity_id}, [{"$set": fields}], upsert=True))
+    counters_collection.bulk_write(ops, ordered=False)
+
+def on_review_created(user_id: int, restaurant_id: int, review_id: int, db: Session) -> Optional[int]:
+    """Returns the restaurant's first_review_id after the update."""
+    seed_review_counters(SCOPE_USER, user_id, db, review_id, counted=False)
+    incr(SCOPE_USER, user_id, "reviews")
+    seed_review_counters(SCOPE_RESTAURANT, restaurant_id, db, review_id, counted=False)
+    doc = counters_collection.find_one_and_update(
+        {"scope": SCOPE_RESTAURANT, "id": restaurant_id},
+        {"$inc": {"reviews": 1}, "$min": {"first_review_id": review_id}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc.get("first_review_id")
+
+def on_review_deleted(user_id: int, restaurant_id: int, review_id: int, db: Session) -> bool:
+    """Returns True when the deleted review was the restaurant's first one."""
+    seed_review_counters(SCOPE_USER, user_id, db, review_id, counted=True)
+    incr(SCOPE_USER, user_id, "reviews", -1)
+    seed_review_counters(SCOPE_RESTAURANT, restaurant_id, db, review_id, counted=True)
+    doc = counters_collection.find_one_and_update(
+        {"scope": SCOPE_RESTAURANT, "id": restaurant_id},
+        {"$inc": {"reviews": -1}},
+        upsert=True,
+    )
+    # Only the (rare) deletion of the first review needs a lookup
+    if doc and doc.get("first_review_id") == review_id:
+        first_id = (
+            db.query(func.min(Review.review_id))
+            .filter(Review.restaurant_id == restaurant_id)
+            .scalar()
+        )
+        # $unset rather than null: null would win every later $min
+        update = {"$set": {"first_review_id": first_id}} if first_id is not None \
+            else {"$unset": {"first_review_id": ""}}
+        counters_collection.update_one({"scope": SCOPE_RESTAURANT, "id": restaurant_id}, update)
+        return True
+    return False
+
+def _bump(field: str, delta: int, seed: int) -> Dict[str, Any]:
+    """Pipeline ``$inc`` that starts a missing field from *seed* instead of 0."""
+    return {field: {"$add": [{"$ifNull": [f"${field}", seed]}, delta]}}
+
+def on_follow_changed(
+    user_id: int,
+    target_id: int,
+    delta: int,
+    following_seed: int = 0,
+    followers_seed: int = 0,
+) -> Tuple[int, int]:
+    """
+    *delta* = +1 for follow, -1 for unfollow.  Returns the user's following
+    and the target's followers count after the change.
+
+    Users that reconcile_counters has not backfilled yet have no follow
+    counters; they start from the seeds (the legacy SQL columns) rather
+    than from 0.
+    """
+    # following_rev changes even when +1/-1 cancel out (ids differ)
+    user_doc = counters_collection.find_one_and_update(
+        {"scope": SCOPE_USER, "id": user_id},
+        [{"$set": {**_bump("following", delta, following_seed), **_bump("following_rev", 1, 0)}}],
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    target_doc = counters_collection.find_one_and_update(
+        {"scope": SCOPE_USER, "id": target_id},
+        [{"$set": _bump("followers", delta, followers_seed)}],
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return max(int(user_doc["following"]), 0), max(int(target_doc["followers"]), 0)
+
+def sql_follow_counts(user: Any) -> Dict[str, int]:
+    """Legacy ``Users`` follow columns, as fallback values for the counters."""
+    return {
+        "followers": max(int(user.follower_count or 0), 0),
+        "following": max(int(user.following_count or 0), 0),
+    }
+
+def on_keywords_changed(scope: str, entity_id: int, n_keywords: int) -> None:
+    set_fields(scope, entity_id, {"keywords": n_keywords})
+
+# ───────────────────────────── Read path ──────────────────────────────────────
+def get_counters(scope: str, entity_id: int, fallback: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """
+    All counters of one entity; absent fields take their *fallback* value
+    (e.g. :func:`sql_follow_counts` before the backfill), else 0 / None.
+    """
+    fields = USER_FIELDS if scope == SCOPE_USER else RESTAURANT_FIELDS
+    doc = counters_collection.find_one({"scope": scope, "id": entity_id}, {"_id": 0}) or {}
+    doc = {**(fallback or {}), **doc}
+    out: Dict[str, Any] = {}
+    for f in fields:
+        if f == "first_review_id":
+            out[f] = doc.get(f)
+        else:
+            out[f] = max(int(doc.get(f, 0)), 0)
+    return out
+
+def get_counts(scope: str, ids: Iterable[int], field: str) -> Dict[int, int]:
+    """Return {id: value} for *ids*; missing documents/fields count as 0."""
+    ids = list(ids)
+    counts = {i: 0 for i in ids}
+    if not ids:
+        return counts
+    cursor = counters_collection.find(
+        {"scope": scope, "id": {"$in": ids}},
+        {"_id": 0, "id": 1, field: 1},
+    )
+    for doc in cursor:
+        counts[doc["id"]] = max(int(doc.get(field, 0)), 0)
+    return counts
+
+def get_many(
+    scope: str,
+    ids: Iterable[int],
+    fallback: Optional[Dict[int, Dict[str, int]]] = None,
+) -> Dict[int, Dict[str, Any]]:
+    """Batch version of :func:`get_counters` (one query)."""
+    ids = list(ids)
+    fallback = fallback or {}
+    fields = USER_FIELDS if scope == SCOPE_USER else RESTAURANT_FIELDS
+    out = {i: {f: (None if f == "first_review_id" else 0) for f in fields} for i in ids}
+    for i, values in fallback.items():
+        if i in out:
+            out[i].update(values)
+    if not ids:
+        return out
+    for doc in counters_collection.find({"scope": scope, "id": {"$in": ids}}, {"_id": 0}):
+        for f in fields:
+            if f in doc:
+                out[doc["id"]][f] = doc[f] if f == "first_review_id" else max(int(doc[f]), 0)
+    return out
+
+def user_review_counts(user_ids: Iterable[int]) -> Dict[int, int]:
+    return get_counts(SCOPE_USER, user_ids, "reviews")
+
+# ───────────────────────────── Reconciliation ─────────────────────────────────
+def _merge_stage() -> Dict[str, Any]:
+    return {
+        "$merge": {
+            "into": counters_collection.name,
+            "on": ["scope", "id"],
+            "whenMatched": "merge",
+            "whenNotMatched": "insert",
+        }
+    }
+
+def reconcile_review_counts(db: Session) -> int:
+    """
+    Rebuild ``reviews`` (users + restaurants) and ``first_review_id`` from
+    MySQL with two GROUP BYs and one unordered bulk write.
+    """
+    user_rows = (
+        db.query(Review.user_id, func.count(Review.review_id))
+        .group_by(Review.user_id)
+        .all()
+    )
+    rest_rows = (
+        db.query(Review.restaurant_id, func.count(Review.review_id), func.min(Review.review_id))
+        .group_by(Review.restaurant_id)
+        .all()
+    )
+
+    ops: List[UpdateOne | UpdateMany] = [
+        UpdateOne({"scope": SCOPE_USER, "id": uid}, {"$set": {"reviews": cnt}}, upsert=True)
+        for uid, cnt in user_rows
+    ]
+    ops += [
+        UpdateOne(
+            {"scope": SCOPE_RESTAURANT, "id": rid},
+            {"$set": {"reviews": cnt, "first_review_id": first_id}},
+            upsert=True,
+        )
+        for rid, cnt, first_id in rest_rows
+    ]
+    # Entities whose last review disappeared
+    ops.append(UpdateMany(
+        {"scope": SCOPE_USER, "id": {"$nin": [u for u, _ in user_rows]}, "reviews": {"$ne": 0}},
+        {"$set": {"reviews": 0}},
+    ))
+    ops.append(UpdateMany(
+        {"scope": SCOPE_RESTAURANT, "id": {"$nin": [r for r, *_ in rest_rows]}, "reviews": {"$ne": 0}},
+        {"$set": {"reviews": 0}, "$unset": {"first_review_id": ""}},
+    ))
+    counters_collection.bulk_write(ops, ordered=False)
+    return len(user_rows) + len(rest_rows)
+
+def reconcile_follow_counts() -> None:
+    """Recount followers/following server-side from the follow collection."""
+    follow_collection.aggregate([
+        {"$project": {
+            "_id": 0,
+            "scope": {"$literal": SCOPE_USER},
+            "id": "$user_id",
+            "followers": {"$size": {"$ifNull": ["$follower_ids", []]}},
+            "following": {"$size": {"$ifNull": ["$following_ids", []]}},
+        }},
+        _merge_stage(),
+    ])
+
+def reconcile_keyword_counts() -> None:
+    """Recount distinct profile keywords for users and restaurants."""
+    # Compacted restaurant profiles count every surface string in `history`
+    for coll, id_field, scope, listed in (
+        (user_keywords_collection, "$user_id", SCOPE_USER, "$keywords"),
+        (restaurant_keywords_collection, "$r_id", SCOPE_RESTAURANT, {"$ifNull": ["$history", "$keywords"]}),
+    ):
+        coll.aggregate([
+            {"$project": {
+                "_id": 0,
+                "scope": {"$literal": scope},
+                "id": id_field,
+                "keywords": {"$size": {"$ifNull": [listed, []]}},
+            }},
+            _merge_stage(),
+        ])
+
+def sync_sql_follow_columns(db: Session, batch_size: int = 1000) -> int:
+    """
+    Copy reconciled follower/following counts back into the legacy
+    ``Users.follower_count`` / ``following_count`` columns in bulk.
+    """
+    cursor = counters_collection.find(
+        {"scope": SCOPE_USER},
+        {"_id": 0, "id": 1, "followers": 1, "following": 1},
+    ).batch_size(batch_size)
+
+    batch: List[Dict[str, int]] = []
+    written = 0
+    for doc in cursor:
+        batch.append({
+            "user_id": doc["id"],
+            "follower_count": max(int(doc.get("followers", 0)), 0),
+            "following_count": max(int(doc.get("following", 0)), 0),
+        })
+        if len(batch) >= batch_size:
+            db.bulk_update_mappings(Users, batch)
+            written += len(batch)
+            batch.clear()
+    if batch:
+        db.bulk_update_mappings(Users, batch)
+        written += len(batch)
+    db.commit()
+    return written
+
+def reconcile_all(db: Session) -> Dict[str, int]:
+    """Full drift repair; safe to run while traffic is live."""
+    from .restaurant_card import refresh_card_counts     # restaurant_card imports this module
+
+    ensure_indexes()
+    n_reviews = reconcile_review_counts(db)
+    reconcile_follow_counts()
+    reconcile_keyword_counts()
+    n_sql = sync_sql_follow_columns(db)
+    n_cards = refresh_card_counts()
+    logger.info(
+        "Counters reconciled: %d review aggregates, %d SQL rows, %d cards corrected",
+        n_reviews, n_sql, n_cards,
+    )
+    return {"review_aggregates": n_reviews, "sql_rows": n_sql, "cards": n_cards}
@@ -0,0 +1,150 @@
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from bson.binary import Binary, USER_DEFINED_SUBTYPE
+
+# ───────────────────────────────────── Tunables ────────────────────────────────
+# Storage format for newly written keyword embeddings: "float32", "float16",
+# "int8" (scalar-quantised, see below) or "list" (legacy array of doubles –
+# only useful to roll back).
+EMBED_STORE_DTYPE: str = os.getenv("EMBED_STORE_DTYPE", "float32")
+
+# Binary subtypes tag the element type, so formats can live side by side.
+SUBTYPE_F32 = USER_DEFINED_SUBTYPE          # 0x80
+SUBTYPE_F16 = USER_DEFINED_SUBTYPE + 1      # 0x81
+SUBTYPE_I8 = USER_DEFINED_SUBTYPE + 2       # 0x82: float32 scale, then int8 data
+
+_DTYPES = {SUBTYPE_F32: np.dtype("<f4"), SUBTYPE_F16: np.dtype("<f2")}
+_SUBTYPES = {"float32": SUBTYPE_F32, "float16": SUBTYPE_F16}
+_SCALE = np.dtype("<f4")
+
+_EMPTY = np.zeros(0, dtype=np.float32)
+
+def encode_embedding(vec: Any, dtype: str = EMBED_STORE_DTYPE) -> Any:
+    """
+    Unit-normalise *vec* and pack it for Mongo.
+
+    Returns a BSON ``Binary`` (little-endian float32 / float16, or int8 with
+    its scale) or, with ``dtype="list"``, a plain list of floats.  ``None``
+    passes through.
+    """
+    if vec is None:
+        return None
+    arr = decode_embedding(vec) if isinstance(vec, (bytes, Binary)) else np.asarray(vec, dtype=np.float32)
+    norm = float(np.linalg.norm(arr))
+    if norm > 0:
+        arr = arr / norm
+    if dtype == "list":
+        return [round(float(x), 6) for x in arr]
+    if dtype == "int8":
+        q, scale = quantize_int8(arr)
+        return Binary(np.asarray([scale], dtype=_SCALE).tobytes() + q.tobytes(), SUBTYPE_I8)
+    subtype = _SUBTYPES[dtype]
+    return Binary(arr.astype(_DTYPES[subtype]).tobytes(), subtype)
+
+def decode_embedding(value: Any) -> np.ndarray:
+    """
+    Stored embedding → float32 vector, whichever format it was written in.
+
+    float32 binaries are a read-only ``np.frombuffer`` view of the BSON
+    bytes (no copy); float16 ones are widened once, as BLAS has no half
+    precision dot product; int8 ones are dequantised; legacy lists go
+    through ``np.asarray``.
+    """
+    if value is None:
+        return _EMPTY
+    if isinstance(value, Binary):
+        if value.subtype == SUBTYPE_I8:
+            q, scale = _split_int8(value)
+            return q.astype(np.float32) * np.float32(scale)
+        dtype = _DTYPES.get(value.subtype)
+        if dtype is None:
+            raise ValueError(f"Unknown embedding subtype {value.subtype}")
+        arr = np.frombuffer(value, dtype=dtype)
+        return arr if dtype == np.float32 else arr.astype(np.float32)
+    if isinstance(value, bytes):                # subtype 0 decodes to bytes
+        return np.frombuffer(value, dtype="<f4")
+    return np.asarray(value, dtype=np.float32)
+
+_WIDTH = {"list": 8, "float32": 4, "float16": 2, "int8": 1}     # bytes per component
+_FORMATS = {SUBTYPE_F32: "float32", SUBTYPE_F16: "float16", SUBTYPE_I8: "int8"}
+
+def embedding_format(value: Any) -> Optional[str]:
+    """Storage format of an embedding ("list", "float32", …), None if absent."""
+    if value is None:
+        return None
+    if isinstance(value, Binary):
+        return _FORMATS.get(value.subtype)
+    if isinstance(value, bytes):
+        return "float32"
+    return "list"
+
+def needs_reencode(value: Any, dtype: str) -> bool:
+    """True when *value* is stored wider than *dtype* (lists always are)."""
+    fmt = embedding_format(value)
+    return fmt is not None and fmt != dtype and _WIDTH[fmt] > _WIDTH.get(dtype, 8)
+
+def embedding_size(value: Any) -> int:
+    """Number of components of a stored embedding, without decoding it."""
+    if value is None:
+        return 0
+    if isinstance(value, Binary):
+        if value.subtype == SUBTYPE_I8:
+            return max(len(value) - _SCALE.itemsize, 0)
+        dtype = _DTYPES.get(value.subtype)
+        return len(value) // dtype.itemsize if dtype is not None else 0
+    if isinstance(value, bytes):
+        return len(value) // 4
+    try:
+        return len(value)
+    except TypeError:
+        return 0
+
+# ───────────────────────────── int8 quantisation ──────────────────────────────
+def quantize_int8(vec: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Symmetric per-vector quantisation: ``vec ≈ q * scale`` with ``q`` in
+    [-127, 127] and ``scale = max|vec| / 127``.
+    """
+    vec = np.asarray(vec, dtype=np.float32)
+    peak = float(np.abs(vec).max()) if vec.size else 0.0
+    if peak == 0.0:
+        return np.zeros(vec.shape, dtype=np.int8), 1.0
+    scale = peak / 127.0
+    return np.clip(np.rint(vec / scale), -127, 127).astype(np.int8), scale
+
+def _split_int8(value: bytes) -> Tuple[np.ndarray, float]:
+    scale = float(np.frombuffer(value, dtype=_SCALE, count=1)[0])
+    return np.frombuffer(value, dtype=np.int8, offset=_SCALE.itemsize), scale
+
+def decode_embedding_int8(value: Any) -> Tuple[np.ndarray, float]:
+    """
+    Stored embedding → ``(int8 vector, scale)``.  int8 binaries are viewed
+    in place; anything else is quantised on the fly.
+    """
+    if isinstance(value, Binary) and value.subtype == SUBTYPE_I8:
+        return _split_int8(value)
+    return quantize_int8(decode_embedding(value))
+
+def is_encoded(value: Any) -> bool:
+    return isinstance(value, (bytes, Binary))
+
+def encode_keyword_list(records: Iterable[Dict[str, Any]], dtype: str = EMBED_STORE_DTYPE) -> List[Dict[str, Any]]:
+    """Copy of *records* with every ``embedding`` re-encoded as *dtype*."""
+    out = []
+    for rec in records:
+        rec = dict(rec)
+        if rec.get("embedding") is not None:
+            rec["embedding"] = encode_embedding(rec["embedding"], dtype)
+        out.append(rec)
+    return out
+
+def embedding_nbytes(value: Optional[Any]) -> int:
+    """Approximate BSON payload size of a stored embedding."""
+    if value is None:
+        return 0
+    if is_encoded(value):
+        return len(value) + 5
+    # element = type byte + decimal index key + NUL + 8-byte double
+    return sum(1 + len(str(i)) + 1 + 8 for i in range(len(value))) + 5
@@ -0,0 +1,202 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────────────────── Tunables ────────────────────────────────
+SNAPSHOT_DIR: str = os.getenv(
+    "SNAPSHOT_DIR", os.path.join(os.path.dirname(__file__), "..", "data", "snapshots")
+)
+SNAPSHOT_POLL_S: float = float(os.getenv("SNAPSHOT_POLL_S", 5.0))    # generation check interval
+SNAPSHOT_KEEP: int = int(os.getenv("SNAPSHOT_KEEP", 2))              # generations left on disk
+
+# Layout, written only by `scripts/build_snapshot.py`:
+#
+#   SNAPSHOT_DIR/GENERATION            "7\n" – the live generation
+#   SNAPSHOT_DIR/gen-000007/<name>.npy       float32 (n, dim), one row per key
+#   SNAPSHOT_DIR/gen-000007/<name>.ids.npy   int64 ids, sorted   (id-keyed tables)
+#   SNAPSHOT_DIR/gen-000007/<name>.keys.json strings, sorted     (string-keyed tables)
+#
+# A generation is written into a temporary directory, renamed into place
+# and only then published by replacing GENERATION, so readers never see a
+# partial snapshot.  Every worker maps the matrices read-only; the pages
+# live once in the page cache however many workers there are.  Workers
+# re-read GENERATION at most every SNAPSHOT_POLL_S and swap to the new
+# mapping; older generations stay on disk (SNAPSHOT_KEEP) and mapped pages
+# of removed files remain valid until the last reader drops them.
+
+_GENERATION_FILE = "GENERATION"
+
+def _gen_dir(root: str, generation: int) -> str:
+    return os.path.join(root, f"gen-{generation:06d}")
+
+def read_generation(root: str = SNAPSHOT_DIR) -> int:
+    try:
+        with open(os.path.join(root, _GENERATION_FILE)) as fh:
+            return int(fh.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+# ───────────────────────────── Writer ─────────────────────────────────────────
+class SnapshotWriter:
+    """
+    Collects tables for the next generation; :meth:`publish` makes them live.
+
+    >>> with SnapshotWriter() as w:
+    ...     w.add_ids("restaurant", ids, matrix)
+    ...     w.add_keys("vocab", keywords, matrix)
+    """
+
+    def __init__(self, root: str = SNAPSHOT_DIR) -> None:
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.generation = read_generation(root) + 1
+        self.tmp = _gen_dir(root, self.generation) + f".tmp-{os.getpid()}"
+        os.makedirs(self.tmp)
+        self.tables: Dict[str, Tuple[int, int]] = {}
+
+    def _matrix(self, name: str, order: np.ndarray, matrix: np.ndarray) -> None:
+        matrix = np.ascontiguousarray(np.asarray(matrix, dtype=np.float32)[order])
+        np.save(os.path.join(self.tmp, f"{name}.npy"), matrix)
+        self.tables[name] = matrix.shape
+
+    def add_ids(self, name: str, ids: Sequence[int], matrix: np.ndarray) -> None:
+        ids = np.asarray(ids, dtype=np.int64)
+        order = np.argsort(ids, kind="stable")
+        np.save(os.path.join(self.tmp, f"{name}.ids.npy"), ids[order])
+        self._matrix(name, order, matrix)
+
+    def add_keys(self, name: str, keys: Sequence[str], matrix: np.ndarray) -> None:
+        order = np.array(sorted(range(len(keys)), key=keys.__getitem__), dtype=np.int64)
+        with open(os.path.join(self.tmp, f"{name}.keys.json"), "w", encoding="utf-8") as fh:
+            json.dump([keys[i] for i in order], fh, ensure_ascii=False)
+        self._matrix(name, order, matrix)
+
+    def publish(self) -> int:
+        final = _gen_dir(self.root, self.generation)
+        for fn in os.listdir(self.tmp):
+            with open(os.path.join(self.tmp, fn), "rb") as fh:
+                os.fsync(fh.fileno())
+        os.rename(self.tmp, final)
+        marker = os.path.join(self.root, f".{_GENERATION_FILE}.tmp-{os.getpid()}")
+        with open(marker, "w") as fh:
+            fh.write(f"{self.generation}\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(marker, os.path.join(self.root, _GENERATION_FILE))
+        self._prune()
+        return self.generation
+
+    def abort(self) -> None:
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _prune(self) -> None:
+        gens = sorted(
+            int(d[4:]) for d in os.listdir(self.root)
+            if d.startswith("gen-") and d[4:].isdigit()
+        )
+        for g in gens[:-SNAPSHOT_KEEP]:
+            shutil.rmtree(_gen_dir(self.root, g), ignore_errors=True)
+
+    def __enter__(self) -> "SnapshotWriter":
+        return self
+
+    def __exit__(self, exc_type, *_) -> None:
+        if exc_type is None:
+            self.publish()
+        else:
+            self.abort()
+
+# ───────────────────────────── Reader ─────────────────────────────────────────
+class _Table:
+    def __init__(self, directory: str, name: str) -> None:
+        self.matrix: np.ndarray = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+        ids_path = os.path.join(directory, f"{name}.ids.npy")
+        self.ids: Optional[np.ndarray] = np.load(ids_path, mmap_mode="r") if os.path.exists(ids_path) else None
+        self.keys: Dict[str, int] = {}
+        keys_path = os.path.join(directory, f"{name}.keys.json")
+        if os.path.exists(keys_path):
+            with open(keys_path, encoding="utf-8") as fh:
+                self.keys = {k: i for i, k in enumerate(json.load(fh))}
+
+    def rows_for_ids(self, ids: Iterable[int]) -> Tuple[np.ndarray, np.ndarray]:
+        want = np.fromiter(ids, dtype=np.int64)
+        pos = np.searchsorted(self.ids, want)
+        pos_c = np.minimum(pos, len(self.ids) - 1) if len(self.ids) else pos
+        found = (pos < len(self.ids)) & (self.ids[pos_c] == want) if len(self.ids) else np.zeros(len(want), bool)
+        out = np.zeros((len(want), self.matrix.shape[1]), dtype=np.float32)
+        out[found] = self.matrix[pos_c[found]]
+        return out, found
+
+class EmbeddingSnapshot:
+    """Read-only, memory-mapped view of the live snapshot generation."""
+
+    def __init__(self, root: str = SNAPSHOT_DIR) -> None:
+        self.root = root
+        self._lock = threading.Lock()
+        self.generation = 0
+        self._tables: Dict[str, _Table] = {}
+        self._checked = 0.0
+        self.ready = False
+
+    def load(self) -> int:
+        """Map the generation named in GENERATION (no-op if already mapped)."""
+        generation = read_generation(self.root)
+        if generation == self.generation:
+            return generation
+        directory = _gen_dir(self.root, generation)
+        tables = {
+            fn[:-4]: _Table(directory, fn[:-4])
+            for fn in os.listdir(directory)
+            if fn.endswith(".npy") and not fn.endswith(".ids.npy")
+        } if generation else {}
+        with self._lock:
+            self._tables, self.generation = tables, generation
+            self.ready = bool(tables)
+        logger.info("Embedding snapshot generation %d: %s", generation,
+                    ", ".join(f"{n} {t.matrix.shape}" for n, t in tables.items()) or "empty")
+        return generation
+
+    def _current(self) -> Dict[str, _Table]:
+        now = time.monotonic()
+        if now - self._checked >= SNAPSHOT_POLL_S:
+            self._checked = now
+            try:
+                self.load()
+            except Exception:
+                logger.exception("Swapping to a new embedding snapshot failed; keeping %d", self.generation)
+        return self._tables
+
+    def names(self) -> List[str]:
+        return sorted(self._current())
+
+    def matrix(self, name: str) -> Optional[np.ndarray]:
+        table = self._current().get(name)
+        return None if table is None else table.matrix
+
+    def by_ids(self, name: str, ids: Iterable[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows for integer *ids* plus a found-mask; missing rows are zero."""
+        table = self._current().get(name)
+        if table is None or table.ids is None:
+            ids = list(ids)
+            return np.zeros((len(ids), 0), dtype=np.float32), np.zeros(len(ids), dtype=bool)
+        return table.rows_for_ids(ids)
+
+    def by_key(self, name: str, key: str) -> Optional[np.ndarray]:
+        table = self._current().get(name)
+        if table is None:
+            return None
+        row = table.keys.get(key)
+        return None if row is None else table.matrix[row]
+
+embedding_snapshot = EmbeddingSnapshot()
+
+def load_embedding_snapshot() -> int:
+    return embedding_snapshot.load()
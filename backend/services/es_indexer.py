@@ -0,0 +1,223 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from ..connection.elasticdb import es_client
+
+if TYPE_CHECKING:
+    from elasticsearch import Elasticsearch
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────────────────── Tunables ────────────────────────────────
+ES_BULK_MAX_OPS: int = int(os.getenv("ES_BULK_MAX_OPS", 500))           # flush when this many are queued
+ES_BULK_FLUSH_S: float = float(os.getenv("ES_BULK_FLUSH_S", 1.0))       # … or when the oldest is this old
+ES_BULK_MAX_RETRIES: int = int(os.getenv("ES_BULK_MAX_RETRIES", 3))
+ES_BULK_BACKOFF_S: float = float(os.getenv("ES_BULK_BACKOFF_S", 0.5))
+ES_BULK_WAIT_TIMEOUT_S: float = float(os.getenv("ES_BULK_WAIT_TIMEOUT_S", 10))
+
+OP_INDEX = "index"
+OP_UPDATE = "update"
+OP_DELETE = "delete"
+
+class BulkIndexError(Exception):
+    """One bulk item was rejected by Elasticsearch."""
+
+    def __init__(self, status: int, error: Any) -> None:
+        super().__init__(f"bulk item failed ({status}): {error}")
+        self.status = status
+        self.error = error
+
+def _merge(base: Dict[str, Any], partial: Dict[str, Any]) -> Dict[str, Any]:
+    """What an ES partial-doc update does: objects merge, everything else replaces."""
+    out = dict(base)
+    for k, v in partial.items():
+        out[k] = _merge(out[k], v) if isinstance(v, dict) and isinstance(out.get(k), dict) else v
+    return out
+
+class _Op:
+    __slots__ = ("action", "source", "futures")
+
+    def __init__(self, action: str, source: Optional[Dict[str, Any]], future: Future) -> None:
+        self.action = action
+        self.source = source
+        self.futures = [future]
+
+class BulkIndexer:
+    """
+    Buffers request-path index / update / delete operations and sends them
+    through ``_bulk`` from one background thread.
+
+    * operations on the same ``(index, id)`` are coalesced while queued: a
+      delete or full index supersedes everything before it, and partial
+      updates are merged into the queued document or update;
+    * a flush happens once ``max_ops`` operations are queued or the oldest
+      has waited ``max_delay_s``;
+    * every call returns a ``concurrent.futures.Future`` resolved with the
+      bulk item result (a delete of a missing document counts as success)
+      or failed with :class:`BulkIndexError`;
+    * ``wait=True`` is read-your-writes: it flushes straight away with
+      ``refresh="wait_for"``, so once the future resolves the change is
+      searchable – without forcing a refresh of the whole index.
+
+    The flusher thread starts on first use; :meth:`close` drains what is
+    still queued.
+    """
+
+    def __init__(
+        self,
+        es: "Elasticsearch",
+        max_ops: int = ES_BULK_MAX_OPS,
+        max_delay_s: float = ES_BULK_FLUSH_S,
+    ) -> None:
+        self.es = es
+        self.max_ops = max_ops
+        self.max_delay_s = max_delay_s
+        self._pending: Dict[Tuple[str, Any], List[_Op]] = {}
+        self._n_pending = 0
+        self._oldest = 0.0
+        self._wait_for = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    # ── public API ───────────────────────────────────────────────
+    def index(self, index: str, doc_id: Any, document: Dict[str, Any], *, wait: bool = False) -> Future:
+        return self._submit(index, doc_id, OP_INDEX, document, wait)
+
+    def update(self, index: str, doc_id: Any, partial: Dict[str, Any], *, wait: bool = False) -> Future:
+        return self._submit(index, doc_id, OP_UPDATE, partial, wait)
+
+    def delete(self, index: str, doc_id: Any, *, wait: bool = False) -> Future:
+        return self._submit(index, doc_id, OP_DELETE, None, wait)
+
+    def flush(self, wait_for: bool = False) -> None:
+        """Send everything queued now, from the calling thread."""
+        with self._cond:
+            batch, refresh = self._take()
+        if batch:
+            self._send(batch, "wait_for" if (wait_for or refresh) else None)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    # ── queueing ─────────────────────────────────────────────────
+    def _submit(self, index: str, doc_id: Any, action: str, source: Optional[Dict[str, Any]], wait: bool) -> Future:
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("bulk indexer is closed")
+            self._ensure_thread()
+            if not self._pending:
+                self._oldest = time.monotonic()
+            ops = self._pending.setdefault((index, doc_id), [])
+            self._n_pending -= len(ops)
+            self._coalesce(ops, action, source, future)
+            self._n_pending += len(ops)
+            self._wait_for = self._wait_for or wait
+            if wait or self._n_pending >= self.max_ops:
+                self._cond.notify()
+        return future
+
+    @staticmethod
+    def _coalesce(ops: List[_Op], action: str, source: Optional[Dict[str, Any]], future: Future) -> None:
+        last = ops[-1] if ops else None
+        if action == OP_UPDATE and last is not None and last.action in (OP_INDEX, OP_UPDATE):
+            last.source = _merge(last.source, source)
+            last.futures.append(future)
+            return
+        if action in (OP_INDEX, OP_DELETE) and ops:
+            # Supersedes the queued ones; their callers learn the final outcome
+            futures = [f for op in ops for f in op.futures]
+            ops.clear()
+            op = _Op(action, source, future)
+            op.futures[:0] = futures
+            ops.append(op)
+            return
+        # First op for this document, or an update after a queued delete
+        # (kept in order; ES will reject it exactly as it would have)
+        ops.append(_Op(action, source, future))
+
+    def _take(self) -> Tuple[Dict[Tuple[str, Any], List[_Op]], bool]:
+        batch, refresh = self._pending, self._wait_for
+        self._pending, self._n_pending, self._wait_for = {}, 0, False
+        return batch, refresh
+
+    # ── flushing ─────────────────────────────────────────────────
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="es-bulk-indexer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._wait_for or self._n_pending >= self.max_ops:
+                        break
+                    if self._pending:
+                        remaining = self._oldest + self.max_delay_s - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                batch, refresh = self._take()
+                closed = self._closed
+            if batch:
+                self._send(batch, "wait_for" if refresh else None)
+            if closed:
+                return
+
+    def _send(self, batch: Dict[Tuple[str, Any], List[_Op]], refresh: Optional[str]) -> None:
+        todo = [(key, op) for key, ops in batch.items() for op in ops]
+        for attempt in range(ES_BULK_MAX_RETRIES + 1):
+            body: List[Dict[str, Any]] = []
+            for (index, doc_id), op in todo:
+                body.append({op.action: {"_index": index, "_id": doc_id}})
+                if op.action == OP_INDEX:
+                    body.append(op.source)
+                elif op.action == OP_UPDATE:
+                    body.append({"doc": op.source})
+            try:
+                res = self.es.bulk(operations=body, refresh=refresh)
+            except Exception as exc:
+                if attempt < ES_BULK_MAX_RETRIES:
+                    time.sleep(ES_BULK_BACKOFF_S * 2 ** attempt)
+                    continue
+                logger.warning("ES bulk of %d operations failed: %s", len(todo), exc)
+                for _, op in todo:
+                    for f in op.futures:
+                        f.set_exception(exc)
+                return
+
+            retry = []
+            for (key, op), item in zip(todo, res["items"]):
+                result = next(iter(item.values()))
+                status = result.get("status", 500)
+                if status == 429 and attempt < ES_BULK_MAX_RETRIES:
+                    retry.append((key, op))
+                    continue
+                if status < 300 or (op.action == OP_DELETE and status == 404):
+                    for f in op.futures:
+                        f.set_result(result)
+                else:
+                    logger.warning("ES bulk %s %s/%s → %d %s", op.action, key[0], key[1], status, result.get("error"))
+                    err = BulkIndexError(status, result.get("error"))
+                    for f in op.futures:
+                        f.set_exception(err)
+            if not retry:
+                return
+            todo = retry
+            time.sleep(ES_BULK_BACKOFF_S * 2 ** attempt)
+
+es_indexer = BulkIndexer(es_client)
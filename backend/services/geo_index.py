@@ -0,0 +1,289 @@
+import logging
+import math
+import os
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from ..connection.mysqldb import Restaurant, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────────────────── Tunables ────────────────────────────────
+GEO_CELL_DEG: float = float(os.getenv("GEO_CELL_DEG", 0.01))        # ≈ 1.1 km N–S
+GEO_MERGE_PENDING: int = int(os.getenv("GEO_MERGE_PENDING", 256))   # inserts before re-sort
+
+EARTH_RADIUS_KM: float = 6371.0088
+
+# ───────────────────────────── Geometry ───────────────────────────────────────
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance from one point to many (vectorised)."""
+    p1, p2 = math.radians(lat), np.radians(lats)
+    dphi = p2 - p1
+    dlmb = np.radians(lons) - math.radians(lon)
+    a = np.sin(dphi / 2) ** 2 + math.cos(p1) * np.cos(p2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def bbox_for_radius(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """(south, west, north, east) enclosing the circle."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    coslat = max(math.cos(math.radians(lat)), 1e-6)
+    dlon = min(math.degrees(radius_km / (EARTH_RADIUS_KM * coslat)), 180.0)
+    return lat - dlat, lon - dlon, lat + dlat, lon + dlon
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def geohash(lat: float, lon: float, precision: int = 7) -> str:
+    """Standard base-32 geohash (precision 7 ≈ 150 m cells)."""
+    lat_rng, lon_rng = [-90.0, 90.0], [-180.0, 180.0]
+    out, bits, ch, even = [], 0, 0, True
+    while len(out) < precision:
+        rng, val = (lon_rng, lon) if even else (lat_rng, lat)
+        mid = (rng[0] + rng[1]) / 2
+        ch <<= 1
+        if val >= mid:
+            ch |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            out.append(_GEOHASH_ALPHABET[ch])
+            bits, ch = 0, 0
+    return "".join(out)
+
+# ───────────────────────────── Grid index ─────────────────────────────────────
+class GeoIndex:
+    """
+    Uniform lat/lon grid over NumPy arrays.
+
+    Points are sorted by cell key ``row * n_cols + col``, so the cells of one
+    grid row inside a bounding box form a contiguous slice found with two
+    ``searchsorted`` calls.  Candidates are then filtered by exact haversine
+    distance.  New restaurants go to a small pending buffer that is scanned
+    brute-force and merged once it grows past ``GEO_MERGE_PENDING``.
+    Inserts made while :meth:`build` reads its rows are also kept aside and
+    replayed onto the new arrays after the swap.
+    """
+
+    def __init__(self, cell_deg: float = GEO_CELL_DEG) -> None:
+        self.cell_deg = cell_deg
+        self.n_cols = int(math.ceil(360.0 / cell_deg))
+        self._keys = np.empty(0, dtype=np.int64)
+        self._lat = np.empty(0, dtype=np.float64)
+        self._lon = np.empty(0, dtype=np.float64)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._pending: List[Tuple[int, float, float]] = []
+        self._id_order: Optional[np.ndarray] = None     # argsort of _ids, built lazily
+        self._docs: Dict[int, Dict[str, Any]] = {}
+        self._added: Optional[List[Tuple[int, float, float, Dict[str, Any]]]] = None   # adds during build
+        self._lock = threading.RLock()
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # ── cell arithmetic ──────────────────────────────────────────
+    def _row(self, lat: np.ndarray | float) -> np.ndarray:
+        return np.floor((np.asarray(lat) + 90.0) / self.cell_deg).astype(np.int64)
+
+    def _col(self, lon: np.ndarray | float) -> np.ndarray:
+        return np.floor((np.asarray(lon) + 180.0) / self.cell_deg).astype(np.int64) % self.n_cols
+
+    def _cell_keys(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        return self._row(lats) * self.n_cols + self._col(lons)
+
+    # ── loading / updates ────────────────────────────────────────
+    def build(self, rows: Iterable[Tuple[int, float, float, Dict[str, Any]]]) -> None:
+        """
+        Replace the index with *rows* = [(r_id, lat, lon, doc), …]; *rows*
+        may be a lazy iterable (the DB read), adds made meanwhile are kept.
+        """
+        with self._lock:
+            self._added = []
+        try:
+            rows = [r for r in rows if r[1] is not None and r[2] is not None]
+            ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+            lat = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+            lon = np.fromiter((r[2] for r in rows), dtype=np.float64, count=len(rows))
+            keys = self._cell_keys(lat, lon)
+            order = np.argsort(keys, kind="stable")
+            docs = {int(r[0]): r[3] for r in rows}
+            with self._lock:
+                added, self._added = self._added, None
+                self._keys, self._lat, self._lon, self._ids = keys[order], lat[order], lon[order], ids[order]
+                self._pending = []
+                self._id_order = None
+                self._docs = docs
+                for row in added:
+                    self.add(*row)
+                self.ready = True
+        finally:
+            with self._lock:
+                self._added = None
+
+    def add(self, r_id: int, lat: float, lon: float, doc: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            if lat is None or lon is None:
+                return
+            if self._added is not None:
+                self._added.append((r_id, lat, lon, doc))
+            if r_id in self._docs:
+                return
+            self._docs[r_id] = doc or {}
+            self._pending.append((r_id, float(lat), float(lon)))
+            if len(self._pending) >= GEO_MERGE_PENDING:
+                self._merge_pending()
+
+    def _merge_pending(self) -> None:
+        ids = np.array([p[0] for p in self._pending], dtype=np.int64)
+        lat = np.array([p[1] for p in self._pending], dtype=np.float64)
+        lon = np.array([p[2] for p in self._pending], dtype=np.float64)
+        keys = np.concatenate([self._keys, self._cell_keys(lat, lon)])
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._lat = np.concatenate([self._lat, lat])[order]
+        self._lon = np.concatenate([self._lon, lon])[order]
+        self._ids = np.concatenate([self._ids, ids])[order]
+        self._pending = []
+        self._id_order = None
+
+    def max_id(self) -> int:
+        with self._lock:
+            return max(self._docs, default=0)
+
+    def doc(self, r_id: int) -> Dict[str, Any]:
+        return self._docs.get(r_id, {})
+
+    def coords(self, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(lats, lons) for *ids* (as returned by the queries)."""
+        with self._lock:
+            if self._pending:
+                self._merge_pending()
+            if self._id_order is None or self._id_order.size != self._ids.size:
+                self._id_order = np.argsort(self._ids, kind="stable")
+            pos = self._id_order[np.searchsorted(self._ids, ids, sorter=self._id_order)]
+            return self._lat[pos], self._lon[pos]
+
+    # ── queries ──────────────────────────────────────────────────
+    def _bbox_slices(self, south: float, west: float, north: float, east: float) -> np.ndarray:
+        """Positions (into the sorted arrays) of points in the cells touching the box."""
+        r0, r1 = int(self._row(max(south, -90.0))), int(self._row(min(north, 90.0 - 1e-9)))
+        if east - west >= 360.0:
+            col_ranges = [(0, self.n_cols - 1)]
+        else:
+            c0, c1 = int(self._col(west)), int(self._col(east))
+            # antimeridian: the column range wraps
+            col_ranges = [(c0, c1)] if c0 <= c1 else [(c0, self.n_cols - 1), (0, c1)]
+
+        lo_keys, hi_keys = [], []
+        for row in range(r0, r1 + 1):
+            base = row * self.n_cols
+            for c0, c1 in col_ranges:
+                lo_keys.append(base + c0)
+                hi_keys.append(base + c1)
+        lo = np.searchsorted(self._keys, np.asarray(lo_keys, dtype=np.int64), side="left")
+        hi = np.searchsorted(self._keys, np.asarray(hi_keys, dtype=np.int64), side="right")
+        spans = [np.arange(a, b) for a, b in zip(lo, hi) if b > a]
+        return np.concatenate(spans) if spans else np.empty(0, dtype=np.int64)
+
+    def _candidates(self, south: float, west: float, north: float, east: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(ids, lats, lons) of indexed + pending points near the box (superset)."""
+        with self._lock:
+            pos = self._bbox_slices(south, west, north, east)
+            ids, lat, lon = self._ids[pos], self._lat[pos], self._lon[pos]
+            if self._pending:
+                p = np.array(self._pending, dtype=np.float64).reshape(-1, 3)
+                ids = np.concatenate([ids, p[:, 0].astype(np.int64)])
+                lat = np.concatenate([lat, p[:, 1]])
+                lon = np.concatenate([lon, p[:, 2]])
+        return ids, lat, lon
+
+    def within(
+        self,
+        lat: float,
+        lon: float,
+        radius_km: float,
+        limit: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Restaurants within *radius_km*, nearest first.
+
+        Returns
+        -------
+        (ids, distances_km) – parallel int64 / float64 arrays.
+        """
+        ids, lats, lons = self._candidates(*bbox_for_radius(lat, lon, radius_km))
+        dist = haversine_km(lat, lon, lats, lons)
+        keep = dist <= radius_km
+        ids, dist = ids[keep], dist[keep]
+        if limit is not None and limit < dist.size:
+            part = np.argpartition(dist, limit - 1)[:limit]
+            ids, dist = ids[part], dist[part]
+        order = np.argsort(dist, kind="stable")
+        return ids[order], dist[order]
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        k: int,
+        max_km: float = 50.0,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        *k* nearest restaurants (at most *max_km* away).  The search radius
+        doubles from one cell until *k* hits fall inside it, so dense areas
+        never touch more than a few cells.
+        """
+        radius = min(self.cell_deg * 111.0, max_km)
+        while True:
+            ids, dist = self.within(lat, lon, radius, limit=k)
+            if ids.size >= k or radius >= max_km:
+                return ids, dist
+            radius = min(radius * 2, max_km)
+
+    def in_bbox(self, south: float, west: float, north: float, east: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(ids, lats, lons) strictly inside the box."""
+        ids, lats, lons = self._candidates(south, west, north, east)
+        in_lon = (lons >= west) & (lons <= east) if west <= east else (lons >= west) | (lons <= east)
+        keep = (lats >= south) & (lats <= north) & in_lon
+        return ids[keep], lats[keep], lons[keep]
+
+restaurant_geo_index = GeoIndex()
+
+def _geo_rows(batch_size: int, after_id: int = 0) -> Iterator[Tuple[int, float, float, Dict[str, Any]]]:
+    db = SessionLocal()
+    try:
+        stmt = select(
+            Restaurant.restaurant_id,
+            Restaurant.latitude,
+            Restaurant.longitude,
+            Restaurant.name,
+            Restaurant.cuisine_type,
+            Restaurant.location,
+        ).where(Restaurant.restaurant_id > after_id)
+        result = db.execute(stmt.execution_options(stream_results=True, yield_per=batch_size))
+        for r_id, lat, lon, name, cuisine, addr in result:
+            yield r_id, lat, lon, {"name": name, "categories": cuisine or "", "address": addr or ""}
+    finally:
+        db.close()
+
+def load_geo_index(batch_size: int = 5000) -> int:
+    """Build :data:`restaurant_geo_index` from MySQL (server-side cursor)."""
+    restaurant_geo_index.build(_geo_rows(batch_size))
+    logger.info("Restaurant geo index ready: %d points", len(restaurant_geo_index))
+    return len(restaurant_geo_index)
+
+def refresh_geo_index(batch_size: int = 5000) -> int:
+    """
+    Add restaurants inserted since the index was built (a worker forked
+    from the preloading master inherits the master's copy).
+    """
+    n = 0
+    for row in _geo_rows(batch_size, restaurant_geo_index.max_id()):
+        n += 1
+        restaurant_geo_index.add(*row)
+    return n
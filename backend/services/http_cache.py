@@ -0,0 +1,99 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# ───────────────────────────────────── Tunables ────────────────────────────────
+RESPONSE_CACHE_TTL_S: float = float(os.getenv("RESPONSE_CACHE_TTL_S", 30))
+RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 4096))
+
+# ───────────────────────────── Validators ─────────────────────────────────────
+def make_etag(*parts: Any) -> str:
+    """
+    Weak ETag derived from everything the payload depends on (state ids,
+    counters, revisions, …).  Same inputs → same validator.
+    """
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    return f'W/"{hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    if "*" in candidates:
+        return True
+    # Weak comparison: W/"x" and "x" are equivalent
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return etag in candidates or bare in candidates
+
+# ───────────────────────────── Response cache ─────────────────────────────────
+class TTLCache:
+    """Small thread-safe LRU with per-entry expiry."""
+
+    def __init__(self, ttl_s: float = RESPONSE_CACHE_TTL_S, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_s, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+response_cache = TTLCache()
+
+# ───────────────────────────── Route helper ───────────────────────────────────
+def conditional_json(
+    etag: str,
+    if_none_match: Optional[str],
+    build: Callable[[], Any],
+) -> Response:
+    """
+    Answer **304** when the client already holds *etag*; otherwise serve the
+    payload from the short-lived cache or call *build* (the heavy part).
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    payload = response_cache.get(etag)
+    if payload is None:
+        payload = jsonable_encoder(build())
+        response_cache.set(etag, payload)
+    return JSONResponse(content=payload, headers=headers)
+
+def fresh_json(etag: Callable[[], str], build: Callable[[], Any]) -> Response:
+    """
+    Always call *build* – no 304, no cached payload – for forced recomputes.
+    The validator is taken afterwards, since *build* may assign the state
+    ids it is derived from; the fresh payload is cached under it.
+    """
+    payload = jsonable_encoder(build())
+    tag = etag()
+    response_cache.set(tag, payload)
+    return JSONResponse(content=payload, headers={"ETag": tag, "Cache-Control": "private, no-cache"})
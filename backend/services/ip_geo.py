@@ -0,0 +1,192 @@
+import csv
+import hashlib
+import ipaddress
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+import requests
+
+from .http_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────────────────── Tunables ────────────────────────────────
+# CSV range table, e.g. DB-IP "IP to City Lite" or IP2Location LITE DB5:
+#   ip_start, ip_end, …, latitude, longitude
+# Columns are found by header name (ip_start/start_ip/ip_from, latitude/lat, …);
+# without a header the first two columns are the range and the last two lat/lon.
+# The table is not shipped (licence, size); mount one and point IP_GEO_DB at it.
+IP_GEO_DB: str = os.getenv(
+    "IP_GEO_DB", os.path.join(os.path.dirname(__file__), "..", "assets", "ip_ranges.csv")
+)
+# Compiled .npz sidecars are derived data: kept out of the source tree
+IP_GEO_CACHE_DIR: str = os.getenv("IP_GEO_CACHE_DIR", os.path.join(tempfile.gettempdir(), "mangoberry-ip-geo"))
+IP_GEO_LRU_SIZE: int = int(os.getenv("IP_GEO_LRU_SIZE", 65536))
+IP_GEO_LRU_TTL_S: float = float(os.getenv("IP_GEO_LRU_TTL_S", 86400))
+# Online lookup for addresses the table does not cover (or when there is no
+# table) – the service the app used before; set to "" to stay offline
+IP_GEO_HTTP_URL: str = os.getenv("IP_GEO_HTTP_URL", "http://ip-api.com/json/{ip}")
+IP_GEO_HTTP_TIMEOUT_S: float = float(os.getenv("IP_GEO_HTTP_TIMEOUT_S", 0.5))
+
+_START_COLS = ("ip_start", "start_ip", "ip_from", "network_start", "start")
+_END_COLS = ("ip_end", "end_ip", "ip_to", "network_end", "end")
+_LAT_COLS = ("latitude", "lat")
+_LON_COLS = ("longitude", "lon", "lng")
+
+# ───────────────────────────── Range table ────────────────────────────────────
+class IpRangeTable:
+    """
+    IPv4 ranges as three sorted NumPy arrays (start, end, row) plus lat/lon
+    columns.  A lookup is one ``searchsorted`` over ``start``.
+    """
+
+    def __init__(self) -> None:
+        self.start = np.empty(0, dtype=np.uint32)
+        self.end = np.empty(0, dtype=np.uint32)
+        self.lat = np.empty(0, dtype=np.float32)
+        self.lon = np.empty(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return int(self.start.size)
+
+    @staticmethod
+    def _ip_int(value: str) -> Optional[int]:
+        value = value.strip()
+        if value.isdigit():
+            return int(value)
+        try:
+            addr = ipaddress.ip_address(value)
+        except ValueError:
+            return None
+        return int(addr) if addr.version == 4 else None
+
+    def load_csv(self, path: str) -> None:
+        starts, ends, lats, lons = [], [], [], []
+        with open(path, newline="", encoding="utf-8") as fh:
+            reader = csv.reader(fh)
+            first = next(reader, None)
+            if first is None:
+                return
+            header = [c.strip().lower() for c in first]
+            if any(c in header for c in _START_COLS):
+                pick = lambda names, default: next((header.index(n) for n in names if n in header), default)
+                i_s, i_e = pick(_START_COLS, 0), pick(_END_COLS, 1)
+                i_lat, i_lon = pick(_LAT_COLS, -2), pick(_LON_COLS, -1)
+                rows = reader
+            else:
+                i_s, i_e, i_lat, i_lon = 0, 1, -2, -1
+                rows = [first, *reader]
+            for row in rows:
+                s, e = self._ip_int(row[i_s]), self._ip_int(row[i_e])
+                if s is None or e is None:
+                    continue                        # IPv6 rows of mixed files
+                try:
+                    lat, lon = float(row[i_lat]), float(row[i_lon])
+                except (ValueError, IndexError):
+                    continue
+                starts.append(s)
+                ends.append(e)
+                lats.append(lat)
+                lons.append(lon)
+
+        order = np.argsort(np.asarray(starts, dtype=np.uint32), kind="stable")
+        self.start = np.asarray(starts, dtype=np.uint32)[order]
+        self.end = np.asarray(ends, dtype=np.uint32)[order]
+        self.lat = np.asarray(lats, dtype=np.float32)[order]
+        self.lon = np.asarray(lons, dtype=np.float32)[order]
+
+    def load_npz(self, path: str) -> None:
+        with np.load(path) as data:
+            self.start, self.end = data["start"], data["end"]
+            self.lat, self.lon = data["lat"], data["lon"]
+
+    def save_npz(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, start=self.start, end=self.end, lat=self.lat, lon=self.lon)
+        os.replace(tmp, path)
+
+    def lookup(self, ip_int: int) -> Optional[Dict[str, float]]:
+        pos = int(np.searchsorted(self.start, ip_int, side="right")) - 1
+        if pos < 0 or ip_int > int(self.end[pos]):
+            return None
+        return {"lat": round(float(self.lat[pos]), 5), "lon": round(float(self.lon[pos]), 5)}
+
+_table = IpRangeTable()
+_load_lock = threading.Lock()
+_loaded = False
+
+def _compiled_path(path: str) -> str:
+    key = hashlib.blake2b(os.path.abspath(path).encode(), digest_size=8).hexdigest()
+    return os.path.join(IP_GEO_CACHE_DIR, f"{os.path.basename(path)}.{key}.npz")
+
+def load_ip_table(path: str = IP_GEO_DB) -> int:
+    """
+    Load the range table, preferring its compiled ``.npz`` in
+    ``IP_GEO_CACHE_DIR`` when that is newer than the CSV (milliseconds
+    instead of a CSV parse).
+    """
+    global _loaded
+    with _load_lock:
+        compiled = _compiled_path(path)
+        if not os.path.exists(path):
+            logger.warning(
+                "IP geolocation table %s not found; %s", path,
+                "using the HTTP lookup" if IP_GEO_HTTP_URL else "IP lookups disabled",
+            )
+        elif os.path.exists(compiled) and os.path.getmtime(compiled) >= os.path.getmtime(path):
+            _table.load_npz(compiled)
+        else:
+            _table.load_csv(path)
+            try:
+                _table.save_npz(compiled)
+            except OSError as exc:
+                logger.warning("Could not write %s (%s)", compiled, exc)
+        _loaded = True
+        _hits.clear()
+    logger.info("IP geolocation table ready: %d ranges", len(_table))
+    return len(_table)
+
+# ───────────────────────────── Lookup ─────────────────────────────────────────
+_http = requests.Session()
+
+def _lookup_http(ip: str) -> Optional[Dict[str, float]]:
+    try:
+        resp = _http.get(IP_GEO_HTTP_URL.format(ip=ip), timeout=IP_GEO_HTTP_TIMEOUT_S)
+        data = resp.json()
+    except (requests.RequestException, ValueError) as exc:
+        logger.debug("GeoIP HTTP fallback failed for %s: %s", ip, exc)
+        return None
+    if data.get("status", "success") == "success" and "lat" in data and "lon" in data:
+        return {"lat": float(data["lat"]), "lon": float(data["lon"])}
+    return None
+
+# Successful lookups only: a failed or timed-out HTTP call is retried next time
+_hits = TTLCache(ttl_s=IP_GEO_LRU_TTL_S, max_entries=IP_GEO_LRU_SIZE)
+
+def _lookup(ip: str) -> Optional[Dict[str, float]]:
+    hit = _hits.get(ip)
+    if hit is not None:
+        return hit
+    ip_int = IpRangeTable._ip_int(ip)
+    hit = _table.lookup(ip_int) if ip_int is not None and len(_table) else None
+    if hit is None and IP_GEO_HTTP_URL:
+        hit = _lookup_http(ip)
+    if hit is not None:
+        _hits.set(ip, hit)
+    return hit
+
+def get_location_from_ip(ip: str) -> Optional[Dict[str, float]]:
+    """
+    ``{"lat", "lon"}`` of *ip*, or None when unknown.  Served from the local
+    range table when one is mounted, otherwise (or on a miss) from the HTTP
+    service with a strict timeout; successful answers are cached.
+    """
+    if not _loaded:
+        load_ip_table()
+    hit = _lookup(ip)
+    return dict(hit) if hit else None
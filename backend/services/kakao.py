@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import math
+import os
+import time
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException
+
+from ..connection.mongodb import geocode_cache_collection
+from .http_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────────────────── Tunables ────────────────────────────────
+KAKAO_KEY: Optional[str] = os.getenv("KAKAO_MAP_APP_KEY")              # REST API key
+KAKAO_API_BASE: str = os.getenv("KAKAO_API_BASE", "https://dapi.kakao.com")
+KAKAO_TIMEOUT_S: float = float(os.getenv("KAKAO_TIMEOUT_S", 3.0))
+KAKAO_MAX_CONNECTIONS: int = int(os.getenv("KAKAO_MAX_CONNECTIONS", 20))
+KAKAO_MAX_RETRIES: int = int(os.getenv("KAKAO_MAX_RETRIES", 3))
+KAKAO_BACKOFF_BASE_S: float = float(os.getenv("KAKAO_BACKOFF_BASE_S", 0.25))
+KAKAO_SEARCH_TTL_S: float = float(os.getenv("KAKAO_SEARCH_TTL_S", 600))
+KAKAO_COORD_DECIMALS: int = int(os.getenv("KAKAO_COORD_DECIMALS", 5))   # ≈ 1 m
+KAKAO_NEGATIVE_TTL_S: float = float(os.getenv("KAKAO_NEGATIVE_TTL_S", 86400))   # "no result" answers
+
+KAKAO_PAGE_SIZE: int = 15          # Kakao's fixed keyword-search page size
+KAKAO_MAX_PAGES: int = 3           # pages ≥ 4 repeat page 3
+
+KEYWORD_PATH = "/v2/local/search/keyword.json"
+ADDRESS_PATH = "/v2/local/search/address.json"
+COORD2ADDR_PATH = "/v2/local/geo/coord2address.json"
+
+def normalize_keyword(text: str) -> str:
+    """Cache key form of a search term: NFC, lower-case, single spaces."""
+    return " ".join(unicodedata.normalize("NFC", text or "").lower().split())
+
+# ───────────────────────────── Rate limiting ──────────────────────────────────
+class RateLimiter:
+    """Token bucket shared by all coroutines of one event loop."""
+
+    def __init__(self, rate_per_s: float, burst: int = 1) -> None:
+        self.rate = rate_per_s
+        self.capacity = max(burst, 1)
+        self._tokens = float(self.capacity)
+        self._stamp = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+# ───────────────────────────── Client ─────────────────────────────────────────
+class KakaoClient:
+    """
+    Kakao Local API over one keep-alive ``httpx.AsyncClient``.
+
+    * keyword page 1 decides how many more pages exist; those are fetched
+      concurrently, and every page is cached (TTL) per (normalised
+      keyword, page);
+    * geocoding results are cached persistently in Mongo, keyed by the
+      normalised address or by coordinates rounded to
+      ``KAKAO_COORD_DECIMALS``; misses expire after
+      ``KAKAO_NEGATIVE_TTL_S`` (``expireAt`` + TTL index);
+    * 429 / 5xx answers are retried with exponential backoff, honouring
+      ``Retry-After``;
+    * an optional :class:`RateLimiter` paces every outgoing request (bulk
+      crawls), and *transport* lets scripts replay recorded responses.
+    """
+
+    def __init__(
+        self,
+        base_url: str = KAKAO_API_BASE,
+        api_key: Optional[str] = KAKAO_KEY,
+        *,
+        rate_limiter: Optional[RateLimiter] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.base_url = base_url
+        self.api_key = api_key
+        self.rate_limiter = rate_limiter
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._search_cache = TTLCache(ttl_s=KAKAO_SEARCH_TTL_S, max_entries=4096)
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"KakaoAK {self.api_key}"},
+                timeout=httpx.Timeout(KAKAO_TIMEOUT_S),
+                limits=httpx.Limits(
+                    max_connections=KAKAO_MAX_CONNECTIONS,
+                    max_keepalive_connections=KAKAO_MAX_CONNECTIONS,
+                ),
+                transport=self.transport,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _get(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET with rate-limit-aware retries; raises HTTPException on failure."""
+        for attempt in range(KAKAO_MAX_RETRIES + 1):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            try:
+                res = await self._http().get(path, params=params)
+            except httpx.TransportError as exc:
+                if attempt == KAKAO_MAX_RETRIES:
+                    raise HTTPException(502, f"Kakao API unreachable → {exc!s}")
+                await asyncio.sleep(KAKAO_BACKOFF_BASE_S * 2 ** attempt)
+                continue
+
+            if res.status_code == 429 or res.status_code >= 500:
+                if attempt == KAKAO_MAX_RETRIES:
+                    raise HTTPException(res.status_code, f"Kakao API error → {res.text}")
+                retry_after = res.headers.get("Retry-After", "")
+                delay = float(retry_after) if retry_after.isdigit() else KAKAO_BACKOFF_BASE_S * 2 ** attempt
+                logger.info("Kakao %s → %d, retrying in %.2fs", path, res.status_code, delay)
+                await asyncio.sleep(delay)
+                continue
+            if res.status_code >= 400:
+                raise HTTPException(res.status_code, f"Kakao API error → {res.text}")
+            return res.json()
+        raise AssertionError("unreachable")
+
+    # ── keyword search ───────────────────────────────────────────
+    async def _keyword_page(self, keyword: str, page: int) -> Dict[str, Any]:
+        key = f"{keyword}\x00{page}"
+        data = self._search_cache.get(key)
+        if data is None:
+            data = await self._get(KEYWORD_PATH, {"query": keyword, "page": page})
+            self._search_cache.set(key, data)
+        return data
+
+    async def search_places(self, keyword: str, max_pages: int = KAKAO_MAX_PAGES) -> List[Dict[str, Any]]:
+        """
+        Up to ``15 × max_pages`` raw place documents for *keyword*.
+
+        Page 1 comes first; its ``meta.pageable_count`` says how many more
+        pages exist, and only those are requested (concurrently), so a
+        query that fits on one page costs one call.
+        """
+        keyword = normalize_keyword(keyword)
+        max_pages = min(max_pages, KAKAO_MAX_PAGES)
+        first = await self._keyword_page(keyword, 1)
+
+        pageable = int(first.get("meta", {}).get("pageable_count", 0))
+        n_pages = min(max_pages, max(1, math.ceil(pageable / KAKAO_PAGE_SIZE)))
+        rest = await asyncio.gather(*(self._keyword_page(keyword, p) for p in range(2, n_pages + 1)))
+        results: List[Dict[str, Any]] = []
+        for data in (first, *rest):
+            results.extend(data.get("documents", []))
+        return results
+
+    # ── geocoding (persistent cache) ─────────────────────────────
+    @staticmethod
+    def _cache_read(kind: str, key: str) -> Tuple[bool, Any]:
+        doc = geocode_cache_collection.find_one({"kind": kind, "key": key}, {"_id": 0, "value": 1, "expireAt": 1})
+        if doc is None:
+            return False, None
+        # The TTL monitor only runs once a minute
+        expire_at = doc.get("expireAt")
+        if expire_at is not None and expire_at.replace(tzinfo=timezone.utc) <= datetime.now(timezone.utc):
+            return False, None
+        return True, doc["value"]
+
+    @staticmethod
+    def _cache_write(kind: str, key: str, value: Any) -> None:
+        """Hits are kept for good; misses expire (the address may be added later)."""
+        update: Dict[str, Any] = {"$set": {"value": value, "updated_at": time.time()}}
+        if value is None:
+            update["$set"]["expireAt"] = datetime.now(timezone.utc) + timedelta(seconds=KAKAO_NEGATIVE_TTL_S)
+        else:
+            update["$unset"] = {"expireAt": ""}
+        geocode_cache_collection.update_one({"kind": kind, "key": key}, update, upsert=True)
+
+    async def geocode(self, address: str) -> Optional[Tuple[float, float]]:
+        """Road / jibun address → (lat, lon)."""
+        key = normalize_keyword(address)
+        hit, value = await asyncio.to_thread(self._cache_read, "address", key)
+        if hit:
+            return tuple(value) if value else None
+
+        docs = (await self._get(ADDRESS_PATH, {"query": address})).get("documents")
+        coords = (float(docs[0]["y"]), float(docs[0]["x"])) if docs else None
+        await asyncio.to_thread(self._cache_write, "address", key, list(coords) if coords else None)
+        return coords
+
+    async def reverse_geocode(self, lat: float, lon: float) -> Optional[str]:
+        """(lat, lon) → road address (jibun address when there is none)."""
+        key = f"{round(lat, KAKAO_COORD_DECIMALS)},{round(lon, KAKAO_COORD_DECIMALS)}"
+        hit, value = await asyncio.to_thread(self._cache_read, "coord", key)
+        if hit:
+            return value
+
+        docs = (await self._get(COORD2ADDR_PATH, {"x": lon, "y": lat})).get("documents")
+        address = None
+        if docs:
+            road = docs[0].get("road_address") or docs[0].get("address")
+            address = road["address_name"] if road else None
+        await asyncio.to_thread(self._cache_write, "coord", key, address)
+        return address
+
+def ensure_indexes() -> None:
+    geocode_cache_collection.create_index([("kind", 1), ("key", 1)], unique=True)
+    geocode_cache_collection.create_index("expireAt", expireAfterSeconds=0)
+
+kakao_client = KakaoClient()
@@ -0,0 +1,174 @@
+import math
+import os
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from ..connection.mongodb import counters_collection
+from .counters import SCOPE_RESTAURANT
+from .geo_index import restaurant_geo_index
+from .http_cache import TTLCache
+
+# ───────────────────────────────────── Tunables ────────────────────────────────
+MAP_TILE_TTL_S: float = float(os.getenv("MAP_TILE_TTL_S", 300))
+MAP_CLUSTER_SUBDIV: int = int(os.getenv("MAP_CLUSTER_SUBDIV", 2))     # 2 → 4×4 clusters per tile
+MAP_MAX_TILES: int = int(os.getenv("MAP_MAX_TILES", 64))
+MAP_PERSONALISE_MAX: int = int(os.getenv("MAP_PERSONALISE_MAX", 50))   # scored top items per viewport
+MAP_MAX_ZOOM: int = 20
+
+_tile_cache = TTLCache(ttl_s=MAP_TILE_TTL_S, max_entries=8192)
+_popularity_cache = TTLCache(ttl_s=MAP_TILE_TTL_S, max_entries=1)
+
+# ───────────────────────────── Web-Mercator tiles ─────────────────────────────
+def _lat_clip(lat: float) -> float:
+    return max(min(lat, 85.05112878), -85.05112878)
+
+def tile_of(lat: float, lon: float, z: int) -> Tuple[int, int]:
+    """Slippy-map (x, y) of the tile containing the point at zoom *z*."""
+    n = 1 << z
+    lat_r = math.radians(_lat_clip(lat))
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(lat_r)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(south, west, north, east) of tile z/x/y."""
+    n = 1 << z
+    west = x / n * 360.0 - 180.0
+    east = (x + 1) / n * 360.0 - 180.0
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return south, west, north, east
+
+def check_bbox(south: float, west: float, north: float, east: float) -> None:
+    """Raise ``ValueError`` for non-finite, out-of-range or inverted boxes."""
+    if not all(math.isfinite(v) for v in (south, west, north, east)):
+        raise ValueError("bounding box must be finite")
+    if not (-90.0 <= south <= north <= 90.0 and -180.0 <= west <= east <= 180.0):
+        raise ValueError("bounding box is inverted or out of range")
+
+def tile_span(south: float, west: float, north: float, east: float, z: int) -> int:
+    """Number of tiles covering the box at zoom *z*, without listing them."""
+    x0, y0 = tile_of(north, west, z)
+    x1, y1 = tile_of(south, east, z)
+    return (x1 - x0 + 1) * (y1 - y0 + 1)
+
+def fit_zoom(south: float, west: float, north: float, east: float, z: int, max_tiles: int = MAP_MAX_TILES) -> int:
+    """Highest zoom ≤ *z* at which the box spans at most *max_tiles* tiles."""
+    z = min(max(z, 0), MAP_MAX_ZOOM)
+    while z > 0 and tile_span(south, west, north, east, z) > max_tiles:
+        z -= 1
+    return z
+
+def tiles_for_bbox(
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    z: int,
+    max_tiles: int = MAP_MAX_TILES,
+) -> List[Tuple[int, int]]:
+    """
+    Tiles covering a validated box.  The span is checked arithmetically
+    before anything is listed; pick *z* with ``fit_zoom`` first.
+    """
+    check_bbox(south, west, north, east)
+    span = tile_span(south, west, north, east, z)
+    if span > max(max_tiles, 1):
+        raise ValueError(f"bounding box spans {span} tiles at zoom {z} (max {max_tiles})")
+    x0, y0 = tile_of(north, west, z)
+    x1, y1 = tile_of(south, east, z)
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+# ───────────────────────────── Tile building ──────────────────────────────────
+def _review_counts() -> Dict[int, int]:
+    """{r_id: reviews} for every reviewed restaurant (cached with the tiles)."""
+    counts = _popularity_cache.get("reviews")
+    if counts is None:
+        cursor = counters_collection.find(
+            {"scope": SCOPE_RESTAURANT, "reviews": {"$gt": 0}},
+            {"_id": 0, "id": 1, "reviews": 1},
+        )
+        counts = {doc["id"]: int(doc["reviews"]) for doc in cursor}
+        _popularity_cache.set("reviews", counts)
+    return counts
+
+def _build_tile(z: int, x: int, y: int) -> List[Dict[str, Any]]:
+    ids, lats, lons = restaurant_geo_index.in_bbox(*tile_bounds(z, x, y))
+    if ids.size == 0:
+        return []
+
+    # Cluster = sub-tile at zoom z + MAP_CLUSTER_SUBDIV, addressed inside this tile
+    sub = 1 << MAP_CLUSTER_SUBDIV
+    n = 1 << (z + MAP_CLUSTER_SUBDIV)
+    lat_r = np.radians(np.clip(lats, -85.05112878, 85.05112878))
+    sx = np.clip(((lons + 180.0) / 360.0 * n).astype(np.int64) - x * sub, 0, sub - 1)
+    sy = np.clip(((1.0 - np.arcsinh(np.tan(lat_r)) / np.pi) / 2.0 * n).astype(np.int64) - y * sub, 0, sub - 1)
+    cell, inverse = np.unique(sy * sub + sx, return_inverse=True)
+
+    counts = np.bincount(inverse)
+    c_lat = np.bincount(inverse, weights=lats) / counts
+    c_lon = np.bincount(inverse, weights=lons) / counts
+
+    # Top item per cluster: most reviewed, ties → lowest id
+    reviews = _review_counts()
+    pop = np.fromiter((reviews.get(int(i), 0) for i in ids), dtype=np.int64, count=ids.size)
+    order = np.lexsort((ids, -pop, inverse))
+    first = np.searchsorted(inverse[order], np.arange(cell.size))
+    top_pos = order[first]
+
+    clusters = []
+    for c in range(cell.size):
+        p = top_pos[c]
+        r_id = int(ids[p])
+        doc = restaurant_geo_index.doc(r_id)
+        clusters.append({
+            "tile":  f"{z + MAP_CLUSTER_SUBDIV}/{x * sub + int(cell[c] % sub)}/{y * sub + int(cell[c] // sub)}",
+            "count": int(counts[c]),
+            "lat":   float(c_lat[c]),
+            "lon":   float(c_lon[c]),
+            "top": {
+                "restaurant_id": r_id,
+                "name":       doc.get("name"),
+                "categories": doc.get("categories", ""),
+                "x": float(lons[p]),
+                "y": float(lats[p]),
+                "reviews": int(pop[p]),
+            },
+        })
+    return clusters
+
+def get_tile(z: int, x: int, y: int) -> List[Dict[str, Any]]:
+    """Non-personalised clusters of one tile, cached by (z, x, y)."""
+    key = f"{z}/{x}/{y}"
+    clusters = _tile_cache.get(key)
+    if clusters is None:
+        clusters = _build_tile(z, x, y)
+        _tile_cache.set(key, clusters)
+    return clusters
+
+def viewport_clusters(
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    zoom: int,
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    ``(z, clusters)``: clusters of every tile covering the viewport, built
+    at zoom *z*.  The zoom is lowered from *zoom* until the viewport spans
+    at most ``MAP_MAX_TILES`` tiles (counted, not listed), so oversized
+    boxes degrade to coarser clusters instead of more work.  Raises
+    ``ValueError`` for an invalid box.
+    """
+    check_bbox(south, west, north, east)
+    z = fit_zoom(south, west, north, east, zoom)
+    tiles = tiles_for_bbox(south, west, north, east, z)
+
+    out: List[Dict[str, Any]] = []
+    for x, y in tiles:
+        out.extend(
+            c for c in get_tile(z, x, y)
+            if south <= c["lat"] <= north and west <= c["lon"] <= east
+        )
+    return z, out
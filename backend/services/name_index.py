@@ -0,0 +1,172 @@
+import logging
+import threading
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from ..connection.mysqldb import Restaurant, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────────── Hangul normalisation ───────────────────────────
+# Syllables are split into compatibility jamo, and compound jamo into their
+# parts, so a half-typed syllable is a prefix of the full one:
+#   "붖" → ㅂㅜㅈ  ⊂  "부자" → ㅂㅜㅈㅏ
+_CHO = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONG = " ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"
+_COMPOUND = {
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ",
+    "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ", "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ",
+    "ㅄ": "ㅂㅅ", "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ",
+    "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+}
+_HANGUL_BASE, _HANGUL_LAST = 0xAC00, 0xD7A3
+
+def _decompose_char(ch: str) -> str:
+    code = ord(ch)
+    if _HANGUL_BASE <= code <= _HANGUL_LAST:
+        code -= _HANGUL_BASE
+        cho, jung, jong = code // 588, (code % 588) // 28, code % 28
+        parts = _CHO[cho] + _JUNG[jung] + (_JONG[jong] if jong else "")
+        return "".join(_COMPOUND.get(p, p) for p in parts)
+    return _COMPOUND.get(ch, ch)
+
+def normalize(text: str) -> str:
+    """Lower-case, whitespace-free, jamo-decomposed search key."""
+    text = unicodedata.normalize("NFC", text or "").lower()
+    return "".join(_decompose_char(ch) for ch in text if not ch.isspace())
+
+# ───────────────────────────── Prefix index ───────────────────────────────────
+class PrefixIndex:
+    """
+    Sorted-array prefix index over restaurant names.
+
+    Every whitespace token start of a name is indexed, so "강남" finds
+    "멘노야지 강남본점".  Lookups are one ``bisect`` plus a short forward
+    scan; inserts are a bisect + list insert (rare – only ``add_restaurant``).
+    Inserts made while :meth:`build` reads its rows go to the live index and
+    to a side buffer that is replayed onto the new arrays after the swap.
+    """
+
+    def __init__(self) -> None:
+        self._keys: List[str] = []
+        self._ids: List[int] = []
+        self._docs: Dict[int, Dict[str, Any]] = {}
+        self._full: Dict[int, str] = {}         # r_id → key of the whole name
+        self._added: Optional[List[Tuple[int, str, Optional[str]]]] = None   # adds during build
+        self._lock = threading.RLock()
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    @staticmethod
+    def _keys_for(name: str) -> List[str]:
+        tokens = (name or "").split()
+        keys = {normalize(" ".join(tokens[i:])) for i in range(len(tokens))}
+        return [k for k in keys if k]
+
+    def build(self, rows: Iterable[Tuple[int, str, Optional[str]]]) -> None:
+        """
+        Replace the index with *rows* = [(r_id, name, address), …]; *rows*
+        may be a lazy iterable (the DB read), adds made meanwhile are kept.
+        """
+        with self._lock:
+            self._added = []
+        pairs: List[Tuple[str, int]] = []
+        docs: Dict[int, Dict[str, Any]] = {}
+        full: Dict[int, str] = {}
+        try:
+            for r_id, name, address in rows:
+                if not name:
+                    continue
+                docs[r_id] = {"restaurant_id": r_id, "name": name, "address": address}
+                full[r_id] = normalize(name)
+                pairs.extend((key, r_id) for key in self._keys_for(name))
+            pairs.sort()
+            with self._lock:
+                added, self._added = self._added, None
+                self._keys = [k for k, _ in pairs]
+                self._ids = [i for _, i in pairs]
+                self._docs = docs
+                self._full = full
+                for r_id, name, address in added:
+                    self.add(r_id, name, address)
+                self.ready = True
+        finally:
+            with self._lock:
+                self._added = None
+
+    def add(self, r_id: int, name: str, address: Optional[str] = None) -> None:
+        with self._lock:
+            if self._added is not None:
+                self._added.append((r_id, name, address))
+            if r_id in self._docs:
+                return
+            self._docs[r_id] = {"restaurant_id": r_id, "name": name, "address": address}
+            self._full[r_id] = normalize(name)
+            for key in self._keys_for(name):
+                pos = bisect_left(self._keys, key)
+                self._keys.insert(pos, key)
+                self._ids.insert(pos, r_id)
+
+    def max_id(self) -> int:
+        with self._lock:
+            return max(self._docs, default=0)
+
+    def search(self, query: str, size: int = 10, scan_limit: int = 2000) -> List[Dict[str, Any]]:
+        """
+        Up to *size* restaurants whose name (or a later word of it) starts
+        with *query*.  Whole-name prefix matches rank first, then shorter
+        names.
+        """
+        q = normalize(query)
+        if not q:
+            return []
+        with self._lock:
+            pos = bisect_left(self._keys, q)
+            seen: Dict[int, bool] = {}
+            end = min(len(self._keys), pos + scan_limit)
+            while pos < end and self._keys[pos].startswith(q):
+                r_id = self._ids[pos]
+                seen[r_id] = seen.get(r_id, False) or self._full[r_id].startswith(q)
+                pos += 1
+            docs = self._docs
+
+        ranked = sorted(
+            seen.items(),
+            key=lambda kv: (not kv[1], len(docs[kv[0]]["name"]), kv[0]),
+        )
+        return [dict(docs[r_id]) for r_id, _ in ranked[:size]]
+
+restaurant_name_index = PrefixIndex()
+
+def _name_rows(batch_size: int, after_id: int = 0) -> Iterator[Tuple[int, str, Optional[str]]]:
+    db = SessionLocal()
+    try:
+        stmt = (
+            select(Restaurant.restaurant_id, Restaurant.name, Restaurant.location)
+            .where(Restaurant.restaurant_id > after_id)
+        )
+        for r in db.execute(stmt.execution_options(stream_results=True, yield_per=batch_size)):
+            yield tuple(r)
+    finally:
+        db.close()
+
+def load_name_index(batch_size: int = 5000) -> int:
+    """Build :data:`restaurant_name_index` from MySQL (server-side cursor)."""
+    restaurant_name_index.build(_name_rows(batch_size))
+    logger.info("Restaurant name index ready: %d names", len(restaurant_name_index))
+    return len(restaurant_name_index)
+
+def refresh_name_index(batch_size: int = 5000) -> int:
+    """Add restaurants inserted since the index was built (see refresh_geo_index)."""
+    n = 0
+    for r_id, name, address in _name_rows(batch_size, restaurant_name_index.max_id()):
+        n += 1
+        if name:
+            restaurant_name_index.add(r_id, name, address)
+    return n
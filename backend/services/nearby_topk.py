@@ -0,0 +1,204 @@
+import base64
+import heapq
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from ..connection.mongodb import restaurant_keywords_collection, user_keywords_collection
+from .calc_score import (
+    EMBED_DIM,
+    SCORE_CONCEPTS,
+    _canon_frequency,
+    _canon_sentiment,
+    _canon_token,
+    batch_user_rest_scores,
+    skew_score,
+)
+from .concepts import concept_index
+from .embedding_codec import embedding_size
+from .geo_index import restaurant_geo_index
+
+# ───────────────────────────────────── Tunables ────────────────────────────────
+TOPK_FIRST_RING_KM: float = float(os.getenv("TOPK_FIRST_RING_KM", 0.5))   # radii double per ring
+TOPK_SCORE_BATCH: int = int(os.getenv("TOPK_SCORE_BATCH", 32))
+
+# ───────────────────────────── Cursor ─────────────────────────────────────────
+# Results are ordered by (rating DESC, distance ASC, r_id ASC); the cursor is
+# the sort key of the last item returned, so pages stay stable without state.
+SortKey = Tuple[float, float, int]
+
+def encode_cursor(key: SortKey) -> str:
+    raw = json.dumps([round(key[0], 6), round(key[1], 6), key[2]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[SortKey]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        rating, dist, r_id = json.loads(raw)
+        return float(rating), float(dist), int(r_id)
+    except Exception:
+        raise HTTPException(400, "Malformed cursor")
+
+def _order(rating: float, dist: float, r_id: int) -> SortKey:
+    """Ascending tuple = the response order."""
+    return -round(rating, 6), round(dist, 6), r_id
+
+def cursor_after(item: Dict[str, Any]) -> str:
+    """Cursor for the page that follows *item* (the last result returned)."""
+    return encode_cursor(_order(item["rating"], item["distance_km"], item["restaurant_id"]))
+
+# ───────────────────────────── Upper bound ────────────────────────────────────
+# The bound must see exactly the keywords ``_score_pair`` keeps: a dropped
+# keyword (malformed record, embedding not EMBED_DIM long) left in the
+# denominator would push the "upper" bound below the real score.
+def _scored(rec: Dict[str, Any]) -> bool:
+    try:
+        _canon_token(rec)
+    except KeyError:
+        return False
+    return embedding_size(rec.get("embedding")) == EMBED_DIM
+
+def user_bound_profile(raw: Optional[List[Dict[str, Any]]]) -> Tuple[np.ndarray, float]:
+    """(positive keyword frequencies sorted DESC, total user weight)."""
+    kws = [k for k in (raw or []) if _scored(k)]
+    pos = np.sort([_canon_frequency(k) for k in kws if _canon_sentiment(k) == "positive"])[::-1]
+    return pos.astype(np.float64), float(sum(_canon_frequency(k) for k in kws))
+
+def restaurant_bound_freqs(raw: Optional[List[Dict[str, Any]]]) -> np.ndarray:
+    """Frequencies of the restaurant keywords ``_score_pair`` scores, DESC."""
+    return np.sort([_canon_frequency(k) for k in (raw or []) if _scored(k)])[::-1].astype(np.float64)
+
+def pair_upper_bound(pos: np.ndarray, user_weight: float, freqs: np.ndarray) -> float:
+    """
+    Each positive user keyword matches at most one distinct restaurant
+    keyword, so the best conceivable sum pairs the largest frequencies of
+    both sides (rearrangement inequality).  Negative keywords only subtract
+    and are left out.  The same normalisation and skew as ``_score_pair``
+    turn that sum into a 0–100 bound.
+    """
+    if pos.size == 0 or freqs.size == 0:
+        return 0.0
+    n = min(freqs.size, pos.size)
+    best_sum = float(np.dot(pos[:n], freqs[:n]))
+    denominator = (user_weight + float(freqs.sum())) / 2.0
+    return float(np.clip(skew_score(best_sum / denominator) * 100.0, 0.0, 100.0))
+
+def score_upper_bounds(viewer_id: int, r_ids: List[int]) -> Dict[int, float]:
+    """
+    Cheap ceiling on ``_score_pair`` for every restaurant, from keyword
+    frequencies and embedding sizes only (nothing is decoded or compared).
+    """
+    raw = (user_keywords_collection.find_one({"user_id": viewer_id}) or {}).get("keywords", [])
+    pos, user_weight = user_bound_profile(raw)
+    bounds = {r: 0.0 for r in r_ids}
+    if pos.size == 0:
+        return bounds
+
+    cursor = restaurant_keywords_collection.find({"r_id": {"$in": r_ids}}, {"_id": 0, "r_id": 1, "keywords": 1})
+    for doc in cursor:
+        bounds[doc["r_id"]] = pair_upper_bound(pos, user_weight, restaurant_bound_freqs(doc.get("keywords")))
+    return bounds
+
+# ───────────────────────────── Progressive search ─────────────────────────────
+def topk_nearby(
+    viewer_id: int,
+    lat: float,
+    lon: float,
+    max_km: float,
+    k: int,
+    after: Optional[SortKey],
+    db: Session,
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Best *k* restaurants within *max_km* by (rating DESC, distance ASC),
+    strictly after the cursor key *after*.
+
+    Candidates are visited in rings of doubling radius and, inside a ring,
+    in order of their score upper bound.  Scoring stops as soon as the
+    current k-th result beats the bound of everything not yet scored – in
+    the rest of the ring and in all farther rings.
+
+    Concept-space scores (``SCORE_CONCEPTS``) pair several user keywords
+    with one concept's restaurant mean and can exceed the one-to-one
+    bound, so in that mode every candidate is scored (ring order only).
+
+    Returns
+    -------
+    (results, stats) – stats counts candidates / scored restaurants.
+    """
+    ids, dists = restaurant_geo_index.within(lat, lon, max_km)
+    if ids.size == 0:
+        return [], {"candidates": 0, "scored": 0}
+    id_list = ids.tolist()
+    concepts = SCORE_CONCEPTS and concept_index.ready      # decided once for bounds and scores
+    if concepts:
+        bounds = np.full(ids.size, 100.0)
+    else:
+        bound_map = score_upper_bounds(viewer_id, id_list)
+        bounds = np.fromiter((bound_map[r] for r in id_list), dtype=np.float64, count=ids.size)
+
+    # Ring boundaries over the distance-sorted candidates
+    radii = [TOPK_FIRST_RING_KM]
+    while radii[-1] < max_km:
+        radii.append(radii[-1] * 2)
+    edges = np.searchsorted(dists, radii, side="right")
+    edges[-1] = ids.size
+    starts = np.concatenate([[0], edges[:-1]])
+    # best bound of everything from ring i outwards
+    suffix_max = np.maximum.accumulate(bounds[::-1])[::-1]
+
+    # Min-heap on the negated sort key: heap[0] is the current k-th (worst) item
+    heap: List[Tuple[Tuple[float, float, int], Dict[str, Any]]] = []
+    scored = 0
+
+    def kth_rating() -> float:
+        return heap[0][0][0] if len(heap) >= k else -1.0
+
+    def push(item: Dict[str, Any]) -> None:
+        key = _order(item["rating"], item["distance_km"], item["restaurant_id"])
+        if after is not None and key <= after:
+            return
+        neg = (-key[0], -key[1], -key[2])
+        if len(heap) < k:
+            heapq.heappush(heap, (neg, item))
+        elif neg > heap[0][0]:
+            heapq.heapreplace(heap, (neg, item))
+
+    for lo, hi in zip(starts, edges):
+        if lo >= hi:
+            continue
+        # Everything left is farther than the current k, so ties lose too
+        if len(heap) >= k and kth_rating() >= suffix_max[lo]:
+            break
+
+        ring = np.arange(lo, hi)
+        ring = ring[np.argsort(-bounds[ring], kind="stable")]
+        for b in range(0, ring.size, TOPK_SCORE_BATCH):
+            batch = ring[b:b + TOPK_SCORE_BATCH]
+            # Strict: an equal rating still wins when it is nearer
+            if len(heap) >= k and kth_rating() > bounds[batch[0]]:
+                break
+            # A bound of 0 pins the score at 0 – no need to compute it
+            todo = [id_list[p] for p in batch if bounds[p] > 0]
+            ratings = batch_user_rest_scores(viewer_id, todo, db=db, concepts=concepts) if todo else {}
+            scored += len(todo)
+            for p in batch:
+                r_id = id_list[p]
+                doc = restaurant_geo_index.doc(r_id)
+                push({
+                    "restaurant_id": r_id,
+                    "name":        doc.get("name"),
+                    "categories":  doc.get("categories", ""),
+                    "address":     doc.get("address", ""),
+                    "distance_km": float(dists[p]),
+                    "rating":      ratings.get(r_id, 0.0),
+                })
+
+    results = [item for _, item in sorted(heap, key=lambda e: e[0], reverse=True)]
+    return results, {"candidates": int(ids.size), "scored": scored}
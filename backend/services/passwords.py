@@ -0,0 +1,116 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from ..connection.pool_budget import PASSWORD_PROCESS_BUDGET, per_worker
+
+# ───────────────────────────────────── Tunables ────────────────────────────────
+BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", 12))
+HASH_POOL_SIZE: int = int(os.getenv("PASSWORD_POOL_SIZE", per_worker(PASSWORD_PROCESS_BUDGET)))
+HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_MAX_PENDING", HASH_POOL_SIZE * 8))
+HASH_RETRY_AFTER_S: int = 1
+
+# Hashes with a different cost (or a deprecated scheme) are flagged by
+# `needs_update` and transparently re-hashed on the next successful login.
+pwd_ctx = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+)
+
+# ───────────────────────────── Sync primitives ────────────────────────────────
+# Module-level so they can be pickled into the worker processes.
+def hash_password(plain: str) -> bytes:
+    """Return bcrypt hash as bytes – ready for VARBINARY(60)."""
+    return pwd_ctx.hash(plain).encode("ascii")
+
+def verify_password(plain: str, stored: bytes) -> bool:
+    """Check *plain* against stored bcrypt hash (bytes)."""
+    return pwd_ctx.verify(plain, stored.decode("ascii"))
+
+def verify_and_update_password(plain: str, stored: bytes) -> Tuple[bool, Optional[bytes]]:
+    """
+    Verify *plain* and, when the stored hash uses an outdated cost, return a
+    fresh hash as well.  Returns ``(ok, new_hash_or_None)``.
+    """
+    ok, new_hash = pwd_ctx.verify_and_update(plain, stored.decode("ascii"))
+    return ok, new_hash.encode("ascii") if new_hash else None
+
+# ───────────────────────────── Process-pool service ───────────────────────────
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated, size-limited process pool so password work
+    never occupies the request threadpool or the event loop.
+
+    At most ``max_pending`` jobs may be queued or running; beyond that the
+    call is rejected immediately with **503** instead of piling up latency
+    for every other endpoint.
+    """
+
+    def __init__(self, max_workers: int = HASH_POOL_SIZE, max_pending: int = HASH_MAX_PENDING):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    # ── pool lifecycle ────────────────────────────────────────────────────────
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # "spawn" keeps the workers free of the parent's sockets/threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    # ── admission control ─────────────────────────────────────────────────────
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Authentication service busy, please retry",
+                    headers={"Retry-After": str(HASH_RETRY_AFTER_S)},
+                )
+            self._pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def _run(self, fn, *args):
+        self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._release()
+
+    # ── public awaitables ─────────────────────────────────────────────────────
+    async def hash(self, plain: str) -> bytes:
+        """Awaitable version of :func:`hash_password`."""
+        return await self._run(hash_password, plain)
+
+    async def verify(self, plain: str, stored: bytes) -> Tuple[bool, Optional[bytes]]:
+        """Awaitable version of :func:`verify_and_update_password`."""
+        return await self._run(verify_and_update_password, plain, stored)
+
+password_hasher = PasswordHasher()
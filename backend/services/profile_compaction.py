@@ -0,0 +1,182 @@
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .embedding_codec import decode_embedding, encode_embedding
+
+# ───────────────────────────────────── Tunables ────────────────────────────────
+COMPACT_MERGE_COS: float = float(os.getenv("COMPACT_MERGE_COS", 0.92))   # near-duplicate cut
+PROFILE_TOP_K: int = int(os.getenv("PROFILE_TOP_K", 64))                 # keywords scored per restaurant
+
+# A compacted restaurant keyword document:
+#
+#   {"r_id": 9,
+#    "keywords": [{"keyword": "진한 국물", "frequency": 7, "embedding": …}, …],   ≤ PROFILE_TOP_K, scored
+#    "tail":     [{"keyword": …, "frequency": …, "embedding": …}, …],           the other representatives
+#    "history":  [{"keyword": "국물이 진함", "frequency": 2, "rep": "진한 국물"}, …]}
+#
+# Each surface string in `history` points at the representative it was
+# merged into; representatives carry the summed frequency of their members.
+# Scoring reads only `keywords`, so its cost is bounded by PROFILE_TOP_K;
+# display reads `history`.  Documents written before compaction have no
+# `history` and are upgraded on their next write.
+
+Embedder = Callable[[List[str]], Sequence[Any]]
+
+def history_of(doc: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Every surface keyword with its own count (legacy docs: the keyword list)."""
+    doc = doc or {}
+    if "history" in doc:
+        return doc["history"]
+    return [
+        {"keyword": kw["keyword"], "frequency": kw.get("frequency", 1), "rep": kw["keyword"]}
+        for kw in doc.get("keywords", [])
+    ]
+
+def _reps(doc: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    doc = doc or {}
+    return [dict(kw) for kw in doc.get("keywords", []) + doc.get("tail", [])]
+
+def _rank(reps: Iterable[Dict[str, Any]], top_k: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    live = sorted((r for r in reps if r["frequency"] > 0), key=lambda r: (-r["frequency"], r["keyword"]))
+    return live[:top_k], live[top_k:]
+
+def _matrix(reps: List[Dict[str, Any]]) -> np.ndarray:
+    rows = [decode_embedding(r.get("embedding")) for r in reps]
+    dim = max((v.size for v in rows), default=0)
+    out = np.zeros((len(rows), dim), dtype=np.float32)
+    for i, v in enumerate(rows):
+        if v.size == dim:
+            norm = float(np.linalg.norm(v))
+            out[i] = v / norm if norm > 0 else v
+    return out
+
+def _document(reps: List[Dict[str, Any]], history: List[Dict[str, Any]], top_k: int) -> Dict[str, Any]:
+    top, tail = _rank(reps, top_k)
+    return {"keywords": top, "tail": tail, "history": [h for h in history if h["frequency"] > 0]}
+
+# ───────────────────────────── On-write policy ────────────────────────────────
+def add_keywords(
+    doc: Optional[Dict[str, Any]],
+    counts: Dict[str, int],
+    embed: Embedder,
+    *,
+    merge_cos: float = COMPACT_MERGE_COS,
+    top_k: int = PROFILE_TOP_K,
+) -> Dict[str, Any]:
+    """
+    Fold keyword *counts* into a profile.  Known strings bump their
+    representative; unseen ones are embedded (one *embed* call) and join
+    the closest representative at cosine ≥ *merge_cos*, or start their
+    own.  Returns the ``keywords`` / ``tail`` / ``history`` fields to set.
+    """
+    history = [dict(h) for h in history_of(doc)]
+    by_name = {h["keyword"]: h for h in history}
+    reps = _reps(doc)
+    rep_by_name = {r["keyword"]: r for r in reps}
+
+    unseen = [kw for kw in counts if kw not in by_name]
+    for kw, n in counts.items():
+        h = by_name.get(kw)
+        if h is None:
+            continue
+        h["frequency"] += n
+        rep = rep_by_name.get(h["rep"])
+        if rep is None:                             # dangling pointer – heal it
+            h["rep"] = kw
+            unseen.append(kw)
+            continue
+        rep["frequency"] += n
+
+    if unseen:
+        new_vecs = [encode_embedding(v) for v in embed(unseen)]
+        # Decode the representatives once; new ones are appended as rows
+        known = _matrix(reps)
+        dim = known.shape[1] or (decode_embedding(new_vecs[0]).size if new_vecs else 0)
+        mat = np.zeros((len(reps) + len(unseen), dim), dtype=np.float32)
+        if known.shape[1] == dim:
+            mat[:len(reps)] = known
+        n = len(reps)
+        for kw, emb in zip(unseen, new_vecs):
+            target = None
+            vec = decode_embedding(emb)
+            if n and vec.size == dim:
+                sims = mat[:n] @ vec
+                best = int(sims.argmax())
+                if sims[best] >= merge_cos:
+                    target = reps[best]
+            if target is None:
+                target = {"keyword": kw, "frequency": 0, "embedding": emb}
+                reps.append(target)
+                rep_by_name[kw] = target
+                if vec.size == dim:
+                    norm = float(np.linalg.norm(vec))
+                    mat[n] = vec / norm if norm > 0 else vec
+                n += 1
+            target["frequency"] += counts[kw]
+            if kw in by_name:
+                by_name[kw]["rep"] = target["keyword"]
+            else:
+                h = {"keyword": kw, "frequency": counts[kw], "rep": target["keyword"]}
+                history.append(h)
+                by_name[kw] = h
+
+    return _document(reps, history, top_k)
+
+def subtract_keywords(
+    doc: Optional[Dict[str, Any]],
+    keywords: Iterable[str],
+    *,
+    top_k: int = PROFILE_TOP_K,
+) -> Dict[str, Any]:
+    """One occurrence less of each keyword; empty representatives drop out."""
+    history = [dict(h) for h in history_of(doc)]
+    by_name = {h["keyword"]: h for h in history}
+    reps = _reps(doc)
+    rep_by_name = {r["keyword"]: r for r in reps}
+
+    for kw in keywords:
+        h = by_name.get(kw)
+        if h is None or h["frequency"] <= 0:
+            continue
+        h["frequency"] -= 1
+        rep = rep_by_name.get(h["rep"])
+        if rep is not None:
+            rep["frequency"] -= 1
+    return _document(reps, history, top_k)
+
+# ───────────────────────────── Offline compaction ─────────────────────────────
+def compact_profile(
+    doc: Optional[Dict[str, Any]],
+    *,
+    merge_cos: float = COMPACT_MERGE_COS,
+    top_k: int = PROFILE_TOP_K,
+) -> Dict[str, Any]:
+    """
+    Re-cluster all representatives of a profile: most frequent first, each
+    one joins the first earlier leader at cosine ≥ *merge_cos*, so the
+    representative of a cluster is its most frequent string.
+    """
+    history = [dict(h) for h in history_of(doc)]
+    reps = sorted(_reps(doc), key=lambda r: (-r["frequency"], r["keyword"]))
+    if not reps:
+        return _document([], history, top_k)
+
+    mat = _matrix(reps)
+    sims = mat @ mat.T
+    leader_of = list(range(len(reps)))
+    leaders: List[int] = []
+    for i in range(len(reps)):
+        hits = [l for l in leaders if sims[i, l] >= merge_cos] if mat.shape[1] else []
+        if hits:
+            leader = max(hits, key=lambda l: sims[i, l])
+            leader_of[i] = leader
+            reps[leader]["frequency"] += reps[i]["frequency"]
+        else:
+            leaders.append(i)
+
+    renamed = {reps[i]["keyword"]: reps[leader_of[i]]["keyword"] for i in range(len(reps))}
+    for h in history:
+        h["rep"] = renamed.get(h["rep"], h["rep"])
+    return _document([reps[i] for i in leaders], history, top_k)
@@ -0,0 +1,227 @@
+import fcntl
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .embedding_codec import decode_embedding
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────────────────── Tunables ────────────────────────────────
+PROFILE_VECTOR_DIR: str = os.getenv(
+    "PROFILE_VECTOR_DIR", os.path.join(os.path.dirname(__file__), "..", "data", "profile_vectors")
+)
+PROFILE_VECTOR_DIM: int = int(os.getenv("PROFILE_VECTOR_DIM", 1536))
+PROFILE_VECTOR_GROW: int = int(os.getenv("PROFILE_VECTOR_GROW", 4096))     # rows added per resize
+
+KIND_USER = "user"
+KIND_RESTAURANT = "restaurant"
+
+# One raw float32 file per kind, row = entity id, PROFILE_VECTOR_DIM + 2
+# columns: the running sum Σ weight · unit(embedding) over the profile's
+# keywords, then Σ |weight|, then an initialised flag.  Users weigh a
+# keyword by ±frequency (sentiment), restaurants by frequency over every
+# representative (`keywords` + `tail`).  The summary vector is the sum
+# normalised, i.e. the normalised weighted mean.  Writes only add the
+# difference between a profile before and after an update, so their cost is
+# the number of changed keywords; a row that was never initialised (new
+# entity, fresh file) instead takes the full profile on first touch, so a
+# delta is never added to nothing.  An flock on the file serialises
+# read-modify-write across processes and growth is an in-place truncate, so
+# other processes remap instead of losing the file.
+#
+# The file is the only copy of the running sums: keep PROFILE_VECTOR_DIR on
+# a persistent volume (docker-compose mounts one at backend/data).  Two
+# concurrent updates of one profile both apply their delta while Mongo
+# keeps only the last write, so rows can drift from the documents; run
+# `build_profile_vectors --check` periodically (it exits non-zero on drift)
+# and the full rebuild when it reports any.
+
+Weights = Dict[Any, Tuple[float, Any]]       # key → (weight, stored embedding)
+
+def profile_weights(kind: str, doc: Optional[Dict[str, Any]]) -> Weights:
+    """
+    Snapshot of a profile's keyword weights.  Take it *before* mutating a
+    document in place – only the numbers are copied.
+    """
+    doc = doc or {}
+    if kind == KIND_USER:
+        return {
+            (kw["name"], kw.get("sentiment")): (
+                float(kw.get("frequency", 0)) * (1.0 if kw.get("sentiment") == "positive" else -1.0),
+                kw.get("embedding"),
+            )
+            for kw in doc.get("keywords", [])
+        }
+    return {
+        kw["keyword"]: (float(kw.get("frequency", 0)), kw.get("embedding"))
+        for kw in doc.get("keywords", []) + doc.get("tail", [])
+    }
+
+def _unit(emb: Any) -> Optional[np.ndarray]:
+    vec = decode_embedding(emb)
+    if vec.size != PROFILE_VECTOR_DIM:
+        return None
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm > 0 else None
+
+# ───────────────────────────── Memory-mapped matrix ───────────────────────────
+class ProfileVectorStore:
+    """Running weighted sums for one entity kind, memory-mapped by id."""
+
+    def __init__(self, kind: str, directory: str = PROFILE_VECTOR_DIR, dim: int = PROFILE_VECTOR_DIM) -> None:
+        self.kind = kind
+        self.dim = dim
+        self.path = os.path.join(directory, f"{kind}_{dim}.v2.f32")
+        self._lock = threading.RLock()
+        self._fd: Optional[int] = None
+        self._mm: Optional[np.memmap] = None
+
+    # ── file handling ───────────────────────────────────────────────────────
+    @property
+    def columns(self) -> int:
+        return self.dim + 2                       # sum, mass, initialised flag
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.columns * 4
+
+    def _open(self) -> None:
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _remap(self) -> np.memmap:
+        """Map the file at its current size (another process may have grown it)."""
+        rows = os.fstat(self._fd).st_size // self._row_bytes
+        if self._mm is None or self._mm.shape[0] != rows:
+            self._mm = (
+                np.memmap(self.path, dtype=np.float32, mode="r+", shape=(rows, self.columns))
+                if rows else None
+            )
+        return self._mm
+
+    @contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        with self._lock:
+            self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _ensure_rows(self, max_id: int) -> np.memmap:
+        mm = self._remap()
+        rows = 0 if mm is None else mm.shape[0]
+        if max_id >= rows:
+            new_rows = (max_id // PROFILE_VECTOR_GROW + 1) * PROFILE_VECTOR_GROW
+            self._mm = None                       # drop the old mapping before resizing
+            os.ftruncate(self._fd, new_rows * self._row_bytes)
+            mm = self._remap()
+        return mm
+
+    @property
+    def capacity(self) -> int:
+        with self._locked(exclusive=False):
+            mm = self._remap()
+            return 0 if mm is None else mm.shape[0]
+
+    # ── writes ──────────────────────────────────────────────────────────────
+    def _diff(self, before: Weights, after: Weights) -> Tuple[np.ndarray, float, int]:
+        delta = np.zeros(self.dim, dtype=np.float64)
+        mass = 0.0
+        changed = 0
+        for key in before.keys() | after.keys():
+            w_old, emb_old = before.get(key, (0.0, None))
+            w_new, emb_new = after.get(key, (0.0, None))
+            if w_old == w_new:
+                continue
+            unit = _unit(emb_new if emb_new is not None else emb_old)
+            if unit is None:
+                continue
+            delta += (w_new - w_old) * unit
+            mass += abs(w_new) - abs(w_old)
+            changed += 1
+        return delta, mass, changed
+
+    def _write(self, row: np.ndarray, total: np.ndarray, mass: float) -> None:
+        row[:self.dim] = total.astype(np.float32)
+        row[self.dim] = max(mass, 0.0)
+        row[self.dim + 1] = 1.0
+
+    def apply(self, entity_id: int, before: Weights, after: Weights) -> int:
+        """
+        Add ``after − before`` per keyword to the entity's row, or store
+        *after* in full when the row was never initialised.  Returns the
+        number of keywords whose contribution changed.
+        """
+        delta, mass, changed = self._diff(before, after)
+        if changed:
+            with self._locked(exclusive=True):
+                mm = self._ensure_rows(entity_id)
+                row = mm[entity_id]
+                if row[self.dim + 1] == 0.0:
+                    total, total_mass, _ = self._diff({}, after)
+                    self._write(row, total, total_mass)
+                else:
+                    row[:self.dim] += delta.astype(np.float32)
+                    row[self.dim] = max(float(row[self.dim]) + mass, 0.0)
+        return changed
+
+    def put(self, entity_id: int, weights: Weights) -> None:
+        """Overwrite a row from a full profile (bootstrap / drift repair)."""
+        total, mass, _ = self._diff({}, weights)
+        with self._locked(exclusive=True):
+            mm = self._ensure_rows(entity_id)
+            self._write(mm[entity_id], total, mass)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._mm is not None:
+                self._mm.flush()
+
+    # ── reads ───────────────────────────────────────────────────────────────
+    def vectors(self, ids: Iterable[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Normalised summary vectors for *ids* (float32, one row each) and a
+        mask of ids that have one; rows without keywords stay zero.
+        """
+        ids = np.fromiter(ids, dtype=np.int64)
+        out = np.zeros((len(ids), self.dim), dtype=np.float32)
+        with self._locked(exclusive=False):
+            mm = self._remap()
+            rows = 0 if mm is None else mm.shape[0]
+            inside = (ids >= 0) & (ids < rows)
+            if inside.any():
+                out[inside] = mm[ids[inside], :self.dim]
+        norms = np.linalg.norm(out, axis=1)
+        ok = norms > 1e-6
+        out[ok] /= norms[ok, None]
+        out[~ok] = 0.0
+        return out, ok
+
+    def vector(self, entity_id: int) -> Optional[np.ndarray]:
+        out, ok = self.vectors([entity_id])
+        return out[0] if ok[0] else None
+
+user_vectors = ProfileVectorStore(KIND_USER)
+restaurant_vectors = ProfileVectorStore(KIND_RESTAURANT)
+
+def _store(kind: str) -> ProfileVectorStore:
+    return user_vectors if kind == KIND_USER else restaurant_vectors
+
+def update_profile_vector(kind: str, entity_id: int, before: Weights, after_doc: Optional[Dict[str, Any]]) -> None:
+    """
+    Fold a profile update into its summary vector.  Failures are logged,
+    never raised: the keyword document stays the source of truth and
+    `scripts/build_profile_vectors.py` repairs the matrix.
+    """
+    try:
+        _store(kind).apply(entity_id, before, profile_weights(kind, after_doc))
+    except Exception:
+        logger.exception("Updating %s profile vector %s failed", kind, entity_id)
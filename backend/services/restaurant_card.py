@@ -0,0 +1,159 @@
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+from sqlalchemy.orm import Session
+
+from ..connection.mysqldb import Restaurant
+from ..connection.mongodb import (
+    photo_collection,
+    restaurant_cards_collection,
+    restaurant_keywords_collection,
+)
+from .counters import SCOPE_RESTAURANT, get_counters, get_many, seed_review_counters
+from .profile_compaction import history_of
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────────────────── Tunables ────────────────────────────────
+CARD_TOP_KEYWORDS: int = int(os.getenv("CARD_TOP_KEYWORDS", 20))
+
+# Materialised payload for RestaurantInfoPage, one document per restaurant:
+# {r_id, name, address, x, y, image, keywords: [{keyword, frequency}], review_count, rev}
+# `rev` changes on every write and feeds the HTTP validator (ETag).
+
+# ───────────────────────────── Builders ───────────────────────────────────────
+def _top_keywords(keywords: Iterable[Dict[str, Any]], n: int = CARD_TOP_KEYWORDS) -> List[Dict[str, Any]]:
+    ranked = sorted(
+        (
+            {"keyword": kw["keyword"], "frequency": int(kw.get("frequency", 1))}
+            for kw in keywords
+            if kw.get("keyword")
+        ),
+        key=lambda kw: kw["frequency"],
+        reverse=True,
+    )
+    return ranked[:n]
+
+def _thumbnail(review_id: Optional[int]) -> Optional[str]:
+    """First photo URL of *review_id* (None if no review / no photos)."""
+    if review_id is None:
+        return None
+    photo_doc = photo_collection.find_one({"review_id": review_id}, {"_id": 0, "photo_urls": 1}) or {}
+    urls = photo_doc.get("photo_urls", [])
+    return urls[0] if urls else None
+
+def build_card(restaurant_id: int, db: Session) -> Optional[Dict[str, Any]]:
+    """Full (re)build from MySQL + Mongo; returns None for unknown ids."""
+    row = db.query(Restaurant).filter(Restaurant.restaurant_id == restaurant_id).first()
+    if row is None:
+        return None
+
+    kw_doc = restaurant_keywords_collection.find_one(
+        {"r_id": restaurant_id},
+        {"_id": 0, "keywords.keyword": 1, "keywords.frequency": 1, "history": 1},
+    ) or {}
+    # Restaurants reconcile_all has not reached yet count from MySQL
+    seed_review_counters(SCOPE_RESTAURANT, restaurant_id, db)
+    counters = get_counters(SCOPE_RESTAURANT, restaurant_id)
+
+    card = {
+        "r_id":         restaurant_id,
+        "name":         row.name,
+        "address":      getattr(row, "location", None),
+        "x":            getattr(row, "longitude", None),
+        "y":            getattr(row, "latitude", None),
+        "image":        _thumbnail(counters["first_review_id"]),
+        "keywords":     _top_keywords(history_of(kw_doc)),
+        "review_count": counters["reviews"],
+        "rev":          time.time_ns(),
+    }
+    restaurant_cards_collection.replace_one({"r_id": restaurant_id}, card, upsert=True)
+    return card
+
+def get_card(restaurant_id: int, db: Session) -> Optional[Dict[str, Any]]:
+    """One document read; materialises the card on first access."""
+    card = restaurant_cards_collection.find_one({"r_id": restaurant_id}, {"_id": 0})
+    if card is None:
+        card = build_card(restaurant_id, db)
+    return card
+
+def refresh_card_counts(batch_size: int = 1000) -> int:
+    """
+    Re-derive ``review_count`` and ``image`` of every stored card from the
+    (reconciled) counters; returns how many cards changed.  Part of
+    ``counters.reconcile_all``, so cards built before the backfill heal.
+    """
+    cursor = restaurant_cards_collection.find(
+        {}, {"_id": 0, "r_id": 1, "review_count": 1, "image": 1},
+    ).batch_size(batch_size)
+
+    changed = 0
+    batch: List[Dict[str, Any]] = []
+    for card in cursor:
+        batch.append(card)
+        if len(batch) >= batch_size:
+            changed += _refresh_cards(batch)
+            batch.clear()
+    if batch:
+        changed += _refresh_cards(batch)
+    return changed
+
+def _refresh_cards(cards: List[Dict[str, Any]]) -> int:
+    counters = get_many(SCOPE_RESTAURANT, [c["r_id"] for c in cards])
+    first_ids = [c["first_review_id"] for c in counters.values() if c["first_review_id"] is not None]
+    photos = {
+        doc["review_id"]: (doc.get("photo_urls") or [None])[0]
+        for doc in photo_collection.find({"review_id": {"$in": first_ids}}, {"_id": 0, "review_id": 1, "photo_urls": 1})
+    }
+    ops = []
+    for card in cards:
+        c = counters[card["r_id"]]
+        fields = {"review_count": c["reviews"], "image": photos.get(c["first_review_id"])}
+        if any(card.get(k) != v for k, v in fields.items()):
+            ops.append(UpdateOne({"r_id": card["r_id"]}, {"$set": fields, "$inc": {"rev": 1}}))
+    if ops:
+        restaurant_cards_collection.bulk_write(ops, ordered=False)
+    return len(ops)
+
+# ───────────────────────────── Incremental updates ────────────────────────────
+def _update(restaurant_id: int, update: Dict[str, Any]) -> None:
+    # No upsert: partial cards would shadow the lazy full build in get_card
+    update.setdefault("$inc", {})["rev"] = 1
+    restaurant_cards_collection.update_one({"r_id": restaurant_id}, update)
+
+def set_card_base(
+    restaurant_id: int,
+    name: str,
+    address: Optional[str],
+    lat: Optional[float],
+    lon: Optional[float],
+) -> None:
+    """Seed a fresh card (used by add_restaurant)."""
+    restaurant_cards_collection.replace_one(
+        {"r_id": restaurant_id},
+        {
+            "r_id": restaurant_id,
+            "name": name,
+            "address": address,
+            "x": lon,
+            "y": lat,
+            "image": None,
+            "keywords": [],
+            "review_count": 0,
+            "rev": time.time_ns(),
+        },
+        upsert=True,
+    )
+
+def set_card_keywords(restaurant_id: int, keywords: Iterable[Dict[str, Any]]) -> None:
+    """Called with the full keyword list right after it has been written."""
+    _update(restaurant_id, {"$set": {"keywords": _top_keywords(keywords)}})
+
+def adjust_card_review_count(restaurant_id: int, delta: int) -> None:
+    _update(restaurant_id, {"$inc": {"review_count": delta}})
+
+def set_card_thumbnail(restaurant_id: int, first_review_id: Optional[int]) -> None:
+    _update(restaurant_id, {"$set": {"image": _thumbnail(first_review_id)}})
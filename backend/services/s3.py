@@ -2,7 +2,6 @@ import mimetypes
 import io
 import re
 from pathlib import Path
-from botocore.exceptions import ClientError
 from typing import Optional
 from ..connection.mysqldb import get_db, People
 from ..connection.s3 import s3, s3_client, STORAGE_CLASS, BUCKET_NAME, ACL
@@ -67,6 +66,8 @@ def generate_presigned_url(key: str, expires_in: int = 3600) -> str:
     Return a one-hour URL that lets OTHER people upload directly (HTTP PUT).
     Use-case: frontend or another service sends file straight to S3.
     """
+    from botocore.exceptions import ClientError
+
     try:
         url = s3_client.generate_presigned_url(
             "put_object",
@@ -92,6 +93,8 @@ def delete_object(key_or_url: str) -> None:
     else:
         key = key_or_url
 
+    from botocore.exceptions import ClientError
+
     try:
         s3.Object(BUCKET_NAME, key).delete()
         print(f"→ Deleted s3://{BUCKET_NAME}/{key}")
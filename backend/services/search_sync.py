@@ -0,0 +1,251 @@
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..connection.elasticdb import get_es_client
+from ..connection.mongodb import search_changes_collection, sync_state_collection
+from ..connection.mysqldb import People, Restaurant, Review
+
+logger = logging.getLogger(__name__)
+
+# ───────────────────────────────────── Targets ────────────────────────────────
+SYNC_OUTBOX_LAG_S: float = float(os.getenv("SYNC_OUTBOX_LAG_S", 2))
+
+REVIEW_INDEX = "user_review_nickname"
+RESTAURANT_INDEX = "full_restaurant_kor"
+
+ENTITY_REVIEW = "review"
+ENTITY_RESTAURANT = "restaurant"
+
+OP_UPSERT = "upsert"
+OP_DELETE = "delete"
+
+# The MySQL tables have no updated_at column, so change capture has two legs:
+#   * id high-water marks pick up rows inserted by anyone (routers, crawler,
+#     manual SQL) – review_id / restaurant_id only ever grow;
+#   * routers append every write to the `search_changes` outbox, tailed by
+#     its ObjectId high-water mark.  ObjectIds only order by second across
+#     processes, so entries younger than SYNC_OUTBOX_LAG_S are left for the
+#     next pass – by then their second is complete.
+# Both marks live in `sync_state` and only advance after a successful bulk.
+# On the first run the id marks are seeded from the current MAX(id): rows
+# that already exist were indexed by the bulk loader and are left alone.
+#
+# Reviews loaded by the old reindexing script carry auto-generated _ids.
+# Before the outbox re-indexes (or deletes) a review under _id=review_id,
+# any such legacy copy is removed, so search never shows a review twice.
+#
+# Restaurant documents are written as partial updates: the fields this
+# worker owns are merged into whatever the index already holds (legacy
+# `id` / `type` / `lat` / `lon` and list-valued `categories` survive), and
+# only a missing document is created from the full shape.
+
+# ───────────────────────────── Outbox (request path) ──────────────────────────
+def record_change(entity: str, entity_id: int, op: str = OP_UPSERT) -> None:
+    """One small insert; the sync worker does the ES work."""
+    search_changes_collection.insert_one({"entity": entity, "id": entity_id, "op": op, "ts": time.time()})
+
+# ───────────────────────────── Documents ──────────────────────────────────────
+def _split_filenames(value: Any) -> List[str]:
+    if isinstance(value, list):
+        return value
+    return [fn.strip() for fn in (value or "").split(",") if fn.strip()]
+
+def review_document(row: Any, nickname: Optional[str]) -> Dict[str, Any]:
+    return {
+        "review_id":       row.review_id,
+        "user_id":         row.user_id,
+        "restaurant_id":   row.restaurant_id,
+        "nickname":        nickname,
+        "comments":        row.comments or "",
+        "review":          row.review or "",
+        "photo_filenames": _split_filenames(row.photo_filenames),
+        "created_at":      row.created_at.isoformat() if row.created_at else None,
+    }
+
+def restaurant_update(row: Any) -> Optional[Dict[str, Any]]:
+    """Fields merged into an existing document."""
+    if row.latitude is None or row.longitude is None:
+        return None
+    return {
+        "r_id":     row.restaurant_id,
+        "name":     row.name,
+        "address":  row.location,
+        "lat":      row.latitude,
+        "lon":      row.longitude,
+        "location": {"lat": row.latitude, "lon": row.longitude},
+    }
+
+def restaurant_document(row: Any) -> Optional[Dict[str, Any]]:
+    """Full shape (see scripts/nori_token.py) for documents the index lacks."""
+    doc = restaurant_update(row)
+    if doc is None:
+        return None
+    return {**doc, "categories": row.cuisine_type, "type": row.cuisine_type}
+
+def _review_actions(db: Session, rows: List[Any]) -> List[Dict[str, Any]]:
+    """Enrich with nicknames in one IN query."""
+    user_ids = {r.user_id for r in rows}
+    nick = dict(db.query(People.user_id, People.nickname).filter(People.user_id.in_(user_ids)).all()) if user_ids else {}
+    return [
+        {"_op_type": "index", "_index": REVIEW_INDEX, "_id": r.review_id, "_source": review_document(r, nick.get(r.user_id))}
+        for r in rows
+    ]
+
+def _restaurant_actions(rows: List[Any]) -> List[Dict[str, Any]]:
+    out = []
+    for r in rows:
+        doc = restaurant_update(r)
+        if doc is not None:
+            out.append({
+                "_op_type": "update", "_index": RESTAURANT_INDEX, "_id": r.restaurant_id,
+                "doc": doc, "upsert": restaurant_document(r),
+            })
+    return out
+
+def drop_legacy_reviews(review_ids: List[int]) -> int:
+    """Delete copies of *review_ids* stored under an _id other than the review_id."""
+    if not review_ids:
+        return 0
+    res = get_es_client().delete_by_query(
+        index=REVIEW_INDEX,
+        query={"bool": {
+            "filter": [{"terms": {"review_id": review_ids}}],
+            "must_not": [{"ids": {"values": [str(i) for i in review_ids]}}],
+        }},
+        conflicts="proceed",
+    )
+    if res.get("deleted"):
+        logger.info("Search sync: removed %d legacy review documents", res["deleted"])
+    return res.get("deleted", 0)
+
+# ───────────────────────────── State ──────────────────────────────────────────
+def _get_mark(name: str, default: Any) -> Any:
+    doc = sync_state_collection.find_one({"_id": name})
+    return doc["value"] if doc else default
+
+def _set_mark(name: str, value: Any) -> None:
+    sync_state_collection.update_one({"_id": name}, {"$set": {"value": value, "at": time.time()}}, upsert=True)
+
+def _id_mark(db: Session, name: str, column: Any) -> Optional[int]:
+    """Current id mark; ``None`` after seeding it from MAX(column) on first run."""
+    mark = _get_mark(name, None)
+    if mark is not None:
+        return mark
+    seed = db.query(func.max(column)).scalar() or 0
+    _set_mark(name, seed)
+    logger.info("Search sync: %s mark seeded at %d", name, seed)
+    return None
+
+def _push(actions: List[Dict[str, Any]]) -> Tuple[int, int]:
+    if not actions:
+        return 0, 0
+    from elasticsearch import helpers
+
+    ok, errors = helpers.bulk(
+        get_es_client(), actions,
+        raise_on_error=False,
+        ignore_status=(404,),          # deleting what is already gone is fine
+        max_retries=3,
+        initial_backoff=1,
+    )
+    if errors:
+        logger.warning("Search sync: %d bulk errors, first: %s", len(errors), errors[0])
+        raise RuntimeError(f"{len(errors)} bulk errors – high-water mark not advanced")
+    return ok, len(actions)
+
+# ───────────────────────────── Sync legs ──────────────────────────────────────
+def sync_new_reviews(db: Session, batch_size: int) -> int:
+    mark = _id_mark(db, "review_id", Review.review_id)
+    if mark is None:
+        return 0
+    rows = db.query(Review).filter(Review.review_id > mark).order_by(Review.review_id).limit(batch_size).all()
+    if rows:
+        _push(_review_actions(db, rows))
+        _set_mark("review_id", rows[-1].review_id)
+    return len(rows)
+
+def sync_new_restaurants(db: Session, batch_size: int) -> int:
+    mark = _id_mark(db, "restaurant_id", Restaurant.restaurant_id)
+    if mark is None:
+        return 0
+    rows = (
+        db.query(Restaurant).filter(Restaurant.restaurant_id > mark)
+        .order_by(Restaurant.restaurant_id).limit(batch_size).all()
+    )
+    if rows:
+        _push(_restaurant_actions(rows))
+        _set_mark("restaurant_id", rows[-1].restaurant_id)
+    return len(rows)
+
+def _coalesce(changes: Iterable[Dict[str, Any]]) -> Dict[Tuple[str, int], str]:
+    """Last operation per document wins."""
+    latest: Dict[Tuple[str, int], str] = {}
+    for ch in changes:
+        latest[(ch["entity"], ch["id"])] = ch["op"]
+    return latest
+
+def sync_outbox(db: Session, batch_size: int) -> int:
+    mark = _get_mark("outbox", None)
+    cutoff = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(seconds=SYNC_OUTBOX_LAG_S))
+    query = {"_id": {"$gt": ObjectId(mark), "$lt": cutoff} if mark else {"$lt": cutoff}}
+    changes = list(search_changes_collection.find(query).sort("_id", 1).limit(batch_size))
+    if not changes:
+        return 0
+
+    latest = _coalesce(changes)
+    want = {
+        entity: [i for (e, i), op in latest.items() if e == entity and op == OP_UPSERT]
+        for entity in (ENTITY_REVIEW, ENTITY_RESTAURANT)
+    }
+    review_rows = db.query(Review).filter(Review.review_id.in_(want[ENTITY_REVIEW])).all() if want[ENTITY_REVIEW] else []
+    rest_rows = (
+        db.query(Restaurant).filter(Restaurant.restaurant_id.in_(want[ENTITY_RESTAURANT])).all()
+        if want[ENTITY_RESTAURANT] else []
+    )
+
+    actions = _review_actions(db, review_rows) + _restaurant_actions(rest_rows)
+    # Upserts whose row vanished in the meantime become deletes
+    found = {(ENTITY_REVIEW, r.review_id) for r in review_rows} | {(ENTITY_RESTAURANT, r.restaurant_id) for r in rest_rows}
+    index_for = {ENTITY_REVIEW: REVIEW_INDEX, ENTITY_RESTAURANT: RESTAURANT_INDEX}
+    actions += [
+        {"_op_type": "delete", "_index": index_for[e], "_id": i}
+        for (e, i), op in latest.items()
+        if e in index_for and (op == OP_DELETE or (e, i) not in found)
+    ]
+    drop_legacy_reviews([i for e, i in latest if e == ENTITY_REVIEW])
+    _push(actions)
+    _set_mark("outbox", str(changes[-1]["_id"]))
+    return len(changes)
+
+def sync_once(db: Session, batch_size: int = 1000) -> Dict[str, int]:
+    """
+    One pass over every leg, draining each backlog batch by batch.  Safe to
+    run concurrently with traffic; idempotent if interrupted.
+    """
+    stats = {"reviews": 0, "restaurants": 0, "changes": 0}
+    for key, leg in (
+        ("reviews", sync_new_reviews),
+        ("restaurants", sync_new_restaurants),
+        ("changes", sync_outbox),
+    ):
+        while True:
+            n = leg(db, batch_size)
+            stats[key] += n
+            if n < batch_size:
+                break
+    return stats
+
+def prune_outbox(keep_s: float = 7 * 86400) -> int:
+    """Drop processed outbox entries older than *keep_s*."""
+    mark = _get_mark("outbox", None)
+    if not mark:
+        return 0
+    res = search_changes_collection.delete_many({"_id": {"$lte": ObjectId(mark)}, "ts": {"$lt": time.time() - keep_s}})
+    return res.deleted_count
@@ -1,25 +1,11 @@
-import requests
+import math
+import os
 import random
 from typing import Tuple
 
 PRIME_LOWER_CAP: int = 1000
 PRIME_UPPER_CAP: int = 10000
 
-def get_location_from_ip(ip: str):
-    try:
-        response = requests.get(f"http://ip-api.com/json/{ip}")
-        data = response.json()
-        print("GeoIP response:", data) 
-
-        if data.get("status") == "success":
-            return {"lat": data["lat"], "lon": data["lon"]}
-        else:
-            print("GeoIP failed:", data.get("message"))
-    except Exception as e:
-        print("GeoIP exception:", e)
-
-    return None
-
 _SMALL_PRIMES = [
     2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47,
     53, 59, 61, 67, 71, 73, 79, 83, 89, 97
@@ -87,4 +73,20 @@ def random_prime_in_range(
     while True:
         candidate = random.randrange(low | 1, high, 2)  # pick odd numbers only
         if _is_probable_prime(candidate, rounds):
-            return candidate
\ No newline at end of file
+            return candidate
+
+
+def available_cpus() -> int:
+    """CPUs this process may use: affinity mask, capped by a cgroup v2 quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as fh:
+            quota, period = fh.read().split()[:2]
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
@@ -0,0 +1,28 @@
+from backend.services.geo_index import GeoIndex
+
+def test_nearest_first_and_radius_respected():
+    index = GeoIndex()
+    index.build([
+        (1, 37.5665, 126.9780, {"name": "시청"}),
+        (2, 37.5700, 126.9830, {"name": "종각"}),
+        (3, 35.1796, 129.0756, {"name": "부산"}),
+    ])
+    ids, dist = index.within(37.5665, 126.9780, 5.0)
+    assert ids.tolist() == [1, 2]
+    assert dist[0] == 0.0
+
+def test_adds_during_a_rebuild_survive_the_swap():
+    index = GeoIndex()
+    index.build([(1, 37.5665, 126.9780, {})])
+
+    def rows():
+        yield (1, 37.5665, 126.9780, {})
+        index.add(5, 37.5670, 126.9790, {"name": "new"})      # arrives while the rebuild reads MySQL
+        assert 5 in index.within(37.5665, 126.9780, 1.0)[0]     # … and is found straight away
+        yield (2, 37.5700, 126.9830, {})
+
+    index.build(rows())
+    assert len(index) == 3
+    assert sorted(index.within(37.5665, 126.9780, 5.0)[0].tolist()) == [1, 2, 5]
+    assert index.doc(5) == {"name": "new"}
+    assert index.max_id() == 5
@@ -0,0 +1,7 @@
+from backend.scripts.check_import_time import IMPORT_BUDGET_MS, RUNS, best_of, eager_modules
+
+# RUNS fresh interpreters with every service pointed at a closed port (a few s)
+def test_import_stays_within_budget_and_lazy():
+    total_us, rows = best_of(RUNS)
+    assert eager_modules(rows) == []
+    assert total_us / 1e3 <= IMPORT_BUDGET_MS
@@ -0,0 +1,136 @@
+import asyncio
+from typing import Any, Dict, List, Tuple
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from backend.services import kakao
+from backend.services.kakao import ADDRESS_PATH, COORD2ADDR_PATH, KEYWORD_PATH, KakaoClient
+
+class FakeKakao:
+    """Scripted Kakao Local API: queued responses per path, every request logged."""
+
+    def __init__(self) -> None:
+        self.queued: Dict[str, List[httpx.Response]] = {}
+        self.requests: List[httpx.Request] = []
+        self.sleeps: List[float] = []
+        self.store: Dict[Tuple[str, str], Any] = {}                  # stand-in for the Mongo geocode cache
+
+    def queue(self, path: str, *responses: httpx.Response) -> None:
+        self.queued.setdefault(path, []).extend(responses)
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.url.path == KEYWORD_PATH and KEYWORD_PATH not in self.queued:
+            return _keyword_page(int(request.url.params["page"]), pageable=45)
+        return self.queued[request.url.path].pop(0)
+
+    def calls(self, path: str) -> List[httpx.Request]:
+        return [r for r in self.requests if r.url.path == path]
+
+def _keyword_page(page: int, pageable: int) -> httpx.Response:
+    docs = [{"id": f"{page}-{i}", "place_name": f"place {page}-{i}"} for i in range(15)]
+    return httpx.Response(200, json={"meta": {"pageable_count": pageable}, "documents": docs})
+
+@pytest.fixture
+def fake(monkeypatch) -> FakeKakao:
+    fake = FakeKakao()
+
+    async def no_sleep(delay: float) -> None:
+        fake.sleeps.append(delay)
+
+    monkeypatch.setattr(kakao.asyncio, "sleep", no_sleep)
+    monkeypatch.setattr(KakaoClient, "_cache_read", staticmethod(
+        lambda kind, key: ((kind, key) in fake.store, fake.store.get((kind, key)))
+    ))
+    monkeypatch.setattr(KakaoClient, "_cache_write", staticmethod(
+        lambda kind, key, value: fake.store.__setitem__((kind, key), value)
+    ))
+    return fake
+
+def _client(fake: FakeKakao) -> KakaoClient:
+    return KakaoClient("http://kakao.test", "key", transport=httpx.MockTransport(fake.handler))
+
+def test_retries_429_and_5xx_with_backoff(fake):
+    fake.queue(
+        ADDRESS_PATH,
+        httpx.Response(429, headers={"Retry-After": "2"}),
+        httpx.Response(503),
+        httpx.Response(200, json={"documents": [{"x": "127.0", "y": "37.5"}]}),
+    )
+    coords = asyncio.run(_client(fake).geocode("서울 중구 세종대로 110"))
+    assert coords == (37.5, 127.0)
+    assert len(fake.calls(ADDRESS_PATH)) == 3
+    assert fake.sleeps == [2.0, kakao.KAKAO_BACKOFF_BASE_S * 2]        # Retry-After, then exponential
+
+def test_gives_up_after_max_retries(fake):
+    fake.queue(ADDRESS_PATH, *[httpx.Response(500) for _ in range(kakao.KAKAO_MAX_RETRIES + 1)])
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(_client(fake).geocode("somewhere"))
+    assert exc.value.status_code == 500
+    assert len(fake.calls(ADDRESS_PATH)) == kakao.KAKAO_MAX_RETRIES + 1
+
+def test_client_errors_are_not_retried(fake):
+    fake.queue(ADDRESS_PATH, httpx.Response(401, json={"message": "bad key"}))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(_client(fake).geocode("somewhere"))
+    assert exc.value.status_code == 401
+    assert len(fake.calls(ADDRESS_PATH)) == 1
+
+def test_search_cache_hit_skips_the_api(fake):
+    client = _client(fake)
+
+    async def twice():
+        first = await client.search_places("  을지로   Cafe ")
+        second = await client.search_places("을지로 cafe")          # same normalised key
+        return first, second
+
+    first, second = asyncio.run(twice())
+    assert first == second and len(first) == 45
+    assert len(fake.calls(KEYWORD_PATH)) == 3
+
+def test_single_page_query_costs_one_call(fake):
+    fake.queue(KEYWORD_PATH, _keyword_page(1, pageable=7))
+    places = asyncio.run(_client(fake).search_places("작은 동네"))
+    assert len(places) == 15
+    assert [r.url.params["page"] for r in fake.calls(KEYWORD_PATH)] == ["1"]
+
+def test_geocode_miss_is_cached_and_hit_path_skips_the_api(fake):
+    fake.queue(ADDRESS_PATH, httpx.Response(200, json={"documents": []}))
+    fake.queue(COORD2ADDR_PATH, httpx.Response(200, json={"documents": [
+        {"road_address": None, "address": {"address_name": "서울 중구 태평로1가 31"}},
+    ]}))
+    client = _client(fake)
+
+    async def run():
+        return (
+            await client.geocode("없는 주소"),
+            await client.geocode("없는 주소"),
+            await client.reverse_geocode(37.566535, 126.977969),
+            await client.reverse_geocode(37.5665351, 126.9779691),     # same rounded key
+        )
+
+    miss, miss_again, addr, addr_again = asyncio.run(run())
+    assert miss is None and miss_again is None
+    assert addr == addr_again == "서울 중구 태평로1가 31"
+    assert len(fake.calls(ADDRESS_PATH)) == 1
+    assert len(fake.calls(COORD2ADDR_PATH)) == 1
+    assert fake.store[("address", "없는 주소")] is None
+
+def test_negative_geocode_entries_expire(monkeypatch):
+    writes: List[Dict[str, Any]] = []
+
+    class Collection:
+        def update_one(self, query, update, upsert):
+            writes.append(update)
+
+        def find_one(self, query, projection):
+            return {"value": None, "expireAt": kakao.datetime(2000, 1, 1)}
+
+    monkeypatch.setattr(kakao, "geocode_cache_collection", Collection())
+    KakaoClient._cache_write("address", "gone", None)
+    KakaoClient._cache_write("address", "here", [37.5, 127.0])
+    assert "expireAt" in writes[0]["$set"]
+    assert writes[1]["$unset"] == {"expireAt": ""}
+    assert KakaoClient._cache_read("address", "gone") == (False, None)      # expired, not yet reaped
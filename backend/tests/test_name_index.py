@@ -0,0 +1,26 @@
+from backend.services.name_index import PrefixIndex, normalize
+
+def _ids(index: PrefixIndex, query: str):
+    return [d["restaurant_id"] for d in index.search(query)]
+
+def test_half_typed_syllable_is_a_prefix():
+    assert normalize("부자").startswith(normalize("붖"))
+
+def test_later_words_match_and_whole_name_ranks_first():
+    index = PrefixIndex()
+    index.build([(1, "멘노야지 강남본점", None), (2, "강남 국밥", None)])
+    assert _ids(index, "강남") == [2, 1]
+
+def test_adds_during_a_rebuild_survive_the_swap():
+    index = PrefixIndex()
+    index.build([(1, "부자 식당", None)])
+
+    def rows():
+        yield (1, "부자 식당", None)
+        index.add(5, "강남 국밥", None)          # arrives while the rebuild reads MySQL
+        assert _ids(index, "강남") == [5]        # … and is searchable straight away
+        yield (2, "멘노야지 강남본점", None)
+
+    index.build(rows())
+    assert len(index) == 3
+    assert _ids(index, "강남") == [5, 2]
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from backend.services.calc_score import EMBED_DIM, _canonize_kw_list, _score_pair
+from backend.services.embedding_codec import encode_embedding
+from backend.services.nearby_topk import pair_upper_bound, restaurant_bound_freqs, user_bound_profile
+
+rng = np.random.default_rng(0)
+
+def _vec(dim: int = EMBED_DIM) -> list:
+    return rng.standard_normal(dim).tolist()
+
+def _user_kw(name: str, emb, freq: int, sentiment: str = "positive") -> dict:
+    return {"name": name, "sentiment": sentiment, "frequency": freq, "embedding": emb}
+
+def _rest_kw(name: str, emb, freq: int) -> dict:
+    return {"keyword": name, "frequency": freq, "embedding": emb}
+
+def _bound(user: list, rest: list) -> float:
+    pos, weight = user_bound_profile(user)
+    return pair_upper_bound(pos, weight, restaurant_bound_freqs(rest))
+
+def _score(user: list, rest: list) -> float:
+    return _score_pair(_canonize_kw_list(user), _canonize_kw_list(rest))
+
+def test_wrong_dimension_restaurant_keywords_do_not_lower_the_bound():
+    shared = _vec()
+    user = [_user_kw("매운", shared, 5)]
+    rest = [_rest_kw("매운", shared, 5), _rest_kw("legacy", _vec(768), 100), _rest_kw("empty", [], 40)]
+    assert _score(user, rest) > 0
+    assert _bound(user, rest) >= _score(user, rest)
+
+def test_wrong_dimension_user_keywords_are_ignored_on_both_sides():
+    shared = _vec()
+    user = [_user_kw("국물", shared, 2), _user_kw("old", _vec(3), 50), _user_kw("bad", _vec(3), 9, "negative")]
+    rest = [_rest_kw("국물", encode_embedding(shared), 3)]
+    assert _bound(user, rest) >= _score(user, rest) > 0
+
+@pytest.mark.parametrize("seed", range(20))
+def test_bound_dominates_score_on_random_profiles(seed):
+    local = np.random.default_rng(seed)
+    pool = [local.standard_normal(EMBED_DIM).tolist() for _ in range(12)]
+
+    def emb():
+        if local.random() < 0.2:                      # wrong size, dropped by _score_pair
+            return local.standard_normal(int(local.integers(1, 1000))).tolist()
+        return pool[int(local.integers(len(pool)))]
+
+    user = [
+        _user_kw(f"u{i}", emb(), int(local.integers(1, 6)), "positive" if local.random() < 0.8 else "negative")
+        for i in range(int(local.integers(1, 8)))
+    ]
+    rest = [_rest_kw(f"r{i}", emb(), int(local.integers(1, 30))) for i in range(int(local.integers(1, 15)))]
+    assert _bound(user, rest) >= _score(user, rest) - 1e-9
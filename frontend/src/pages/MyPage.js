@@ -77,14 +77,12 @@ const MyPage = () => {
   const fetchPostCount = useCallback(async () => {
     if (!userID) return;
     try {
-      const url  = `${API_ROOT}/search_review_es?size=500&sort=recent&viewer_id=${userID}`;
+      const url  = `${API_ROOT}/profile_summary/${userID}?recent=0`;
       const resp = await fetch(url);
       if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
 
       const json = await resp.json();
-      if (!json.success) throw new Error(json.error ?? "unknown");
-      const mine = (json.result ?? []).filter(r => r.user_id === userID);
-      setPostCount(mine.length);
+      setPostCount(json.review_count ?? 0);
     } catch (err) {
       console.error("[MyPage] post-count fetch failed:", err);
     }
@@ -57,22 +57,16 @@ const OthersPage = () => {
     setKeywords(Array.isArray(json.keywords) ? json.keywords : []);
   }, [targetId]);
 
-  const fetchPostCount = useCallback(async () => {
-    const url  = `${API_ROOT}/search_review_es?size=500&user_id=${targetId}&sort=recent`;
+  /* post count + follow flag in one cheap aggregate call */
+  const fetchSummary = useCallback(async () => {
+    const viewer = viewerId ? `&viewer_id=${viewerId}` : "";
+    const url  = `${API_ROOT}/profile_summary/${targetId}?recent=0${viewer}`;
     const resp = await fetch(url);
     if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
 
-    const { success, result } = await resp.json();
-    if (success) setPostCount((result ?? []).length);
-  }, [targetId]);
-
-  const fetchIsFollowing = useCallback(async () => {
-    if (!viewerId) return;
-    const resp = await fetch(`${API_ROOT}/following/${viewerId}`);
-    if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
-    const { following } = await resp.json();
-    const ids = (following ?? []).map(u => u.user_id);
-    setIsFollowing(ids.includes(targetId));
+    const json = await resp.json();
+    setPostCount(json.review_count ?? 0);
+    if (viewerId) setIsFollowing(Boolean(json.is_following));
   }, [viewerId, targetId]);
 
   // 워드클라우드 크기 변경
@@ -87,7 +81,7 @@ const OthersPage = () => {
     let cancelled = false;
     (async () => {
       try {
-        await Promise.all([fetchSocial(), fetchPostCount(), fetchIsFollowing()]);
+        await Promise.all([fetchSocial(), fetchSummary()]);
       } catch (err) {
         console.error("[OthersPage]", err);
         setError("사용자 정보를 불러오지 못했습니다.");
@@ -96,7 +90,7 @@ const OthersPage = () => {
       }
     })();
     return () => { cancelled = true; };
-  }, [fetchSocial, fetchPostCount, fetchIsFollowing]);
+  }, [fetchSocial, fetchSummary]);
 
   /* follow / unfollow */
   const toggleFollow = async () => {